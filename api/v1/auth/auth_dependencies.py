@@ -0,0 +1,87 @@
+# /api/v1/auth/auth_dependencies.py
+
+import hmac
+
+from fastapi import Depends, Header, HTTPException, Query
+from api.v1.auth import stream_tickets
+from api.v1.auth.auth_security import AuthSecurity
+from api.v1.config import CONFIG
+from api.v1.services.mongo import MongoDB, get_mongo
+
+TOKEN_PREFIX = "Bearer "
+
+
+async def get_current_user(authorization: str = Header(None)) -> dict:
+    """
+    FastAPI dependency: authenticate the request from its "Bearer <token>" header.
+
+    Args:
+        authorization (str): The Authorization header.
+
+    Returns:
+        dict: Decoded user information from the token.
+
+    Raises:
+        HTTPException: 401 if the header is missing or malformed, or the token is expired or invalid.
+    """
+    if authorization is None:
+        raise HTTPException(status_code=401, detail="Authorization token is missing.")
+
+    # Extract the token from "Bearer <token>"
+    if not authorization.startswith(TOKEN_PREFIX):
+        raise HTTPException(status_code=401, detail="Invalid authorization header format.")
+
+    return AuthSecurity.get_current_user(authorization[len(TOKEN_PREFIX):])
+
+
+async def get_stream_user(
+    authorization: str = Header(None),
+    ticket: str = Query(None),
+    mongo_service: MongoDB = Depends(get_mongo),
+) -> dict:
+    """
+    FastAPI dependency for streaming endpoints: like get_current_user, but also accepts a
+    single-use stream ticket as `?ticket=`, since browser EventSource cannot set headers
+    (see `stream_tickets`).
+
+    Args:
+        authorization (str): The Authorization header.
+        ticket (str): A stream ticket, when the header can't be sent.
+        mongo_service (MongoDB): The application-wide MongoDB instance.
+
+    Returns:
+        dict: The user: the decoded token, or just the `email` the ticket was issued to.
+
+    Raises:
+        HTTPException: 401 if neither is given, the token is malformed, expired or invalid,
+            or the ticket is unknown, expired or already used.
+    """
+    if authorization is None and ticket is not None:
+        email = await stream_tickets.redeem_ticket(mongo_service, ticket)
+        if email is None:
+            raise HTTPException(status_code=401, detail="Invalid or expired stream ticket.")
+        return {"email": email}
+    return await get_current_user(authorization)
+
+
+async def require_internal_token(authorization: str = Header(None)) -> None:
+    """
+    FastAPI dependency for operational endpoints (/stats, /metrics), which must not be served
+    next to the user API by default: they exist only while INTERNAL_ENDPOINTS_TOKEN is set,
+    and only for requests bearing that token.
+
+    Args:
+        authorization (str): The Authorization header.
+
+    Raises:
+        HTTPException: 404 (as for an unknown path) if the endpoints are disabled or the token
+            is missing or wrong.
+    """
+    expected = CONFIG['INTERNAL_ENDPOINTS_TOKEN']
+    if (
+        expected is None
+        or authorization is None
+        or not authorization.startswith(TOKEN_PREFIX)
+        or not hmac.compare_digest(authorization[len(TOKEN_PREFIX):].encode(), expected.encode())
+    ):
+        raise HTTPException(status_code=404, detail="Not Found")
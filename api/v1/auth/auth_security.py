@@ -1,11 +1,17 @@
 # /api/v1/auth/auth_security.py
 
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import HTTPException
 from passlib.context import CryptContext
 from datetime import datetime, timedelta, timezone
 import jwt
 
 from api.v1.config import CONFIG
+from api.v1.services.metrics import Gauge
 
 SECRET_KEY = CONFIG['JWT_SECRET_KEY']  # Make sure to set this in your config
 ALGORITHM = "HS256"
@@ -14,6 +20,73 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30 # Token expiration time
 # Create a password hashing context using bcrypt or Argon2 (depending on your choice)
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt is deliberately slow (~100-300 ms) and releases the GIL, so it runs on a bounded
+# thread pool instead of blocking the event loop. The pool size caps concurrent hashes.
+# It is created on first use and again after a shutdown, so a later app lifespan in the
+# same process (test clients, reloads) gets a fresh pool.
+_hash_executor: ThreadPoolExecutor = None
+_hash_stats = {"pending": 0, "completed": 0}
+
+
+def _get_hash_executor() -> ThreadPoolExecutor:
+    global _hash_executor
+    if _hash_executor is None:
+        _hash_executor = ThreadPoolExecutor(max_workers=CONFIG['PASSWORD_HASH_WORKERS'], thread_name_prefix="bcrypt")
+    return _hash_executor
+
+
+Gauge(
+    "password_hash_queue_depth", "bcrypt hashes and verifications waiting or running on the thread pool.",
+    function=lambda: {(): _hash_stats["pending"]},
+)
+
+
+class VerifiedTokenCache:
+    def __init__(self, maxsize: int):
+        """
+        Bounded LRU of tokens whose signature has already been verified.
+
+        Keys are SHA-256 digests of the token, so raw tokens are not kept in memory. An entry
+        is only served while now < the token's `exp`; after that the token is decoded again
+        and rejected as expired.
+
+        Args:
+            maxsize (int): Maximum number of cached tokens.
+
+        Returns:
+            None
+        """
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[bytes, tuple]" = OrderedDict()  # digest -> (exp, payload)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str):
+        key = hashlib.sha256(token.encode()).digest()
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, token: str, payload: dict):
+        exp = payload.get("exp")
+        if not isinstance(exp, (int, float)):
+            return  # Never cache a token that doesn't expire
+        self._entries[hashlib.sha256(token.encode()).digest()] = (exp, payload)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+token_cache = VerifiedTokenCache(CONFIG['TOKEN_CACHE_SIZE'])
+
 class AuthSecurity:
     @staticmethod
     def hash_password(password: str) -> str:
@@ -42,6 +115,56 @@ class AuthSecurity:
         """
         return pwd_context.verify(plain_password, hashed_password)
     
+    @staticmethod
+    async def _run_in_hash_pool(fn, *args):
+        _hash_stats["pending"] += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(_get_hash_executor(), fn, *args)
+        finally:
+            _hash_stats["pending"] -= 1
+            _hash_stats["completed"] += 1
+
+    @staticmethod
+    async def hash_password_async(password: str) -> str:
+        """
+        Hash the given password on the bcrypt thread pool.
+
+        Args:
+            password (str): The plaintext password to hash.
+
+        Returns:
+            str: The hashed password.
+        """
+        return await AuthSecurity._run_in_hash_pool(pwd_context.hash, password)
+
+    @staticmethod
+    async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+        """
+        Verify the given password against the hashed password on the bcrypt thread pool.
+
+        Args:
+            plain_password (str): The plaintext password.
+            hashed_password (str): The hashed password.
+
+        Returns:
+            bool: True if the password matches, False otherwise.
+        """
+        return await AuthSecurity._run_in_hash_pool(pwd_context.verify, plain_password, hashed_password)
+
+    @staticmethod
+    def hash_pool_stats() -> dict:
+        """
+        Pool size, calls waiting or running (queue depth) and calls completed.
+        """
+        return {"workers": CONFIG['PASSWORD_HASH_WORKERS'], "queue_depth": _hash_stats["pending"], "completed": _hash_stats["completed"]}
+
+    @staticmethod
+    def shutdown_hash_pool():
+        global _hash_executor
+        executor, _hash_executor = _hash_executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
     @staticmethod
     def create_access_token(data: dict, expires_delta: timedelta = None):
         to_encode = data.copy()
@@ -67,6 +190,7 @@ class AuthSecurity:
     def get_current_user(token: str):
         """
         Decodes the JWT token and returns the user information if valid.
+        Tokens verified before are served from `token_cache` until they expire.
         
         Args:
             token (str): The JWT token.
@@ -77,8 +201,12 @@ class AuthSecurity:
         Raises:
             HTTPException: If token is expired or invalid.
         """
+        cached = token_cache.get(token)
+        if cached is not None:
+            return cached
         try:
             decoded_data = AuthSecurity.decode_access_token(token)
+            token_cache.put(token, decoded_data)
             return decoded_data  # Return the decoded token's payload (user information)
         except Exception as e:
             raise HTTPException(status_code=401, detail=str(e))  # Unauthorized or invalid token
\ No newline at end of file
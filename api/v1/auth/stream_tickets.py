@@ -0,0 +1,66 @@
+# /api/v1/auth/stream_tickets.py
+
+"""
+Single-use tickets for opening a portfolio stream (GET /portfolio/stream).
+
+Browser EventSource cannot set an Authorization header, and a bearer token in the query
+string ends up in proxy and access logs. So a client trades its bearer token for a ticket
+(POST /portfolio/stream/ticket) and opens the stream with `?ticket=`. A ticket can only
+open a stream, expires after STREAM_TICKET_SECONDS and is consumed by the first request
+that presents it, so a logged URL is worthless.
+
+Tickets live in MongoDB so any worker can redeem them, and only their SHA-256 digest is
+stored. Redeeming is one find-and-delete, so a ticket opens at most one stream even when
+two workers race for it; a TTL index removes the expired ones.
+"""
+
+import hashlib
+import secrets
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from api.v1.config import CONFIG
+from api.v1.services.mongo import MongoDB
+
+DB_NAME = CONFIG['MONGO_DB_NAME']
+COLLECTION_NAME = "stream_tickets"
+
+
+def _digest(ticket: str) -> str:
+    return hashlib.sha256(ticket.encode()).hexdigest()
+
+
+async def issue_ticket(mongo: MongoDB, email: str) -> str:
+    """
+    Create a ticket that opens one portfolio stream for `email`.
+
+    Args:
+        mongo (MongoDB): The application-wide MongoDB instance.
+        email (str): The authenticated user.
+
+    Returns:
+        str: The ticket (URL-safe).
+    """
+    ticket = secrets.token_urlsafe(32)
+    expires_at = datetime.now(timezone.utc) + timedelta(seconds=CONFIG['STREAM_TICKET_SECONDS'])
+    await mongo.insert_one(DB_NAME, COLLECTION_NAME, {"ticket": _digest(ticket), "email": email, "expires_at": expires_at})
+    return ticket
+
+
+async def redeem_ticket(mongo: MongoDB, ticket: str) -> Optional[str]:
+    """
+    Consume a ticket.
+
+    Args:
+        mongo (MongoDB): The application-wide MongoDB instance.
+        ticket (str): The ticket from the stream request.
+
+    Returns:
+        Optional[str]: The user it was issued to, or None if it is unknown, expired or already used.
+    """
+    document = await mongo.find_one_and_delete(
+        DB_NAME, COLLECTION_NAME,
+        {"ticket": _digest(ticket), "expires_at": {"$gt": datetime.now(timezone.utc)}},
+        projection={"_id": 0, "email": 1},
+    )
+    return document["email"] if document else None
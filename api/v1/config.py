@@ -10,7 +10,102 @@ load_dotenv()  # Load environment variables from .env file
 
 CONFIG = {
     'MONGO_URL': os.getenv('MONGO_URL'),
+    # Database holding every collection of the app (point benchmarks at a scratch one)
+    'MONGO_DB_NAME': os.getenv('MONGO_DB_NAME', 'mfb_webapp'),
+    # One MongoDB client (and connection pool) per worker
+    'MONGO_MAX_POOL_SIZE': int(os.getenv('MONGO_MAX_POOL_SIZE', '100')),
+    'MONGO_MIN_POOL_SIZE': int(os.getenv('MONGO_MIN_POOL_SIZE', '0')),
+    'MONGO_WAIT_QUEUE_TIMEOUT_MS': int(os.getenv('MONGO_WAIT_QUEUE_TIMEOUT_MS', '5000')),
+    'MONGO_SERVER_SELECTION_TIMEOUT_MS': int(os.getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000')),
     'JWT_SECRET_KEY': os.getenv('JWT_SECRET_KEY'),
     'RAPID_MUT_FUND_KEY': os.getenv('RAPID_MUT_FUND_KEY'),
     'RAPID_URL': os.getenv('RAPID_URL'),
+
+    # Shared upstream HTTP client (connection pool, keep-alive, timeouts)
+    'RAPID_HTTP_MAX_CONNECTIONS': int(os.getenv('RAPID_HTTP_MAX_CONNECTIONS', '100')),
+    'RAPID_HTTP_MAX_KEEPALIVE': int(os.getenv('RAPID_HTTP_MAX_KEEPALIVE', '20')),
+    'RAPID_HTTP_KEEPALIVE_EXPIRY': float(os.getenv('RAPID_HTTP_KEEPALIVE_EXPIRY', '60')),
+    'RAPID_HTTP2': os.getenv('RAPID_HTTP2', 'false').lower() in ('1', 'true', 'yes'),
+    'RAPID_HTTP_CONNECT_TIMEOUT': float(os.getenv('RAPID_HTTP_CONNECT_TIMEOUT', '5')),
+    'RAPID_HTTP_TIMEOUT': float(os.getenv('RAPID_HTTP_TIMEOUT', '30')),
+
+    # Upstream resilience: per-attempt deadline (the full-dataset snapshot pull gets its own),
+    # jittered retries on timeouts/429/5xx, and a circuit breaker on consecutive failures
+    'RAPID_CALL_TIMEOUT': float(os.getenv('RAPID_CALL_TIMEOUT', '10')),
+    'RAPID_SNAPSHOT_CALL_TIMEOUT': float(os.getenv('RAPID_SNAPSHOT_CALL_TIMEOUT', '120')),
+    'RAPID_RETRY_ATTEMPTS': int(os.getenv('RAPID_RETRY_ATTEMPTS', '3')),
+    'RAPID_RETRY_BASE_DELAY': float(os.getenv('RAPID_RETRY_BASE_DELAY', '0.25')),
+    'RAPID_RETRY_MAX_DELAY': float(os.getenv('RAPID_RETRY_MAX_DELAY', '4')),
+    'RAPID_BREAKER_FAILURES': int(os.getenv('RAPID_BREAKER_FAILURES', '5')),
+    'RAPID_BREAKER_RESET_SECONDS': float(os.getenv('RAPID_BREAKER_RESET_SECONDS', '30')),
+
+    # RapidAPI plan limits, enforced per worker by a token bucket (0 disables).
+    # Interactive calls queue ahead of background jobs, each within its own wait budget.
+    'RAPID_RATE_LIMIT_PER_SECOND': float(os.getenv('RAPID_RATE_LIMIT_PER_SECOND', '5')),
+    'RAPID_RATE_LIMIT_BURST': int(os.getenv('RAPID_RATE_LIMIT_BURST', '10')),
+    'RAPID_QUEUE_MAX': int(os.getenv('RAPID_QUEUE_MAX', '500')),
+    'RAPID_QUEUE_MAX_WAIT_INTERACTIVE': float(os.getenv('RAPID_QUEUE_MAX_WAIT_INTERACTIVE', '2')),
+    'RAPID_QUEUE_MAX_WAIT_BACKGROUND': float(os.getenv('RAPID_QUEUE_MAX_WAIT_BACKGROUND', '300')),
+
+    # NAV lookup cache. AMFI publishes NAVs once per business day, so an hour of
+    # staleness is invisible to users while collapsing repeated lookups into one call.
+    'NAV_CACHE_TTL_SECONDS': float(os.getenv('NAV_CACHE_TTL_SECONDS', '3600')),
+    'NAV_CACHE_MAX_FAMILIES': int(os.getenv('NAV_CACHE_MAX_FAMILIES', '128')),
+    'NAV_CACHE_MAX_SCHEMES': int(os.getenv('NAV_CACHE_MAX_SCHEMES', '20000')),
+    # Past the TTL, serve the last good value for this long while refreshing in the background
+    'NAV_CACHE_STALE_SECONDS': float(os.getenv('NAV_CACHE_STALE_SECONDS', '86400')),
+
+    # Full open-ended NAV snapshot, pulled in one upstream call per cycle
+    'NAV_SNAPSHOT_REFRESH_SECONDS': float(os.getenv('NAV_SNAPSHOT_REFRESH_SECONDS', '3600')),
+    # Local copy of the latest snapshot, served from the moment a worker starts ('' disables)
+    'NAV_SNAPSHOT_PATH': os.getenv('NAV_SNAPSHOT_PATH', 'data/nav_snapshot.bin'),
+
+    # Background jobs (snapshot refresh, revaluation) run on one worker at a time: the holder
+    # of a MongoDB lease. The others poll MongoDB for the leader's snapshot.
+    'LEADER_LEASE_SECONDS': float(os.getenv('LEADER_LEASE_SECONDS', '30')),
+    'NAV_SNAPSHOT_POLL_SECONDS': float(os.getenv('NAV_SNAPSHOT_POLL_SECONDS', '30')),
+
+    # NAV history kept in memory per scheme (older ranges are read from MongoDB)
+    'NAV_HISTORY_CACHE_DAYS': int(os.getenv('NAV_HISTORY_CACHE_DAYS', '400')),
+    'NAV_HISTORY_CACHE_SCHEMES': int(os.getenv('NAV_HISTORY_CACHE_SCHEMES', '2000')),
+
+    # Portfolio streams (GET /portfolio/stream) send a comment this often when idle,
+    # so proxies don't time out the connection
+    'NAV_STREAM_KEEPALIVE_SECONDS': float(os.getenv('NAV_STREAM_KEEPALIVE_SECONDS', '15')),
+    # Lifetime of the single-use tickets that open a portfolio stream (see auth/stream_tickets.py)
+    'STREAM_TICKET_SECONDS': int(os.getenv('STREAM_TICKET_SECONDS', '30')),
+    # Each worker polls this often for purchase changes (buys, revaluation) made by any worker
+    # to its streaming users, looking back this much further to absorb clock skew between workers
+    'NAV_STREAM_SYNC_SECONDS': float(os.getenv('NAV_STREAM_SYNC_SECONDS', '2')),
+    'NAV_STREAM_SYNC_OVERLAP_SECONDS': float(os.getenv('NAV_STREAM_SYNC_OVERLAP_SECONDS', '10')),
+
+    # Background portfolio revaluation
+    'REVALUATION_INTERVAL_SECONDS': float(os.getenv('REVALUATION_INTERVAL_SECONDS', '3600')),
+    'REVALUATION_CONCURRENCY': int(os.getenv('REVALUATION_CONCURRENCY', '8')),
+    # Every stored portfolio summary is rebuilt from the purchases this often, to correct drift
+    'SUMMARY_RECONCILE_INTERVAL_SECONDS': float(os.getenv('SUMMARY_RECONCILE_INTERVAL_SECONDS', '86400')),
+
+    # Run explain() on known query shapes at startup and warn on collection scans
+    'MONGO_VERIFY_QUERY_PLANS': os.getenv('MONGO_VERIFY_QUERY_PLANS', 'false').lower() in ('1', 'true', 'yes'),
+
+    # bcrypt runs on this many worker threads, off the event loop
+    'PASSWORD_HASH_WORKERS': int(os.getenv('PASSWORD_HASH_WORKERS', '4')),
+
+    # GET /stats and /metrics are only served to requests with "Authorization: Bearer <token>"
+    # carrying this token; while it is unset (the default) they answer 404 like any unknown path
+    'INTERNAL_ENDPOINTS_TOKEN': os.getenv('INTERNAL_ENDPOINTS_TOKEN') or None,
+
+    # Already-verified JWTs kept in memory until their exp
+    'TOKEN_CACHE_SIZE': int(os.getenv('TOKEN_CACHE_SIZE', '10000')),
+
+    # Client-side caching of GET /fund_families (revalidated with its ETag afterwards)
+    'FUND_FAMILIES_MAX_AGE': int(os.getenv('FUND_FAMILIES_MAX_AGE', '300')),
+
+    # Encoder for large JSON responses: "orjson" or "std"
+    'JSON_RESPONSE_MODE': os.getenv('JSON_RESPONSE_MODE', 'orjson').lower(),
+
+    # Negotiated gzip/brotli response compression
+    'COMPRESSION_MIN_SIZE': int(os.getenv('COMPRESSION_MIN_SIZE', '1024')),
+    'GZIP_LEVEL': int(os.getenv('GZIP_LEVEL', '6')),
+    'BROTLI_QUALITY': int(os.getenv('BROTLI_QUALITY', '5')),
 }
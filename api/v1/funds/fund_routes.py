@@ -1,60 +1,68 @@
 # api/v1/fund_families/fund_families_routes.py
 
-from fastapi import APIRouter, HTTPException, Header
-from fastapi.responses import JSONResponse
-from api.v1.auth.auth_security import AuthSecurity
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from api.v1.auth.auth_dependencies import get_current_user
 from api.v1.funds.models import FundFamilyRequest, BuyRequest
+from api.v1.funds.scheme_listing import list_schemes
 from api.v1.services.rapidapi_mutfund import RapidAPIService
-from api.v1.services.mongo import MongoDB
+from api.v1.services.mongo import MongoDB, get_mongo
+from api.v1.services.nav_snapshot import nav_snapshot
+from api.v1.services.prepared_response import PreparedResponse
+from api.v1.services.fast_json import FastJSONResponse
+from api.v1.services.resilience import UpstreamUnavailable
+from api.v1.services.nav_history import nav_history, history_response
+from api.v1.services.nav_stream import nav_broadcaster
+from api.v1.services.scheme_search import scheme_search
+from api.v1.portfolio import summaries
 from api.v1.config import CONFIG
-from datetime import datetime, timezone
-import os
-import json
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+from pymongo.errors import DuplicateKeyError
+import logging
+import math
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
-mongo_service = MongoDB(CONFIG['MONGO_URL'])
-db_name = "mfb_webapp"  # Same database used in auth
+db_name = CONFIG['MONGO_DB_NAME']  # Same database used in auth
 collection_name = "purchases"  # Collection for purchase data
 
-# For API Savings (Direct File cache instead of using Redis)
-# Load fund families from the specific JSON file in the "funds" directory
-FUND_FAMILIES_JSON_PATH = os.path.join(os.path.dirname(__file__), "fund_families.json")
+# GET /fund_families body, encoded once per distinct family list
+_fund_families_response = {"families": None, "response": None}
 
-# Read the fund families from the JSON file
-with open(FUND_FAMILIES_JSON_PATH, "r") as f:
-    fund_families_data = json.load(f)
+def get_fund_families_response(fund_families) -> PreparedResponse:
+    """
+    Return the prepared /fund_families response, rebuilding its bytes and ETag only when
+    the family list differs from the one it was built from.
+    """
+    families = tuple(fund_families)
+    if _fund_families_response["families"] != families:
+        _fund_families_response["response"] = PreparedResponse(
+            {"status": "success", "fund_families": list(families)},
+            f"private, max-age={CONFIG['FUND_FAMILIES_MAX_AGE']}",
+        )
+        _fund_families_response["families"] = families
+    return _fund_families_response["response"]
 
 @router.get("/fund_families")
 async def get_fund_families(
-    authorization: str = Header(None)
+    request: Request,
+    current_user: dict = Depends(get_current_user)
     ):
     """
     Fetch all open ended schemes and filter all families using the /latest endpoint.
     """
-    if authorization is None:
-        raise HTTPException(status_code=401, detail="Authorization token is missing.")
-    
-    # Extract the token from "Bearer <token>"
-    token_prefix = "Bearer "
-    if not authorization.startswith(token_prefix):
-        raise HTTPException(status_code=401, detail="Invalid authorization code.")
-    
-    token = authorization[len(token_prefix):]  # Get the actual token
-
     try:
-        current_user = AuthSecurity.get_current_user(token)
-
-        # Return the fund families directly from the JSON file
-        return JSONResponse(
-            status_code=200,
-            content={"status": "success", "fund_families": fund_families_data["fund_families"]}
-        )
-
-        # Fetch data from RapidAPI
-        # all_open_ended_schemes = await RapidAPIService.fetch_latest_open_ended_schemes()
-
-        # Extract and filter fund families from all schemes
-        # fund_families = list(set(scheme["Mutual_Fund_Family"] for scheme in all_open_ended_schemes))
+        # Derived from the in-memory NAV snapshot (restored from disk at startup, then refreshed)
+        snapshot = nav_snapshot.current
+        if snapshot is None:
+            # Only before the very first snapshot of a fresh deployment has been fetched
+            raise HTTPException(
+                status_code=503,
+                detail="Fund families are not available yet, please retry later",
+                headers={"Retry-After": "30"},
+            )
+        fund_families = snapshot.families
 
         # Dev for UI
         # fund_families = {
@@ -69,7 +77,8 @@ async def get_fund_families(
         if not fund_families:
             raise HTTPException(status_code=404, detail="No fund families found!")
 
-        return {"status": "success", "fund_families": fund_families}
+        # Pre-encoded body with a strong ETag; If-None-Match hits get an empty 304
+        return get_fund_families_response(fund_families).respond(request)
     
     except HTTPException as e:
         raise e
@@ -79,25 +88,16 @@ async def get_fund_families(
 @router.post("/fund_schemes/latest/open_ended")
 async def get_open_ended_latest_schemes(
     request: FundFamilyRequest,
-    authorization: str = Header(None)
+    http_request: Request,
+    current_user: dict = Depends(get_current_user)
 ):
     """
     Filter out selected fund family and associated details.
-    """
-    if authorization is None:
-        raise HTTPException(status_code=401, detail="Authorization token is missing.")
-
-    # Extract the token from "Bearer <token>"
-    token_prefix = "Bearer "
-    if not authorization.startswith(token_prefix):
-        raise HTTPException(status_code=401, detail="Invalid authorization header format.")
-    
-    token = authorization[len(token_prefix):]  # Get the actual token
 
+    Without paging options the whole family is returned. `limit`/`cursor` page through it in
+    Scheme_Code order, `fields` projects each row, and `Scheme_Category`/`plan` filter it.
+    """
     try:
-        # Validate and decode the token
-        current_user = AuthSecurity.get_current_user(token)
-
         # Dev for UI
         # return {
         #     "status": "success",
@@ -127,41 +127,118 @@ async def get_open_ended_latest_schemes(
         #         ]
         #     }
     
-        # Fetch data from RapidAPI
-        all_schemes = await RapidAPIService.fetch_latest_ff_open_ended_schemes(request.fund_family)
-        return {"status": "success", "data": all_schemes}
+        # Serve from the in-memory NAV snapshot; only go upstream before the first refresh
+        snapshot = nav_snapshot.current
+        if snapshot is not None:
+            family_schemes = snapshot.family_schemes(request.fund_family)
+            if request.is_plain() and family_schemes:
+                # Encoded and compressed once per family per snapshot, then shared by every client
+                cache_key = ("family_schemes", request.fund_family)
+                prepared = snapshot.response_cache.get(cache_key)
+                if prepared is None:
+                    prepared = snapshot.response_cache[cache_key] = PreparedResponse(
+                        {"status": "success", "data": list(family_schemes)},
+                        "private, no-cache",
+                    )
+                return prepared.respond(http_request)
+        else:
+            family_schemes = sorted(
+                await RapidAPIService.get_ff_open_ended_schemes(request.fund_family),
+                key=lambda scheme: scheme["Scheme_Code"],
+            )
+
+        if request.is_plain():
+            # Encoded directly, skipping jsonable_encoder over thousands of scheme dicts
+            return FastJSONResponse({"status": "success", "data": list(family_schemes)})
+
+        # Paged / projected / filtered view, computed from the in-memory rows
+        return FastJSONResponse(list_schemes(family_schemes, request))
     
+    except HTTPException as e:
+        raise e  # Re-raise HTTP exceptions
+    except UpstreamUnavailable as e:
+        # Fail fast instead of a 500; clients should back off rather than pile on
+        retry_after = math.ceil(e.retry_after or CONFIG['RAPID_BREAKER_RESET_SECONDS'])
+        raise HTTPException(
+            status_code=503,
+            detail="NAV provider is temporarily unavailable, please retry later",
+            headers={"Retry-After": str(retry_after)},
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+@router.get("/fund_schemes/search")
+async def search_schemes(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Typeahead search over all open-ended schemes by name words, Scheme_Code or ISIN.
+
+    Every word of `q` must prefix-match a word of the scheme; exact code/ISIN hits rank
+    first, then whole-word matches. Served from the in-memory index of the NAV snapshot.
+    """
+    try:
+        index = scheme_search.current
+        if index is None:
+            # Nothing to search until the first snapshot refresh completes
+            raise HTTPException(
+                status_code=503,
+                detail="Scheme search is not available yet, please retry later",
+                headers={"Retry-After": "30"},
+            )
+
+        return FastJSONResponse({"status": "success", "data": index.search(q, limit)})
+
     except HTTPException as e:
         raise e  # Re-raise HTTP exceptions
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+def purchase_upsert_pipeline(static_fields, units, nav, now):
+    """
+    Build the update pipeline for an atomic buy.
+
+    Equivalent to `$inc` on `units`/`invested_amount` plus `$setOnInsert` for the static scheme
+    fields, but written as a pipeline so `total_cost` can be computed from the incremented
+    units within the same write. User-supplied strings are wrapped in `$literal` so they are
+    never interpreted as field paths.
+    """
+    units_after = {"$add": [{"$ifNull": ["$units", 0]}, units]}
+    fields = {
+        field: {"$ifNull": [f"${field}", {"$literal": value}]}
+        for field, value in static_fields.items()
+    }
+    fields.update({
+        "units": units_after,
+        "Net_Asset_Value": nav,
+        "total_cost": {"$multiply": [units_after, nav]},
+        # Cost basis; documents created before it was tracked start from their total_cost
+        "invested_amount": {"$add": [{"$ifNull": ["$invested_amount", {"$ifNull": ["$total_cost", 0]}]}, units * nav]},
+        "purchase_date": {"$ifNull": ["$purchase_date", now]},
+        "last_updated": now,
+    })
+    return [{"$set": fields}]
+
 @router.post("/buy")
 async def buy_fund(
     request: BuyRequest,
-    authorization: str = Header(None)  
+    current_user: dict = Depends(get_current_user),
+    mongo_service: MongoDB = Depends(get_mongo)
 ):
     """
     Endpoint to simulate the purchase of mutual fund units.
 
     Args:
         request (BuyRequest): Request body containing Scheme_Code and units.
-        authorization (str): JWT token for user authentication.
+        current_user (dict): The authenticated user, resolved from the bearer token.
+        mongo_service (MongoDB): The application-wide MongoDB instance.
 
     Returns:
         dict: Confirmation of the simulated purchase or an error message.
     """
-    if authorization is None:
-        raise HTTPException(status_code=401, detail="Authorization token is missing.")
-
-    # Extract the token from "Bearer <token>"
-    token_prefix = "Bearer "
-    if not authorization.startswith(token_prefix):
-        raise HTTPException(status_code=401, detail="Invalid authorization header format.")
-    
-    token = authorization[len(token_prefix):]  # Get the actual token
     try:
-        current_user = AuthSecurity.get_current_user(token)
         user_email = current_user["email"]  # Use email as the unique identifier
         scheme_code = request.Scheme_Code
         scheme_name = request.Scheme_Name
@@ -182,47 +259,48 @@ async def buy_fund(
         # Calculate total cost
         total_cost = nav * units
 
-        # Check if the user already has a purchase for this Scheme_Code
-        existing_purchase = await mongo_service.find_one(
-            db_name,
-            collection_name,
-            {"email": user_email, "Scheme_Code": scheme_code}
-        )
-
-        if existing_purchase:
-            # Update the existing purchase
-            updated_units = existing_purchase["units"] + units
-            updated_total_cost = updated_units * nav  # Recalculate total cost
-            await mongo_service.update_one(
-                db_name,
-                collection_name,
-                {"_id": existing_purchase["_id"]},
-                {
-                    "units": updated_units,
-                    "Net_Asset_Value": nav,
-                    "total_cost": updated_total_cost,
-                    "last_updated": datetime.now(timezone.utc)
-                }
-            )
-            action = "updated"
-        else:
-            # Create a new purchase record
-            new_purchase = {
-                "email": user_email,
-                "Scheme_Code": scheme_code,
+        # Single atomic upsert on (email, Scheme_Code): adds the units and derives total_cost
+        # from the post-increment units in the same write, so concurrent buys can't lose units
+        # or create duplicate documents. The unique index on the pair backs this up.
+        update = purchase_upsert_pipeline(
+            {
                 "Scheme_Name": scheme_name,
                 "Date": date,
                 "Scheme_Category": scheme_category,
                 "Mutual_Fund_Family": mutual_fund_family,
-                "units": units,
-                "Net_Asset_Value": nav,
                 "ISIN_Div_Payout_ISIN_Growth": isig,
                 "ISIN_Div_Reinvestment": isir,
-                "total_cost": total_cost,
-                "purchase_date": datetime.now(timezone.utc)
-            }
-            await mongo_service.insert_one(db_name, collection_name, new_purchase)
-            action = "created"
+            },
+            units,
+            nav,
+            datetime.now(timezone.utc),
+        )
+        query = {"email": user_email, "Scheme_Code": scheme_code}
+        # The pre-buy document yields the portfolio summary delta
+        projection = {"_id": 1, "units": 1, "total_cost": 1, "Scheme_Category": 1}
+        try:
+            previous = await mongo_service.find_one_and_update(
+                db_name, collection_name, query, update, upsert=True, return_new=False, projection=projection
+            )
+        except DuplicateKeyError:
+            # Lost an insert race for the same (email, Scheme_Code); the document exists now
+            previous = await mongo_service.find_one_and_update(
+                db_name, collection_name, query, update, upsert=True, return_new=False, projection=projection
+            )
+        action = "updated" if previous else "created"
+
+        try:
+            await summaries.apply_purchase(mongo_service, user_email, previous, units, nav, scheme_category)
+        except Exception:
+            # The purchase itself is stored; drop the summary so the next read rebuilds it
+            logger.exception("Could not update the portfolio summary of %s", user_email)
+            try:
+                await summaries.invalidate_summary(mongo_service, user_email)
+            except Exception:
+                # Left stale until the next reconciliation; the buy still succeeded
+                logger.exception("Could not invalidate the portfolio summary of %s", user_email)
+        units_held = (previous.get("units") or 0) + units if previous else units
+        nav_broadcaster.update_holding(user_email, scheme_code, units_held, nav)
             
         # Respond with success
         return {
@@ -237,3 +315,33 @@ async def buy_fund(
         raise e  # Re-raise HTTP exceptions
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+@router.get("/nav_history/{scheme_code}")
+async def get_nav_history(
+    scheme_code: int,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    current_user: dict = Depends(get_current_user),
+    mongo_service: MongoDB = Depends(get_mongo),
+):
+    """
+    NAV history of a scheme between `start` and `end` (inclusive, YYYY-MM-DD).
+
+    Defaults to the last year. Returned as parallel `dates` and `navs` lists.
+    """
+    try:
+        end = end or date.today()
+        start = start or end - timedelta(days=365)
+        if start > end:
+            raise HTTPException(status_code=400, detail="start must not be after end.")
+
+        dates, navs = await nav_history.history(mongo_service, scheme_code, start.toordinal(), end.toordinal())
+        if not dates:
+            raise HTTPException(status_code=404, detail="No NAV history found for this scheme and range.")
+
+        return FastJSONResponse(history_response(scheme_code, dates, navs))
+
+    except HTTPException as e:
+        raise e  # Re-raise HTTP exceptions
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
@@ -1,8 +1,18 @@
-from pydantic import BaseModel
+from typing import List, Literal, Optional
+from pydantic import BaseModel, Field
 
 # Define the request model
 class FundFamilyRequest(BaseModel):
     fund_family: str
+    # Optional paging / projection / filtering; omit them all to get the full family list
+    limit: Optional[int] = Field(None, ge=1, le=5000, description="Maximum schemes per page")
+    cursor: Optional[str] = Field(None, description="next_cursor from the previous page")
+    fields: Optional[List[str]] = Field(None, description="Scheme fields to return")
+    Scheme_Category: Optional[str] = Field(None, description="Only schemes in this category")
+    plan: Optional[Literal["growth", "idcw"]] = Field(None, description="Growth or IDCW options only")
+
+    def is_plain(self) -> bool:
+        return not (self.limit or self.cursor or self.fields or self.Scheme_Category or self.plan)
 
 class BuyRequest(BaseModel):
     Scheme_Code: int
@@ -13,4 +23,4 @@ class BuyRequest(BaseModel):
     units: int
     nav: float
     ISIN_Div_Payout_ISIN_Growth: str
-    ISIN_Div_Reinvestment: str
\ No newline at end of file
+    ISIN_Div_Reinvestment: str
@@ -0,0 +1,97 @@
+# /api/v1/funds/scheme_listing.py
+
+"""
+Server-side paging, projection and filtering of a family's scheme list.
+
+Works on rows already in memory (NAV snapshot or cached upstream response), ordered by
+Scheme_Code so a cursor (the last Scheme_Code of a page) stays stable across requests.
+"""
+
+from bisect import bisect_right
+from operator import itemgetter
+from typing import Any, Dict, List, Optional, Sequence
+
+from fastapi import HTTPException
+
+from api.v1.funds.models import FundFamilyRequest
+
+SCHEME_FIELDS = (
+    "Scheme_Code",
+    "ISIN_Div_Payout_ISIN_Growth",
+    "ISIN_Div_Reinvestment",
+    "Scheme_Name",
+    "Net_Asset_Value",
+    "Date",
+    "Scheme_Type",
+    "Scheme_Category",
+    "Mutual_Fund_Family",
+)
+
+_IDCW_MARKERS = ("IDCW", "DIVIDEND")
+
+
+def scheme_plan(scheme: Dict[str, Any]) -> str:
+    """
+    "idcw" or "growth" for a scheme row.
+
+    The option is named in Scheme_Name for nearly every scheme ("... - IDCW", "... - Growth",
+    older "Dividend" names). When the name says neither, a reinvestment ISIN means the row is
+    an IDCW option.
+    """
+    name = (scheme.get("Scheme_Name") or "").upper()
+    if any(marker in name for marker in _IDCW_MARKERS):
+        return "idcw"
+    if "GROWTH" in name:
+        return "growth"
+    reinvestment_isin = scheme.get("ISIN_Div_Reinvestment")
+    return "idcw" if reinvestment_isin and reinvestment_isin != "-" else "growth"
+
+
+def list_schemes(schemes: Sequence[Dict[str, Any]], request: FundFamilyRequest) -> Dict[str, Any]:
+    """
+    Apply the request's filters, cursor, limit and field projection to `schemes`.
+
+    Args:
+        schemes (Sequence[Dict[str, Any]]): The family's scheme rows, sorted by Scheme_Code.
+        request (FundFamilyRequest): The listing request.
+
+    Returns:
+        Dict[str, Any]: Response content with `data` and `next_cursor` (None on the last page).
+
+    Raises:
+        HTTPException: 400 for an unknown field or a malformed cursor.
+    """
+    fields: Optional[List[str]] = request.fields
+    if fields:
+        unknown = [field for field in fields if field not in SCHEME_FIELDS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+
+    start = 0
+    if request.cursor:
+        try:
+            after = int(request.cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor.")
+        # Resume right after the cursor without rescanning the earlier pages
+        start = bisect_right(schemes, after, key=itemgetter("Scheme_Code"))
+
+    limit = request.limit
+    page = []
+    next_cursor = None
+    for i in range(start, len(schemes)):
+        scheme = schemes[i]
+        if request.Scheme_Category and scheme.get("Scheme_Category") != request.Scheme_Category:
+            continue
+        if request.plan and scheme_plan(scheme) != request.plan:
+            continue
+        if limit is not None and len(page) == limit:
+            next_cursor = str(page[-1]["Scheme_Code"])
+            break
+        page.append(scheme)
+
+    if fields:
+        data = [{field: scheme.get(field) for field in fields} for scheme in page]
+    else:
+        data = page
+    return {"status": "success", "data": data, "next_cursor": next_cursor}
@@ -0,0 +1,181 @@
+# /api/v1/portfolio/analytics.py
+
+"""
+Portfolio analytics over a user's holdings, computed column-wise.
+
+Holdings are read once into parallel columns (units, cost basis, current NAV, years held,
+category, family); valuation, gains, allocations and XIRR are then array operations over
+those columns with NumPy.
+
+XIRR is approximate: a holding document keeps its first `purchase_date` and the summed
+`invested_amount`, not every individual buy, so each holding is treated as one cash
+outflow at its first purchase and the portfolio value today as the single inflow.
+"""
+
+import math
+from array import array
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+DAYS_PER_YEAR = 365.25
+
+# Fields read from each purchase document
+ANALYTICS_PROJECTION = {
+    "_id": 0,
+    "Scheme_Code": 1,
+    "Scheme_Category": 1,
+    "Mutual_Fund_Family": 1,
+    "units": 1,
+    "Net_Asset_Value": 1,
+    "total_cost": 1,
+    "invested_amount": 1,
+    "purchase_date": 1,
+}
+
+# XIRR solver: Newton's method on the net-value function, kept inside this bracket
+XIRR_MIN_RATE = -0.9999
+XIRR_MAX_RATE = 1000.0
+XIRR_TOLERANCE = 1e-9
+XIRR_MAX_ITERATIONS = 100
+# Below this average holding period (in years) an annualized rate is meaningless
+XIRR_MIN_YEARS = 1 / DAYS_PER_YEAR
+
+
+def _as_utc(value: Any) -> Optional[datetime]:
+    if not isinstance(value, datetime):
+        return None
+    # PyMongo returns naive datetimes that are UTC
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def holdings_columns(
+    purchases: Sequence[Dict[str, Any]],
+    current_nav: Callable[[int], Optional[float]],
+    now: datetime,
+) -> Dict[str, Any]:
+    """
+    Split purchase documents into the columns the analytics run on.
+
+    Numeric columns are `array('d')` (wrapped by NumPy without copying); category and
+    family are factorized into `array('i')` group ids plus their distinct names.
+
+    Args:
+        purchases (Sequence[Dict[str, Any]]): Purchase documents (see ANALYTICS_PROJECTION).
+        current_nav (Callable[[int], Optional[float]]): Latest NAV of a scheme code (e.g.
+            `NavSnapshot.nav`); holdings it returns None for are valued at their stored
+            `Net_Asset_Value`.
+        now (datetime): Valuation time.
+
+    Returns:
+        Dict[str, Any]: `units`, `invested`, `nav` and `years` columns, `category`/`family`
+        group ids and `category_names`/`family_names`.
+    """
+    now_ts = now.timestamp()
+    units, invested, navs, years = array("d"), array("d"), array("d"), array("d")
+    categories, families = array("i"), array("i")
+    category_ids: Dict[str, int] = {}
+    family_ids: Dict[str, int] = {}
+    for purchase in purchases:
+        purchase_date = _as_utc(purchase.get("purchase_date"))
+        held_seconds = now_ts - purchase_date.timestamp() if purchase_date else 0.0
+        nav = current_nav(purchase["Scheme_Code"])
+        units.append(purchase.get("units") or 0)
+        # Documents written before the cost basis was tracked fall back to their total_cost
+        invested.append(purchase.get("invested_amount", purchase.get("total_cost")) or 0.0)
+        navs.append(nav if nav is not None else purchase.get("Net_Asset_Value") or 0.0)
+        years.append(max(held_seconds, 0.0) / 86400 / DAYS_PER_YEAR)
+        categories.append(category_ids.setdefault(purchase.get("Scheme_Category") or "Unknown", len(category_ids)))
+        families.append(family_ids.setdefault(purchase.get("Mutual_Fund_Family") or "Unknown", len(family_ids)))
+    return {
+        "units": units,
+        "invested": invested,
+        "nav": navs,
+        "years": years,
+        "category": categories,
+        "category_names": list(category_ids),
+        "family": families,
+        "family_names": list(family_ids),
+    }
+
+
+def _allocation(names: List[str], totals: List[float], total_value: float) -> List[Dict[str, Any]]:
+    rows = [
+        {"name": name, "value": round(value, 2), "weight": round(value / total_value, 6) if total_value else 0.0}
+        for name, value in zip(names, totals)
+    ]
+    rows.sort(key=lambda row: row["value"], reverse=True)
+    return rows
+
+
+def _solve_xirr(net_value, net_value_slope, mean_years: float) -> Optional[float]:
+    """
+    Newton iterations on r for net_value(r) = 0, clamped to the solver bracket.
+    """
+    if mean_years < XIRR_MIN_YEARS:
+        return None
+    rate = 0.1
+    for _ in range(XIRR_MAX_ITERATIONS):
+        value, slope = net_value(rate), net_value_slope(rate)
+        if slope == 0 or not math.isfinite(value) or not math.isfinite(slope):
+            return None
+        next_rate = min(max(rate - value / slope, XIRR_MIN_RATE), XIRR_MAX_RATE)
+        if abs(next_rate - rate) < XIRR_TOLERANCE:
+            return next_rate
+        rate = next_rate
+    return None
+
+
+def _analytics(columns: Dict[str, list]) -> Dict[str, Any]:
+    units = np.frombuffer(columns["units"], dtype=np.float64)
+    invested = np.frombuffer(columns["invested"], dtype=np.float64)
+    years = np.frombuffer(columns["years"], dtype=np.float64)
+    value = units * np.frombuffer(columns["nav"], dtype=np.float64)
+
+    total_value = float(value.sum())
+    total_invested = float(invested.sum())
+
+    allocations = {}
+    for field, column in (("Scheme_Category", "category"), ("Mutual_Fund_Family", "family")):
+        names = columns[f"{column}_names"]
+        groups = np.frombuffer(columns[column], dtype=np.intc)
+        totals = np.bincount(groups, weights=value, minlength=len(names)) if len(groups) else np.zeros(len(names))
+        allocations[field] = _allocation(names, totals.tolist(), total_value)
+
+    # Net value today of the outflows at rate r: V - sum(invested_i * (1 + r) ** years_i)
+    xirr = None
+    if total_invested > 0:
+        xirr = _solve_xirr(
+            lambda r: total_value - float(invested @ np.power(1 + r, years)),
+            lambda r: -float((invested * years) @ np.power(1 + r, years - 1)),
+            float(invested @ years) / total_invested,
+        )
+    return {"current_value": total_value, "invested_amount": total_invested, "allocation": allocations, "xirr": xirr}
+
+
+def compute_analytics(columns: Dict[str, list]) -> Dict[str, Any]:
+    """
+    Value the holdings and summarize them.
+
+    Args:
+        columns (Dict[str, list]): Output of `holdings_columns`.
+
+    Returns:
+        Dict[str, Any]: Totals, absolute and percentage gain, allocation by Scheme_Category and
+        Mutual_Fund_Family (value and weight, largest first), and the approximate XIRR in percent
+        (None when it cannot be determined, e.g. everything was bought today).
+    """
+    result = _analytics(columns)
+
+    current_value, invested = result["current_value"], result["invested_amount"]
+    gain = current_value - invested
+    return {
+        "holdings": len(columns["units"]),
+        "current_value": round(current_value, 2),
+        "invested_amount": round(invested, 2),
+        "gain": round(gain, 2),
+        "gain_percent": round(gain / invested * 100, 2) if invested else None,
+        "xirr_percent": round(result["xirr"] * 100, 2) if result["xirr"] is not None else None,
+        "allocation": result["allocation"],
+    }
@@ -1,40 +1,36 @@
-from fastapi import APIRouter, HTTPException, Header
-from fastapi.responses import JSONResponse
-from api.v1.auth.auth_security import AuthSecurity
-from api.v1.services.mongo import MongoDB
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import JSONResponse, StreamingResponse
+from api.v1.auth import stream_tickets
+from api.v1.auth.auth_dependencies import get_current_user, get_stream_user
 from api.v1.config import CONFIG
-from api.v1.services.rapidapi_mutfund import RapidAPIService
-import asyncio 
+from api.v1.services.mongo import MongoDB, get_mongo
+from api.v1.services.fast_json import FastJSONResponse
+from api.v1.services.nav_snapshot import nav_snapshot
+from api.v1.services.nav_stream import initial_holdings, nav_broadcaster, portfolio_events
+from api.v1.portfolio.analytics import ANALYTICS_PROJECTION, compute_analytics, holdings_columns
+from api.v1.portfolio import summaries
+from datetime import datetime, timezone
 
 router = APIRouter()
-mongo_service = MongoDB(CONFIG['MONGO_URL'])
-db_name = "mfb_webapp"  # Same database used in auth
+db_name = CONFIG['MONGO_DB_NAME']  # Same database used in auth
 collection_name = "purchases"  # Collection for purchase data
 
 @router.get("/portfolio")
-async def get_portfolio(authorization: str = Header(None)):
+async def get_portfolio(
+    current_user: dict = Depends(get_current_user),
+    mongo_service: MongoDB = Depends(get_mongo)
+):
     """
     Fetch the portfolio of the current user.
 
     Args:
-        authorization (str): JWT token for user authentication.
+        current_user (dict): The authenticated user, resolved from the bearer token.
+        mongo_service (MongoDB): The application-wide MongoDB instance.
 
     Returns:
         dict: A list of all mutual fund purchases by the user.
     """
-    if authorization is None:
-        raise HTTPException(status_code=401, detail="Authorization token is missing.")
-
-    # Extract the token from "Bearer <token>"
-    token_prefix = "Bearer "
-    if not authorization.startswith(token_prefix):
-        raise HTTPException(status_code=401, detail="Invalid authorization header format.")
-    
-    token = authorization[len(token_prefix):]  # Get the actual token
-
     try:
-        # Validate and decode the token
-        current_user = AuthSecurity.get_current_user(token)
         user_email = current_user["email"]  # Use email as the unique identifier
 
         # Fetch all purchase records for the user
@@ -64,83 +60,165 @@ async def get_portfolio(authorization: str = Header(None)):
                 "units": purchase["units"],
                 "Net_Asset_Value": purchase["Net_Asset_Value"],
                 "total_cost": purchase["total_cost"],
-                "purchase_date": purchase["purchase_date"].isoformat(),
-                "last_updated": purchase.get("last_updated", "").isoformat() if purchase.get("last_updated") else None,
+                # datetimes are encoded as ISO 8601 by FastJSONResponse
+                "purchase_date": purchase["purchase_date"],
+                "last_updated": purchase.get("last_updated"),
             }
             for purchase in purchases
         ]
 
-        return {"status": "success", "portfolio": portfolio}
+        return FastJSONResponse({"status": "success", "portfolio": portfolio})
 
     except HTTPException as e:
         raise e  # Re-raise HTTP exceptions
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
-# Dev for UI: Testing Only
-# @router.get("/portfolio/update")
-# async def test_endpoint():
-#     scheme_doc = await mongo_service.find_one(
-#         db_name,
-#         collection_name,
-#         {"Scheme_Code": 119551}
-#     )
-#     if not scheme_doc:
-#         return { "status": "error", "message": "No scheme found." }
-#     result = await update_nav_and_total_cost(scheme_doc)
-#     return result
-
-async def get_all_scheme_documents():
-    scheme_documents = await mongo_service.find_all(
-        db_name,
-        collection_name
-    )
-    return scheme_documents
-
-async def update_nav_and_total_cost(scheme_document):
-    scheme_code = scheme_document['Scheme_Code']
-    units = scheme_document['units']
-
-    # fetch NAV data from RapidAPI
-    api_data = await RapidAPIService.fetch_oes_schemes(scheme_code)
-    
-    if api_data and api_data['status'] == 'success':
-        latest_nav = api_data['data'][0]['Net_Asset_Value']
-
-        # Calculate new total_cost
-        new_total_cost = latest_nav * units
-
-        # Update MongoDB
-
-        # Check for the  purchase for this Scheme_Code
-        purchase = await mongo_service.find_one(
+@router.get("/portfolio/analytics")
+async def get_portfolio_analytics(
+    current_user: dict = Depends(get_current_user),
+    mongo_service: MongoDB = Depends(get_mongo)
+):
+    """
+    Valuation summary of the current user's portfolio.
+
+    Holdings are valued at the latest snapshot NAVs (falling back to the NAV stored on the
+    purchase) and summarized as current value, invested amount, gain, allocation by
+    Scheme_Category and Mutual_Fund_Family, and an approximate XIRR.
+
+    Args:
+        current_user (dict): The authenticated user, resolved from the bearer token.
+        mongo_service (MongoDB): The application-wide MongoDB instance.
+
+    Returns:
+        dict: The analytics summary.
+    """
+    try:
+        purchases = await mongo_service.find_all(
             db_name,
             collection_name,
-            {"Scheme_Code": scheme_code},
+            {"email": current_user["email"]},
+            ANALYTICS_PROJECTION,
+        )
+
+        if not purchases:
+            return JSONResponse(
+                status_code=404,
+                content={"status": "error", "message": "No purchases found for this user."}
+            )
+
+        snapshot = nav_snapshot.current
+        now = datetime.now(timezone.utc)
+        columns = holdings_columns(purchases, snapshot.nav if snapshot else lambda code: None, now)
+        analytics = compute_analytics(columns)
+        analytics["as_of"] = now
+        analytics["nav_snapshot_at"] = (
+            datetime.fromtimestamp(snapshot.fetched_at, timezone.utc) if snapshot else None
         )
 
-        if purchase:
-            # Update the purchase document
-            await mongo_service.update_one(
-                db_name,
-                collection_name,
-                {"_id": purchase["_id"]},
-                {
-                    "Net_Asset_Value": latest_nav, 
-                    "total_cost": new_total_cost
-                }
+        return FastJSONResponse({"status": "success", "analytics": analytics})
+
+    except HTTPException as e:
+        raise e  # Re-raise HTTP exceptions
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+@router.get("/portfolio/summary")
+async def get_portfolio_summary(
+    current_user: dict = Depends(get_current_user),
+    mongo_service: MongoDB = Depends(get_mongo)
+):
+    """
+    Totals and per-category breakdown of the current user's portfolio.
+
+    Served from the user's materialized summary document (one indexed lookup), which /buy
+    and the revaluation job keep up to date incrementally.
+
+    Args:
+        current_user (dict): The authenticated user, resolved from the bearer token.
+        mongo_service (MongoDB): The application-wide MongoDB instance.
+
+    Returns:
+        dict: Invested amount, current value, gain, holdings count and categories.
+    """
+    try:
+        summary = await summaries.get_summary(mongo_service, current_user["email"])
+
+        if not summary.get("holdings"):
+            return JSONResponse(
+                status_code=404,
+                content={"status": "error", "message": "No purchases found for this user."}
             )
-            return { "status": "success", "message": "NAV and total_cost updated successfully" }
-        else:
-            return { "status": "error", "message": "No purchase found for this Scheme Code" }
-        
-
-async def run_hourly_updates():
-    while True:
-        # Get all scheme documents
-        scheme_documents = await get_all_scheme_documents()
-        for scheme_document in scheme_documents:
-            # Sleep for 1 hour: before (more practical to not have updates on every startup)
-            await asyncio.sleep(3600)
-            await update_nav_and_total_cost(scheme_document)
 
+        return FastJSONResponse({"status": "success", "summary": summaries.summary_response(summary)})
+
+    except HTTPException as e:
+        raise e  # Re-raise HTTP exceptions
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+@router.post("/portfolio/stream/ticket")
+async def create_stream_ticket(
+    current_user: dict = Depends(get_current_user),
+    mongo_service: MongoDB = Depends(get_mongo)
+):
+    """
+    Issue a single-use, short-lived ticket for opening GET /portfolio/stream?ticket=...
+
+    Args:
+        current_user (dict): The authenticated user, resolved from the bearer token.
+        mongo_service (MongoDB): The application-wide MongoDB instance.
+
+    Returns:
+        dict: The ticket and its lifetime in seconds.
+    """
+    try:
+        ticket = await stream_tickets.issue_ticket(mongo_service, current_user["email"])
+        return {"status": "success", "ticket": ticket, "expires_in": CONFIG['STREAM_TICKET_SECONDS']}
+
+    except HTTPException as e:
+        raise e  # Re-raise HTTP exceptions
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+@router.get("/portfolio/stream")
+async def stream_portfolio(
+    current_user: dict = Depends(get_stream_user),
+    mongo_service: MongoDB = Depends(get_mongo)
+):
+    """
+    Live portfolio updates as Server-Sent Events.
+
+    Sends a `ready` event with the user's holdings valued at the latest NAVs, then a `nav`
+    event with only the holdings whose NAV (or units) changed, after every snapshot refresh,
+    revaluation cycle or purchase, whichever worker made it. Holdings are read once per
+    connection; updates are fanned out in memory (see `nav_stream`). Browsers, whose
+    EventSource cannot set headers, pass a ticket from POST /portfolio/stream/ticket as `?ticket=`.
+
+    Args:
+        current_user (dict): The authenticated user, from the bearer token or the `ticket` query parameter.
+        mongo_service (MongoDB): The application-wide MongoDB instance.
+
+    Returns:
+        StreamingResponse: A `text/event-stream` that stays open until the client disconnects.
+    """
+    try:
+        user_email = current_user["email"]
+        purchases = await mongo_service.find_all(
+            db_name,
+            collection_name,
+            {"email": user_email},
+            {"_id": 0, "Scheme_Code": 1, "units": 1, "Net_Asset_Value": 1},
+        )
+        holdings = initial_holdings(purchases, nav_snapshot.current)
+
+        return StreamingResponse(
+            portfolio_events(nav_broadcaster, user_email, holdings),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    except HTTPException as e:
+        raise e  # Re-raise HTTP exceptions
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
@@ -0,0 +1,168 @@
+# /api/v1/portfolio/revaluation.py
+
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable
+
+from api.v1.config import CONFIG
+from api.v1.portfolio.portfolio_routes import db_name, collection_name
+from api.v1.portfolio import summaries
+from api.v1.services.leader import LeaderLease, LeaseLost
+from api.v1.services.metrics import REVALUATION_DOCUMENTS, REVALUATION_FAILURES, REVALUATION_SECONDS, REVALUATION_TIMESTAMP
+from api.v1.services.mongo import MongoDB
+from api.v1.services.nav_snapshot import nav_snapshot
+from api.v1.services.nav_stream import nav_broadcaster
+from api.v1.services.rapidapi_mutfund import RapidAPIService
+from api.v1.services.upstream_scheduler import background_priority
+
+logger = logging.getLogger(__name__)
+
+# Stats of the most recent revaluation cycle (served from GET /stats)
+last_cycle: Dict[str, Any] = {}
+
+
+async def fetch_latest_navs(scheme_codes: Iterable[int]) -> Dict[int, float]:
+    """
+    Resolve the latest NAV for each distinct scheme code.
+
+    Codes covered by the in-memory NAV snapshot are resolved without an upstream call; the
+    rest are fetched from RapidAPI with at most REVALUATION_CONCURRENCY calls in flight.
+
+    Args:
+        scheme_codes (Iterable[int]): Distinct scheme codes held in any portfolio.
+
+    Returns:
+        Dict[int, float]: Scheme code to latest NAV. Codes that could not be resolved are omitted.
+    """
+    navs: Dict[int, float] = {}
+    missing = []
+    snapshot = nav_snapshot.current
+    for code in scheme_codes:
+        nav = snapshot.nav(code) if snapshot is not None else None
+        if nav is not None:
+            navs[code] = nav
+        else:
+            missing.append(code)
+
+    semaphore = asyncio.Semaphore(CONFIG['REVALUATION_CONCURRENCY'])
+
+    async def fetch(code):
+        async with semaphore:
+            try:
+                api_data = await RapidAPIService.fetch_oes_schemes(code)
+            except Exception as e:
+                logger.warning("NAV fetch failed for scheme %s: %s", code, e)
+                return
+        if api_data and api_data['status'] == 'success' and api_data['data']:
+            navs[code] = api_data['data'][0]['Net_Asset_Value']
+
+    await asyncio.gather(*(fetch(code) for code in missing))
+    return navs
+
+
+async def revalue_portfolios(mongo_service: MongoDB, lease: LeaderLease = None) -> Dict[str, Any]:
+    """
+    Run one revaluation cycle over every purchase document.
+
+    Scheme codes are deduplicated and NAVs resolved once per scheme. Every purchase of a
+    scheme whose NAV moved is then rewritten in one bulk pass (`summaries.revalue_purchases`),
+    with `total_cost` and the value change computed server-side from the document's own
+    `units` and `total_cost`. The changes are summed per user and category by one
+    aggregation over the cycle's writes and applied to the portfolio summaries in bulk
+    (one `$inc` per user), so they match what the writes did even when a /buy races the
+    cycle. The new NAVs are pushed to connected portfolio streams.
+
+    With a lease, leadership is re-checked right before the bulk write, and the writes are
+    fenced by the lease epoch the cycle started under. Summary deltas are not fenced: they
+    only reflect purchase writes that went through.
+
+    Args:
+        mongo_service (MongoDB): The application-wide MongoDB instance.
+        lease (LeaderLease, optional): The background jobs lease, when running on its holder.
+
+    Returns:
+        Dict[str, Any]: Cycle stats (duration, scheme and document counts).
+
+    Raises:
+        LeaseLost: Leadership lapsed before the purchases were written.
+    """
+    start = time.perf_counter()
+    epoch = lease.epoch if lease is not None else None
+    scheme_codes = await mongo_service.distinct(db_name, collection_name, "Scheme_Code")
+    navs = await fetch_latest_navs(scheme_codes)
+
+    # The NAV lookups alone can outlast the lease, so check right before writing
+    if lease is not None and not (lease.is_leader and lease.epoch == epoch):
+        raise LeaseLost(f"Lease {lease.name!r} lost during revaluation")
+    cycle = uuid.uuid4().hex
+    try:
+        result = await summaries.revalue_purchases(mongo_service, navs, cycle, epoch)
+    finally:
+        # Writes that did go through still owe their summary deltas, even if others failed
+        summaries_updated = await summaries.apply_revaluation(
+            mongo_service, await summaries.revaluation_increments(mongo_service, cycle)
+        )
+    matched, modified = result["matched"], result["modified"]
+    nav_broadcaster.publish(navs)
+
+    stats = {
+        "finished_at": datetime.now(timezone.utc).isoformat(),
+        "duration": time.perf_counter() - start,
+        "schemes": len(scheme_codes),
+        "schemes_resolved": len(navs),
+        "documents_matched": matched,
+        "documents_modified": modified,
+        "summaries_updated": summaries_updated,
+    }
+    last_cycle.clear()
+    last_cycle.update(stats)
+    REVALUATION_SECONDS.set(stats["duration"])
+    REVALUATION_TIMESTAMP.set(time.time())
+    REVALUATION_DOCUMENTS.set(modified)
+    logger.info(
+        "Portfolio revaluation: %d schemes (%d resolved), %d documents updated in %.2fs",
+        stats["schemes"], stats["schemes_resolved"], modified, stats["duration"],
+    )
+    return stats
+
+
+async def run_hourly_updates(mongo_service: MongoDB, lease: LeaderLease = None):
+    """
+    Revalue portfolios every REVALUATION_INTERVAL_SECONDS. With a lease, only its holder
+    runs the cycle; the results live in MongoDB, so every worker serves them.
+    """
+    while True:
+        # Sleep before: (more practical to not have updates on every startup)
+        await asyncio.sleep(CONFIG['REVALUATION_INTERVAL_SECONDS'])
+        if lease is not None and not lease.is_leader:
+            continue
+        try:
+            # Upstream NAV lookups queue behind interactive requests
+            with background_priority():
+                await revalue_portfolios(mongo_service, lease)
+        except LeaseLost as e:
+            logger.warning("Portfolio revaluation stopped: %s", e)
+        except Exception:
+            REVALUATION_FAILURES.inc()
+            logger.exception("Portfolio revaluation cycle failed")
+
+
+async def run_summary_reconcile(mongo_service: MongoDB, lease: LeaderLease = None):
+    """
+    Rebuild every portfolio summary from the purchases every SUMMARY_RECONCILE_INTERVAL_SECONDS
+    (only on the lease holder, when there is a lease).
+    """
+    while True:
+        await asyncio.sleep(CONFIG['SUMMARY_RECONCILE_INTERVAL_SECONDS'])
+        if lease is not None and not lease.is_leader:
+            continue
+        try:
+            result = await summaries.reconcile_summaries(mongo_service)
+        except Exception:
+            logger.exception("Portfolio summary reconciliation failed")
+            continue
+        log = logger.warning if result["drifted"] else logger.info
+        log("Portfolio summaries reconciled: %d rebuilt, %d had drifted", result["summaries"], result["drifted"])
@@ -0,0 +1,336 @@
+# /api/v1/portfolio/summaries.py
+
+"""
+Materialized per-user portfolio summaries.
+
+One document per user in `portfolio_summaries`, keyed by a unique `email`, holding total
+invested amount, current value, holdings count and the same three figures per
+Scheme_Category. It is never recomputed on read: /buy and the revaluation job apply
+`$inc` deltas as they change purchases, so GET /portfolio/summary is a single indexed lookup.
+
+"Current value" is the sum of the purchases' `total_cost`, i.e. units at the NAV last
+written by a buy or a revaluation cycle.
+
+A summary is only trusted once it has been built from the purchases themselves
+(`complete: true`); for users whose purchases predate summaries, the first read
+rebuilds it with one aggregation and deltas accumulate from there.
+
+Every write bumps the summary's `version`. A rebuild only stores its aggregate if the
+version is still the one it read first, so a delta applied while it aggregated is never
+overwritten; `reconcile_summaries` rebuilds every summary periodically to correct any drift
+(e.g. a worker dying between a purchase write and its `$inc`).
+"""
+
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from pymongo import UpdateMany, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from api.v1.config import CONFIG
+from api.v1.services.mongo import MongoDB
+
+DB_NAME = CONFIG['MONGO_DB_NAME']
+PURCHASES = "purchases"
+SUMMARIES = "portfolio_summaries"
+# Stored fields a rebuild compares and replaces
+SUMMARY_FIGURES = {"_id": 0, "version": 1, "invested_amount": 1, "current_value": 1, "holdings": 1}
+# Rebuild attempts before giving up on storing the aggregate (the summary keeps changing under it)
+REBUILD_ATTEMPTS = 3
+
+logger = logging.getLogger(__name__)
+
+
+def category_key(category: str) -> str:
+    """
+    Scheme_Category as a MongoDB field name ('.' and a leading '$' would be read as paths/operators).
+    """
+    key = (category or "Unknown").replace(".", "．")
+    return "＄" + key[1:] if key.startswith("$") else key
+
+
+def category_name(key: str) -> str:
+    name = key.replace("．", ".")
+    return "$" + name[1:] if name.startswith("＄") else name
+
+
+def summary_increments(category: str, invested: float, value: float, holdings: int) -> Dict[str, float]:
+    """
+    `$inc` fields for one change, applied to the totals and to the category's breakdown.
+    """
+    prefix = f"categories.{category_key(category)}"
+    increments = {}
+    for field, delta in (("invested_amount", invested), ("current_value", value), ("holdings", holdings)):
+        if delta:
+            increments[field] = delta
+            increments[f"{prefix}.{field}"] = delta
+    return increments
+
+
+async def apply_purchase(
+    mongo: MongoDB,
+    email: str,
+    previous: Optional[Dict[str, Any]],
+    units: float,
+    nav: float,
+    category: str,
+) -> None:
+    """
+    Apply one /buy to the user's summary.
+
+    Args:
+        mongo (MongoDB): The application-wide MongoDB instance.
+        email (str): The buyer.
+        previous (Optional[Dict[str, Any]]): The purchase document before the buy (`units`,
+            `total_cost`, `Scheme_Category`), or None if the buy created it.
+        units (float): Units bought.
+        nav (float): NAV of the buy, which also becomes the holding's NAV.
+        category (str): Scheme_Category from the request (the stored one wins for existing holdings).
+    """
+    if previous:
+        category = previous.get("Scheme_Category", category)
+        value_before = previous.get("total_cost") or 0.0
+        units_before = previous.get("units") or 0
+    else:
+        value_before, units_before = 0.0, 0
+    increments = summary_increments(
+        category,
+        invested=units * nav,
+        value=(units_before + units) * nav - value_before,
+        holdings=0 if previous else 1,
+    )
+    await mongo.update_one(
+        DB_NAME, SUMMARIES, {"email": email},
+        {"$inc": {**increments, "version": 1}, "$set": {"updated_at": datetime.now(timezone.utc)}},
+        upsert=True,
+    )
+
+
+async def revalue_purchases(
+    mongo: MongoDB, navs: Dict[int, float], cycle: str, epoch: Optional[int] = None,
+) -> Dict[str, int]:
+    """
+    Move every purchase of the schemes in `navs` to the new NAV in one bulk pass.
+
+    Each per-scheme `UpdateMany` is a pipeline update that, in the same write, records on
+    the purchase the value change it made (`revaluation_delta`, from the document as the
+    write found it) and the `cycle` it belongs to. `revaluation_increments` then sums
+    exactly what was written, even when a /buy races the cycle. With a lease `epoch`, the
+    writes are stamped with it and purchases revalued under a newer epoch are skipped.
+
+    Args:
+        mongo (MongoDB): The application-wide MongoDB instance.
+        navs (Dict[int, float]): New NAV per scheme code.
+        cycle (str): Unique id of this revaluation cycle.
+        epoch (Optional[int]): Lease epoch the cycle runs under, if any.
+
+    Returns:
+        Dict[str, int]: `MongoDB.bulk_write` counts.
+
+    Raises:
+        BulkWriteError: Some writes failed (the rest are still tagged with `cycle`).
+    """
+    now = datetime.now(timezone.utc)
+    operations = []
+    for code, nav in navs.items():
+        query = {"Scheme_Code": code, "Net_Asset_Value": {"$ne": nav}}
+        fields = {
+            # Field paths in a $set stage read the document before this stage's changes
+            "revaluation_delta": {"$subtract": [
+                {"$multiply": [{"$ifNull": ["$units", 0]}, nav]}, {"$ifNull": ["$total_cost", 0]},
+            ]},
+            "revaluation_cycle": cycle,
+            "Net_Asset_Value": nav,
+            "total_cost": {"$multiply": ["$units", nav]},
+            # Picked up by every worker's portfolio streams (see nav_stream)
+            "last_updated": now,
+        }
+        if epoch is not None:
+            query["revaluation_epoch"] = {"$not": {"$gt": epoch}}
+            fields["revaluation_epoch"] = epoch
+        operations.append(UpdateMany(query, [{"$set": fields}]))
+    if not operations:
+        return {"inserted": 0, "matched": 0, "modified": 0, "deleted": 0, "upserted": 0}
+    return await mongo.bulk_write(DB_NAME, PURCHASES, operations)
+
+
+async def revaluation_increments(mongo: MongoDB, cycle: str) -> Dict[str, Dict[str, float]]:
+    """
+    Per-user `$inc` documents for a revaluation cycle, summed server-side from the
+    `revaluation_delta` of every purchase `revalue_purchases` wrote under `cycle`.
+
+    A purchase rewritten by a later cycle before this one is summed loses this cycle's
+    delta; only an overlapping (deposed) cycle can do that, and reconciliation corrects it.
+
+    Returns:
+        Dict[str, Dict[str, float]]: email to `$inc` fields; users whose value didn't move are omitted.
+    """
+    pipeline = [
+        {"$match": {"revaluation_cycle": cycle}},
+        {"$group": {
+            "_id": {"email": "$email", "category": "$Scheme_Category"},
+            "delta": {"$sum": "$revaluation_delta"},
+        }},
+    ]
+    increments: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+    for group in await mongo.aggregate(DB_NAME, PURCHASES, pipeline):
+        category = group["_id"].get("category")
+        for field, value in summary_increments(category, 0, group["delta"], 0).items():
+            increments[group["_id"]["email"]][field] += value
+    return {email: dict(inc) for email, inc in increments.items() if inc}
+
+
+async def apply_revaluation(mongo: MongoDB, increments: Dict[str, Dict[str, float]]) -> int:
+    """
+    Bulk-apply `revaluation_increments` to existing summaries (users without one are
+    rebuilt on their next read). Returns the number of summaries updated.
+    """
+    if not increments:
+        return 0
+    now = datetime.now(timezone.utc)
+    operations = [
+        UpdateOne({"email": email}, {"$inc": {**inc, "version": 1}, "$set": {"updated_at": now}})
+        for email, inc in increments.items()
+    ]
+    result = await mongo.bulk_write(DB_NAME, SUMMARIES, operations)
+    return result["modified"]
+
+
+async def rebuild_summary(mongo: MongoDB, email: str) -> Dict[str, Any]:
+    """
+    Recompute a user's summary from their purchases and store it as the new baseline.
+
+    The store is a compare-and-set on the summary's `version`: if a delta was applied while
+    the purchases were aggregated, the aggregate is recomputed (up to REBUILD_ATTEMPTS times).
+    When every attempt loses the race the stored summary is left as it is and the last
+    aggregate is returned.
+    """
+    summary, _ = await _rebuild_summary(mongo, email)
+    return summary
+
+
+async def _rebuild_summary(mongo: MongoDB, email: str) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """
+    `rebuild_summary`, also returning the stored figures the aggregate replaced: read at the
+    version the compare-and-set matched, so no delta landed between them and the aggregate.
+    None when nothing was replaced (no stored summary, or every attempt lost the race).
+    """
+    for attempt in range(REBUILD_ATTEMPTS):
+        stored = await mongo.find_one(DB_NAME, SUMMARIES, {"email": email}, projection=SUMMARY_FIGURES)
+        version = stored.get("version") if stored else None
+        summary = await _aggregate_summary(mongo, email)
+        summary["version"] = (version or 0) + 1
+        try:
+            # A summary written before versioning has no `version`: None matches that too
+            result = await mongo.update_one(
+                DB_NAME, SUMMARIES, {"email": email, "version": version}, {"$set": summary},
+                upsert=stored is None,
+            )
+        except DuplicateKeyError:
+            continue  # created by a concurrent /buy since we looked
+        if result["matched"]:
+            return {"email": email, **summary}, stored
+        if result["upserted_id"] is not None:
+            return {"email": email, **summary}, None
+    logger.warning("Portfolio summary of %s kept changing during rebuild; not stored", email)
+    return {"email": email, **summary}, None
+
+
+async def _aggregate_summary(mongo: MongoDB, email: str) -> Dict[str, Any]:
+    pipeline = [
+        {"$match": {"email": email}},
+        {"$group": {
+            "_id": "$Scheme_Category",
+            "invested_amount": {"$sum": {"$ifNull": ["$invested_amount", {"$ifNull": ["$total_cost", 0]}]}},
+            "current_value": {"$sum": {"$ifNull": ["$total_cost", 0]}},
+            "holdings": {"$sum": 1},
+        }},
+    ]
+    categories = {}
+    totals = {"invested_amount": 0.0, "current_value": 0.0, "holdings": 0}
+    for group in await mongo.aggregate(DB_NAME, PURCHASES, pipeline):
+        figures = {field: group[field] for field in totals}
+        categories[category_key(group["_id"])] = figures
+        for field in totals:
+            totals[field] += figures[field]
+
+    return {**totals, "categories": categories, "complete": True, "updated_at": datetime.now(timezone.utc)}
+
+
+async def invalidate_summary(mongo: MongoDB, email: str) -> None:
+    """
+    Mark a summary as untrusted so its next read rebuilds it from the purchases.
+    """
+    # The version bump also stops a rebuild already in flight from marking it complete again
+    await mongo.update_one(DB_NAME, SUMMARIES, {"email": email}, {"$set": {"complete": False}, "$inc": {"version": 1}})
+
+
+async def reconcile_summaries(mongo: MongoDB, batch_size: int = 100) -> Dict[str, int]:
+    """
+    Rebuild every stored summary from the purchases, `batch_size` users at a time.
+
+    Deltas can only be lost outside a write (a worker stopping between a purchase write and
+    its `$inc`), so this is a periodic safety net rather than part of the read path. Drift
+    is measured against the figures each rebuild's compare-and-set replaced, so deltas
+    applied concurrently with the reconciliation are not counted as drift.
+
+    Returns:
+        Dict[str, int]: Summaries rebuilt, and how many of them had drifted by a cent or more.
+    """
+    rebuilt = drifted = 0
+    last_email = None
+    while True:
+        query = {"email": {"$gt": last_email}} if last_email is not None else {}
+        batch = await mongo.find_all(
+            DB_NAME, SUMMARIES, query, {"_id": 0, "email": 1}, sort=[("email", 1)], limit=batch_size,
+        )
+        if not batch:
+            break
+        results = await asyncio.gather(*(_rebuild_summary(mongo, summary["email"]) for summary in batch))
+        for after, before in results:
+            if before is not None and (
+                abs(after["invested_amount"] - before.get("invested_amount", 0.0)) >= 0.01
+                or abs(after["current_value"] - before.get("current_value", 0.0)) >= 0.01
+                or after["holdings"] != before.get("holdings", 0)
+            ):
+                drifted += 1
+        rebuilt += len(batch)
+        last_email = batch[-1]["email"]
+    return {"summaries": rebuilt, "drifted": drifted}
+
+
+async def get_summary(mongo: MongoDB, email: str) -> Dict[str, Any]:
+    """
+    The user's summary: one point lookup, or a rebuild if it has never been built.
+    """
+    summary = await mongo.find_one(DB_NAME, SUMMARIES, {"email": email})
+    if summary is None or not summary.get("complete"):
+        summary = await rebuild_summary(mongo, email)
+    return summary
+
+
+def summary_response(summary: Dict[str, Any]) -> Dict[str, Any]:
+    invested = summary.get("invested_amount", 0.0)
+    value = summary.get("current_value", 0.0)
+    categories = [
+        {
+            "Scheme_Category": category_name(key),
+            "invested_amount": round(figures.get("invested_amount", 0.0), 2),
+            "current_value": round(figures.get("current_value", 0.0), 2),
+            "holdings": figures.get("holdings", 0),
+        }
+        for key, figures in summary.get("categories", {}).items()
+        if figures.get("holdings", 0) > 0
+    ]
+    categories.sort(key=lambda row: row["current_value"], reverse=True)
+    return {
+        "invested_amount": round(invested, 2),
+        "current_value": round(value, 2),
+        "gain": round(value - invested, 2),
+        "holdings": summary.get("holdings", 0),
+        "categories": categories,
+        "updated_at": summary.get("updated_at"),
+    }
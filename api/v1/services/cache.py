@@ -0,0 +1,141 @@
+# /api/v1/services/cache.py
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+logger = logging.getLogger(__name__)
+
+class AsyncTTLCache:
+    def __init__(self, ttl: float, maxsize: int, stale_ttl: float = 0):
+        """
+        Initialize an in-process async cache with per-entry TTL and LRU eviction.
+
+        Concurrent misses for the same key are coalesced: the first caller runs the loader,
+        every other caller awaits the same in-flight future instead of calling upstream again.
+
+        With `stale_ttl`, an expired entry is still served for that many extra seconds while a
+        single background load refreshes it (stale-while-revalidate). A failed refresh keeps
+        the stale value, so callers only see loader errors once no usable value is left.
+
+        `invalidate()` bumps a generation counter; a load that started before it still answers
+        the callers already waiting on it, but its result is not cached.
+
+        Args:
+            ttl (float): Seconds an entry stays fresh after it was loaded.
+            maxsize (int): Maximum number of entries kept; the least recently used is evicted first.
+            stale_ttl (float, optional): Seconds past `ttl` an entry may be served stale. Defaults to 0.
+
+        Returns:
+            None
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.stale_ttl = stale_ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (fresh_until, stale_until, value)
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.stale_hits = 0
+        self.refresh_failures = 0
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the cached value for `key`, loading it with `loader` on a miss.
+
+        Args:
+            key (Hashable): The cache key.
+            loader (Callable[[], Awaitable[Any]]): Coroutine factory that fetches the value.
+
+        Returns:
+            Any: The cached or freshly loaded value. Loader exceptions propagate to every
+            waiting caller and nothing is cached.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            now = time.monotonic()
+            if entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            if entry[1] > now:
+                self._entries.move_to_end(key)
+                self.stale_hits += 1
+                if key not in self._inflight:
+                    task = asyncio.ensure_future(self._load(key, loader, self._generation))
+                    task.add_done_callback(lambda task: self._refresh_done(key, task))
+                    self._inflight[key] = task
+                return entry[2]
+            del self._entries[key]
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(inflight)
+
+        self.misses += 1
+        # The load runs as its own task so a cancelled first caller doesn't fail the others
+        task = asyncio.ensure_future(self._load(key, loader, self._generation))
+        self._inflight[key] = task
+        return await asyncio.shield(task)
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]], generation: int) -> Any:
+        task = asyncio.current_task()
+        try:
+            value = await loader()
+            if generation == self._generation:
+                self.set(key, value)
+            return value
+        finally:
+            # After an invalidate() the slot may already belong to a newer load
+            if self._inflight.get(key) is task:
+                del self._inflight[key]
+
+    def _refresh_done(self, key: Hashable, task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            self.refresh_failures += 1
+            logger.warning("Background refresh of %r failed; serving stale value: %s", key, task.exception())
+
+    def set(self, key: Hashable, value: Any) -> None:
+        fresh_until = time.monotonic() + self.ttl
+        self._entries[key] = (fresh_until, fresh_until + self.stale_ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable = None) -> None:
+        """
+        Drop one key, or every entry when `key` is None.
+
+        Loads in flight are fenced off: their results are not cached, and later callers start
+        a new load instead of joining them.
+        """
+        self._generation += 1
+        if key is None:
+            self._entries.clear()
+            self._inflight.clear()
+        else:
+            self._entries.pop(key, None)
+            self._inflight.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "stale_ttl": self.stale_ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "stale_hits": self.stale_hits,
+            "refresh_failures": self.refresh_failures,
+            "inflight": len(self._inflight),
+            "generation": self._generation,
+        }
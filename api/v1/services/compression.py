@@ -0,0 +1,131 @@
+# /api/v1/services/compression.py
+
+"""
+Negotiated gzip/brotli response compression.
+
+`CompressionMiddleware` compresses single-body responses at or above a minimum size.
+Streaming responses and responses that already carry a Content-Encoding (e.g. the
+precompressed variants kept by `PreparedResponse`) pass through untouched.
+
+Brotli is used when the client accepts it; otherwise gzip.
+"""
+
+import gzip
+import logging
+from typing import Optional
+
+import brotli
+
+from api.v1.config import CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Pick "br" or "gzip" from an Accept-Encoding header, honouring q-values; None for identity.
+    """
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip().lower()] = q
+    wildcard = accepted.get("*", 0.0)
+    options = [("br", accepted.get("br", wildcard)), ("gzip", accepted.get("gzip", wildcard))]
+    coding, q = max(options, key=lambda option: option[1])  # ties keep brotli first
+    return coding if q > 0 else None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=CONFIG['BROTLI_QUALITY'])
+    return gzip.compress(body, compresslevel=CONFIG['GZIP_LEVEL'], mtime=0)
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = None):
+        """
+        ASGI middleware compressing responses for clients that accept gzip or brotli.
+
+        Args:
+            app: The ASGI application to wrap.
+            minimum_size (int, optional): Bodies smaller than this are sent uncompressed.
+                Defaults to COMPRESSION_MIN_SIZE.
+        """
+        self.app = app
+        self.minimum_size = CONFIG['COMPRESSION_MIN_SIZE'] if minimum_size is None else minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = None
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = negotiate_encoding(accept_encoding)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            headers = start_message.get("headers", [])
+            content_type = b""
+            already_encoded = False
+            for name, value in headers:
+                if name == b"content-type":
+                    content_type = value
+                elif name == b"content-encoding":
+                    already_encoded = True
+            body = message.get("body", b"")
+            if (
+                message.get("more_body", False)
+                or already_encoded
+                or len(body) < self.minimum_size
+                or not content_type.decode("latin-1").startswith(COMPRESSIBLE_TYPES)
+            ):
+                # Streams, precompressed and small bodies go out as they are
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            compressed = compress(body, encoding)
+            vary = [v for n, v in headers if n == b"vary"]
+            headers = [(n, v) for n, v in headers if n not in (b"content-length", b"vary")]
+            headers += [
+                (b"content-encoding", encoding.encode()),
+                (b"content-length", str(len(compressed)).encode()),
+                (b"vary", b", ".join(vary + [b"Accept-Encoding"])),
+            ]
+            await send({**start_message, "headers": headers})
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,50 @@
+# /api/v1/services/fast_json.py
+
+"""
+JSON encoding for large responses, bypassing FastAPI's `jsonable_encoder`.
+
+Route handlers that return a `FastJSONResponse` hand their content straight to the
+encoder selected by `JSON_RESPONSE_MODE`:
+  * "orjson" (default): orjson; datetimes are encoded natively as ISO 8601.
+  * "std": stdlib `json` with a `default` hook for datetimes.
+Both modes produce the same JSON for the payloads this app returns.
+"""
+
+import json
+import logging
+from datetime import date, datetime
+from typing import Any
+
+import orjson
+from fastapi import Response
+
+from api.v1.config import CONFIG
+
+logger = logging.getLogger(__name__)
+
+JSON_MODE = CONFIG['JSON_RESPONSE_MODE']
+if JSON_MODE not in ("orjson", "std"):
+    logger.warning("Unknown JSON_RESPONSE_MODE=%r; using stdlib json", JSON_MODE)
+    JSON_MODE = "std"
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Encode `content` to compact UTF-8 JSON bytes with the configured encoder.
+    """
+    if JSON_MODE == "orjson":
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, separators=(",", ":"), ensure_ascii=False, default=_default).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
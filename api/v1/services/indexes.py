@@ -0,0 +1,115 @@
+# /api/v1/services/indexes.py
+
+"""
+Declarative index registry, applied idempotently on startup.
+
+Every query shape the app runs on a hot path should be listed in QUERY_SHAPES and be
+served by an index in INDEXES; `verify_query_plans` flags any shape that falls back to
+a collection scan.
+"""
+
+import logging
+from typing import Any, Dict, List
+
+from api.v1.config import CONFIG
+from api.v1.services.mongo import MongoDB
+
+logger = logging.getLogger(__name__)
+
+DB_NAME = CONFIG['MONGO_DB_NAME']
+
+INDEXES: List[Dict[str, Any]] = [
+    # login / register lookups
+    {"collection": "user_data", "keys": [("email", 1)], "unique": True},
+    # /buy upsert target; its email prefix also serves /portfolio
+    {"collection": "purchases", "keys": [("email", 1), ("Scheme_Code", 1)], "unique": True},
+    # revaluation: distinct scheme codes and the per-scheme bulk rewrite
+    {"collection": "purchases", "keys": [("Scheme_Code", 1)]},
+    # revaluation: summing the summary deltas written by one cycle
+    {"collection": "purchases", "keys": [("revaluation_cycle", 1)]},
+    # NAV history: one point per scheme and day (idempotent ingestion), range reads per scheme
+    {"collection": "nav_history", "keys": [("Scheme_Code", 1), ("date", 1)], "unique": True},
+    # one materialized summary per user
+    {"collection": "portfolio_summaries", "keys": [("email", 1)], "unique": True},
+    # leader election: one lease document per name (a competing insert must fail)
+    {"collection": "leases", "keys": [("name", 1)], "unique": True},
+    # the shared NAV snapshot, polled by name and version
+    {"collection": "nav_snapshots", "keys": [("name", 1)], "unique": True},
+    # portfolio stream tickets: redeemed by digest, removed by MongoDB once expired
+    {"collection": "stream_tickets", "keys": [("ticket", 1)], "unique": True},
+    {"collection": "stream_tickets", "keys": [("expires_at", 1)], "expire_after_seconds": 0},
+]
+
+# Representative filters for each query the app issues (values are placeholders)
+QUERY_SHAPES: List[Dict[str, Any]] = [
+    {"name": "login/register by email", "collection": "user_data", "filter": {"email": "x@example.com"}},
+    {"name": "portfolio by email", "collection": "purchases", "filter": {"email": "x@example.com"}},
+    {"name": "buy by email and scheme", "collection": "purchases", "filter": {"email": "x@example.com", "Scheme_Code": 0}},
+    {"name": "revaluation by scheme", "collection": "purchases", "filter": {"Scheme_Code": 0, "Net_Asset_Value": {"$ne": 0}}},
+    {"name": "revaluation deltas by cycle", "collection": "purchases", "filter": {"revaluation_cycle": "x"}},
+    {"name": "stream sync by emails and change time", "collection": "purchases", "filter": {"email": {"$in": ["x@example.com"]}, "last_updated": {"$gte": 0}}},
+    {"name": "portfolio summary by email", "collection": "portfolio_summaries", "filter": {"email": "x@example.com"}},
+    {"name": "NAV history by scheme and date range", "collection": "nav_history", "filter": {"Scheme_Code": 0, "date": {"$gte": 0}}},
+    {"name": "lease by name", "collection": "leases", "filter": {"name": "x"}},
+    {"name": "stream ticket by digest", "collection": "stream_tickets", "filter": {"ticket": "x", "expires_at": {"$gt": 0}}},
+    {"name": "newer NAV snapshot", "collection": "nav_snapshots", "filter": {"name": "x", "fetched_at": {"$gt": 0}}},
+]
+
+
+async def ensure_indexes(mongo: MongoDB) -> List[str]:
+    """
+    Create every registered index. Existing indexes with the same keys and options are left as is.
+
+    A failing index (e.g. a unique index over data that already has duplicates) is logged
+    and skipped so the remaining indexes are still applied.
+
+    Args:
+        mongo (MongoDB): The MongoDB service to create the indexes with.
+
+    Returns:
+        List[str]: Names of the indexes that are in place.
+    """
+    created = []
+    for spec in INDEXES:
+        try:
+            name = await mongo.create_index(
+                spec.get("db", DB_NAME), spec["collection"], spec["keys"],
+                unique=spec.get("unique", False), expire_after_seconds=spec.get("expire_after_seconds"),
+            )
+            created.append(name)
+        except Exception as e:
+            logger.error("Could not create index %s on %s: %s", spec["keys"], spec["collection"], e)
+    logger.info("Indexes in place: %s", ", ".join(created))
+    return created
+
+
+def _plan_stages(plan: Dict[str, Any]) -> List[str]:
+    stages = [plan.get("stage")]
+    for child_key in ("inputStage", "queryPlan"):
+        if child_key in plan:
+            stages.extend(_plan_stages(plan[child_key]))
+    for child in plan.get("inputStages", []):
+        stages.extend(_plan_stages(child))
+    return [stage for stage in stages if stage]
+
+
+async def verify_query_plans(mongo: MongoDB) -> List[Dict[str, Any]]:
+    """
+    Run `explain()` on every registered query shape and warn about collection scans.
+
+    Args:
+        mongo (MongoDB): The MongoDB service to run the explains with.
+
+    Returns:
+        List[Dict[str, Any]]: One entry per shape with its winning-plan stages and a `collscan` flag.
+    """
+    results = []
+    for shape in QUERY_SHAPES:
+        collection = mongo.get_collection(shape.get("db", DB_NAME), shape["collection"])
+        explain = await collection.find(shape["filter"]).explain()
+        stages = _plan_stages(explain.get("queryPlanner", {}).get("winningPlan", {}))
+        collscan = "COLLSCAN" in stages
+        if collscan:
+            logger.warning("Query '%s' on %s falls back to COLLSCAN", shape["name"], shape["collection"])
+        results.append({"name": shape["name"], "stages": stages, "collscan": collscan})
+    return results
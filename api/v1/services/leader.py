@@ -0,0 +1,169 @@
+# /api/v1/services/leader.py
+
+"""
+Leader election over a MongoDB lease document.
+
+Every worker runs a LeaderLease for the same name. The lease is one document in `leases`
+(unique `name`) holding its `owner` and `expires_at`; a worker takes it with a single
+conditional upsert that only matches when the lease is already its own or has expired,
+and renews it every `ttl / 3` seconds. A competing insert for a held lease fails on the
+unique index, so at most one worker holds an unexpired lease.
+
+Leadership is judged locally against a monotonic deadline measured from *before* the
+acquiring write, so a worker stops considering itself leader no later than the lease
+expires in MongoDB, even if it can no longer reach the database to find out. Expiry is
+compared on worker wall clocks, which are assumed to be NTP-synchronized to well within
+the TTL.
+
+Each change of hands (a new owner, or an expired lease taken again) increments the lease's
+`epoch`. Jobs stamp their shared writes with the epoch they started under and filter on it,
+so a write from a deposed leader that reaches MongoDB late cannot overwrite one made under
+a newer epoch.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from pymongo.errors import DuplicateKeyError
+
+from api.v1.config import CONFIG
+from api.v1.services.metrics import Gauge
+from api.v1.services.mongo import MongoDB
+
+logger = logging.getLogger(__name__)
+
+DB_NAME = CONFIG['MONGO_DB_NAME']
+COLLECTION_NAME = "leases"
+
+LEASE_HELD = Gauge("leader_lease_held", "1 while this worker holds the lease, by lease name.", ("lease",))
+
+
+class LeaseLost(Exception):
+    """
+    Leadership ended (or changed epoch) while a leader-only job was still writing.
+    """
+
+
+def worker_id() -> str:
+    """
+    Identity of this worker process: host, pid and a random suffix (pids are reused across restarts).
+    """
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class LeaderLease:
+    def __init__(self, mongo: MongoDB, name: str, ttl: float, owner: str = None):
+        """
+        A renewable, time-bounded lease on `name`.
+
+        Args:
+            mongo (MongoDB): The application-wide MongoDB instance.
+            name (str): Lease name; workers competing for the same job use the same name.
+            ttl (float): Lease duration in seconds. A crashed leader is replaced within about
+                `ttl * 4 / 3` seconds.
+            owner (str, optional): Identity recorded in the lease. Defaults to `worker_id()`.
+
+        Returns:
+            None
+        """
+        self.mongo = mongo
+        self.name = name
+        self.ttl = ttl
+        self.owner = owner or worker_id()
+        self._held = False
+        self._valid_until = 0.0
+        self.epoch: Optional[int] = None
+        self.acquired_at: Optional[float] = None
+        self.transitions = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._held and time.monotonic() < self._valid_until
+
+    def _set_leader(self, leader: bool, valid_until: float = 0.0) -> None:
+        was_leader, self._held, self._valid_until = self._held, leader, valid_until
+        if leader != was_leader:
+            self.transitions += 1
+            self.acquired_at = time.time() if leader else None
+            logger.info("%s lease %r (owner %s)", "Acquired" if leader else "Lost", self.name, self.owner)
+        LEASE_HELD.labels(self.name).set(1 if leader else 0)
+
+    async def try_acquire(self) -> bool:
+        """
+        Take the lease if it is free or expired, or extend it if already held.
+
+        Returns:
+            bool: Whether this worker holds the lease now.
+        """
+        started = time.monotonic()
+        now = datetime.now(timezone.utc)
+        query = {"name": self.name, "$or": [{"owner": self.owner}, {"expires_at": {"$lt": now}}]}
+        owner = {"$literal": self.owner}
+        # A renewal keeps the epoch; taking the lease over (from anyone, even ourselves after expiry) bumps it
+        renewal = {"$and": [{"$eq": ["$owner", owner]}, {"$gte": ["$expires_at", now]}]}
+        update = [{"$set": {
+            "epoch": {"$cond": [renewal, {"$ifNull": ["$epoch", 1]}, {"$add": [{"$ifNull": ["$epoch", 0]}, 1]}]},
+            "owner": owner,
+            "expires_at": now + timedelta(seconds=self.ttl),
+            "renewed_at": now,
+        }}]
+        try:
+            lease = await self.mongo.find_one_and_update(
+                DB_NAME, COLLECTION_NAME, query, update, upsert=True, projection={"_id": 0, "owner": 1, "epoch": 1}
+            )
+        except DuplicateKeyError:
+            # Held (and unexpired) by another worker: the upsert's insert lost to the unique name
+            lease = None
+        held = lease is not None and lease.get("owner") == self.owner
+        if held:
+            self.epoch = lease.get("epoch")
+        self._set_leader(held, started + self.ttl if held else 0.0)
+        return held
+
+    async def release(self) -> None:
+        """
+        Give the lease up (on shutdown) so another worker can take over without waiting for expiry.
+        """
+        if not self._held:
+            return
+        self._set_leader(False)
+        await self.mongo.update_one(
+            DB_NAME, COLLECTION_NAME, {"name": self.name, "owner": self.owner},
+            {"$set": {"expires_at": datetime.fromtimestamp(0, timezone.utc)}},
+        )
+
+    async def run(self) -> None:
+        """
+        Acquire or renew every `ttl / 3` seconds until cancelled.
+
+        A failed attempt (e.g. MongoDB unreachable) is retried on the next tick; if the lease
+        can't be renewed before its deadline, `is_leader` turns false on its own.
+        """
+        while True:
+            try:
+                await self.try_acquire()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                logger.exception("Could not acquire or renew lease %r", self.name)
+                if self._held and not self.is_leader:
+                    self._set_leader(False)
+            await asyncio.sleep(self.ttl / 3)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "owner": self.owner,
+            "leader": self.is_leader,
+            "epoch": self.epoch,
+            "acquired_at": self.acquired_at,
+            "transitions": self.transitions,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,265 @@
+# /api/v1/services/metrics.py
+
+"""
+In-process metrics in the Prometheus text exposition format.
+
+A deliberately small registry (counters, gauges, histograms with labels) so recording
+stays a dict lookup plus an addition and the app needs no extra dependency. Everything
+is updated from the event loop thread, so no locking is needed. Served by GET /metrics.
+"""
+
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; covers in-memory hits (sub-millisecond) up to slow upstream calls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), registry: "Registry" = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        (registry or REGISTRY).register(self)
+
+    def labels(self, *values):
+        """
+        Return the child for one combination of label values, creating it on first use.
+        """
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            child = self._children[values] = self._new_child()
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+    def _samples(self):
+        for values, child in self._children.items():
+            yield f"{self.name}_total{_format_labels(self.labelnames, values)} {_format_value(child.value)}"
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), registry=None, function: Callable[[], Dict[tuple, float]] = None):
+        """
+        Args:
+            function: Optional callback evaluated at scrape time, returning
+                {label values tuple: value}; use it for values another component already tracks.
+        """
+        super().__init__(name, documentation, labelnames, registry)
+        self.function = function
+
+    def _new_child(self):
+        return _Value()
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+    def _samples(self):
+        if self.function is not None:
+            for values, value in self.function().items():
+                if value is not None:
+                    yield f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(value)}"
+        for values, child in self._children.items():
+            yield f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"
+
+
+class _HistogramValue:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), registry=None, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def _samples(self):
+        for values, child in self._children.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, values, f'le="{_format_value(bound)}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, values)
+            yield f"{self.name}_sum{labels} {_format_value(child.sum)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+
+    def unregister(self, name: str):
+        self._metrics.pop(name, None)
+
+    def render(self) -> bytes:
+        """
+        Render every registered metric in the Prometheus text format.
+        """
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+REGISTRY = Registry()
+
+# HTTP requests served by this worker
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Time to serve an HTTP request, by route template and status.",
+    ("method", "route", "status"),
+)
+
+# RapidAPI calls
+UPSTREAM_REQUEST_SECONDS = Histogram(
+    "upstream_request_duration_seconds", "RapidAPI call latency by RapidAPIService method.", ("operation",),
+)
+UPSTREAM_REQUESTS = Counter(
+    "upstream_requests", "RapidAPI calls by RapidAPIService method and HTTP status (or error type).",
+    ("operation", "status"),
+)
+UPSTREAM_RETRIES = Counter(
+    "upstream_retries", "RapidAPI attempts retried after a transient failure, by RapidAPIService method.",
+    ("operation",),
+)
+
+# MongoDB operations
+MONGO_OPERATION_SECONDS = Histogram(
+    "mongo_operation_duration_seconds", "MongoDB operation latency by MongoDB method, collection and outcome.",
+    ("operation", "collection", "outcome"),
+)
+
+# NAV snapshot refresh cycle
+NAV_REFRESH_SECONDS = Gauge("nav_snapshot_refresh_duration_seconds", "Duration of the last successful NAV snapshot refresh.")
+NAV_REFRESH_TIMESTAMP = Gauge("nav_snapshot_last_success_timestamp_seconds", "Unix time of the last successful NAV snapshot refresh.")
+NAV_SNAPSHOT_SCHEMES = Gauge("nav_snapshot_schemes", "Schemes in the current NAV snapshot.")
+NAV_REFRESH_FAILURES = Counter("nav_snapshot_refresh_failures", "Failed NAV snapshot refreshes.")
+
+# Portfolio revaluation cycle
+REVALUATION_SECONDS = Gauge("revaluation_duration_seconds", "Duration of the last portfolio revaluation cycle.")
+REVALUATION_TIMESTAMP = Gauge("revaluation_last_success_timestamp_seconds", "Unix time of the last completed revaluation cycle.")
+REVALUATION_DOCUMENTS = Gauge("revaluation_documents_modified", "Purchase documents rewritten by the last revaluation cycle.")
+REVALUATION_FAILURES = Counter("revaluation_failures", "Failed portfolio revaluation cycles.")
+
+
+def route_template(scope) -> str:
+    """
+    The matched route's path template (`/v1/nav/{code}`, not the raw path), keeping label
+    cardinality bounded. Unrouted requests share a single label.
+    """
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        """
+        Record `http_request_duration_seconds` for every HTTP request (pure ASGI, so
+        streaming responses are timed to their last chunk).
+        """
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # The router records the matched route in the (shared) scope
+            HTTP_REQUEST_SECONDS.labels(scope["method"], route_template(scope), str(status)).observe(
+                time.perf_counter() - start
+            )
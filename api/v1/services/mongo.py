@@ -1,12 +1,123 @@
 # /api/v1/services/mongo.py
 
+import functools
+import threading
+import time
+from fastapi import Request
 from motor.motor_asyncio import AsyncIOMotorClient
 from bson import ObjectId
-from typing import List, Dict, Any, Optional
+from pymongo import ReturnDocument, monitoring
+from pymongo.errors import BulkWriteError
+from api.v1.config import CONFIG
+from api.v1.services.metrics import MONGO_OPERATION_SECONDS
+from typing import List, Dict, Any, Optional, Sequence, Tuple, Union
+
+
+def as_update_document(update_data: Union[Dict[str, Any], List[Dict[str, Any]]]) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    Wrap plain field/value pairs in `$set`; pass operator documents (`$inc`, `$setOnInsert`, ...)
+    and aggregation pipelines through unchanged.
+    """
+    if isinstance(update_data, list) or any(key.startswith('$') for key in update_data):
+        return update_data
+    return {'$set': update_data}
+
+
+def update_counts(result) -> Dict[str, Any]:
+    """
+    `matched`, `modified` and `upserted_id` (string, or None when nothing was inserted) of an UpdateResult.
+    """
+    return {
+        'matched': result.matched_count,
+        'modified': result.modified_count,
+        'upserted_id': str(result.upserted_id) if result.upserted_id is not None else None,
+    }
+
+
+# bulk_write counts and their names in BulkWriteError.details
+_BULK_ERROR_COUNTS = {'inserted': 'nInserted', 'matched': 'nMatched', 'modified': 'nModified', 'deleted': 'nRemoved', 'upserted': 'nUpserted'}
+
+
+def timed_operation(method):
+    """
+    Record a MongoDB method's latency in `mongo_operation_duration_seconds`, labelled with
+    the method name, the collection and the outcome ("ok" or the exception type).
+    """
+    operation = method.__name__
+
+    @functools.wraps(method)
+    async def wrapper(self, db_name, collection_name, *args, **kwargs):
+        start = time.perf_counter()
+        outcome = "ok"
+        try:
+            return await method(self, db_name, collection_name, *args, **kwargs)
+        except Exception as e:
+            outcome = type(e).__name__
+            raise
+        finally:
+            MONGO_OPERATION_SECONDS.labels(operation, collection_name, outcome).observe(time.perf_counter() - start)
+
+    return wrapper
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """
+    Tracks connection pool utilization from pymongo's CMAP events.
+
+    Events arrive on driver threads, so counters are updated under a lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.open = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.waiting = 0
+        self.checkout_failures = 0
+
+    def _add(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+
+    def connection_created(self, event):
+        self._add(open=1)
+
+    def connection_closed(self, event):
+        self._add(open=-1)
+
+    def connection_check_out_started(self, event):
+        self._add(waiting=1)
+
+    def connection_checked_out(self, event):
+        self._add(waiting=-1, in_use=1)
+
+    def connection_check_out_failed(self, event):
+        self._add(waiting=-1, checkout_failures=1)
+
+    def connection_checked_in(self, event):
+        self._add(in_use=-1)
+
+    def pool_created(self, event): pass
+    def pool_ready(self, event): pass
+    def pool_cleared(self, event): pass
+    def pool_closed(self, event): pass
+    def connection_ready(self, event): pass
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "open": self.open,
+                "in_use": self.in_use,
+                "peak_in_use": self.peak_in_use,
+                "waiting": self.waiting,
+                "checkout_failures": self.checkout_failures,
+            }
 
 
 class MongoDB:
-    def __init__(self, uri: str):
+    def __init__(self, uri: str, **client_options: Any):
         """
         Initialize a MongoDB instance with the given URI.
 
@@ -15,15 +126,42 @@ class MongoDB:
 
         Args:
             uri (str): The MongoDB connection string URI.
+            **client_options: Extra client options such as `maxPoolSize`, `minPoolSize`,
+                `waitQueueTimeoutMS` and `serverSelectionTimeoutMS`.
 
         Returns:
             None
 
         Note:
             This method initializes the `client` attribute of the class instance,
-            which is used for subsequent database operations.
+            which is used for subsequent database operations. The app creates a single
+            instance per worker (see `from_config`) and shares it between all routers.
         """
-        self.client = AsyncIOMotorClient(uri)
+        self.pool_listener = PoolStatsListener()
+        self.max_pool_size = client_options.get('maxPoolSize', 100)
+        self.client = AsyncIOMotorClient(uri, event_listeners=[self.pool_listener], **client_options)
+
+    @classmethod
+    def from_config(cls) -> "MongoDB":
+        """
+        Create the application-wide MongoDB instance with pool settings from CONFIG.
+        """
+        return cls(
+            CONFIG['MONGO_URL'],
+            maxPoolSize=CONFIG['MONGO_MAX_POOL_SIZE'],
+            minPoolSize=CONFIG['MONGO_MIN_POOL_SIZE'],
+            waitQueueTimeoutMS=CONFIG['MONGO_WAIT_QUEUE_TIMEOUT_MS'],
+            serverSelectionTimeoutMS=CONFIG['MONGO_SERVER_SELECTION_TIMEOUT_MS'],
+        )
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """
+        Connection pool utilization of this client, for sizing `MONGO_MAX_POOL_SIZE` per worker.
+        """
+        stats = self.pool_listener.stats()
+        stats["max_pool_size"] = self.max_pool_size
+        stats["utilization"] = stats["in_use"] / self.max_pool_size if self.max_pool_size else None
+        return stats
 
     def get_collection(self, db_name: str, collection_name: str):
         """
@@ -42,6 +180,7 @@ class MongoDB:
         db = self.client[db_name]
         return db[collection_name]
 
+    @timed_operation
     async def insert_one(self, db_name: str, collection_name: str, data: Dict[str, Any]) -> str:
         """
         Insert a single document into a specified MongoDB collection.
@@ -62,6 +201,7 @@ class MongoDB:
         result = await collection.insert_one(data)
         return str(result.inserted_id)
 
+    @timed_operation
     async def insert_many(self, db_name: str, collection_name: str, data_list: List[Dict[str, Any]]) -> List[str]:
         """
         Insert multiple documents into a specified MongoDB collection.
@@ -81,7 +221,8 @@ class MongoDB:
         result = await collection.insert_many(data_list)
         return [str(id) for id in result.inserted_ids]
 
-    async def find_one(self, db_name: str, collection_name: str, query: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    @timed_operation
+    async def find_one(self, db_name: str, collection_name: str, query: Dict[str, Any], projection: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
         """
         Find and return a single document from a specified MongoDB collection based on the given query.
 
@@ -93,6 +234,7 @@ class MongoDB:
             db_name (str): The name of the database.
             collection_name (str): The name of the collection within the database.
             query (Dict[str, Any]): A dictionary representing the query to be executed.
+            projection (Dict[str, Any], optional): Fields to include or exclude in the returned document.
 
         Returns:
             Optional[Dict[str, Any]]: An optional dictionary representing the found document. If no document is found,
@@ -101,13 +243,14 @@ class MongoDB:
         collection = self.get_collection(db_name, collection_name)
         if '_id' in query and isinstance(query['_id'], str):
             query['_id'] = ObjectId(query['_id'])
-        document = await collection.find_one(query)
-        if document:
+        document = await collection.find_one(query, projection)
+        if document and '_id' in document:
             # Convert ObjectId to string
             document['_id'] = str(document['_id'])
         return document
 
-    async def find_all(self, db_name: str, collection_name: str, query: Dict[str, Any] = {}) -> List[Dict[str, Any]]:
+    @timed_operation
+    async def find_all(self, db_name: str, collection_name: str, query: Dict[str, Any] = {}, projection: Optional[Dict[str, Any]] = None, sort: Optional[List[Tuple[str, int]]] = None, limit: int = 0) -> List[Dict[str, Any]]:
         """
         Find and return all documents from a specified MongoDB collection based on the given query.
 
@@ -119,6 +262,9 @@ class MongoDB:
             db_name (str): The name of the database.
             collection_name (str): The name of the collection within the database.
             query (Dict[str, Any], optional): A dictionary representing the query to be executed. Defaults to an empty dictionary.
+            projection (Dict[str, Any], optional): Fields to include or exclude in the returned documents.
+            sort (List[Tuple[str, int]], optional): (field, direction) pairs to order the documents by.
+            limit (int, optional): Return at most this many documents (0, the default, for no limit).
 
         Returns:
             List[Dict[str, Any]]: A list of dictionaries representing the found documents. If no documents are found,
@@ -128,13 +274,20 @@ class MongoDB:
         documents = []
         if '_id' in query and isinstance(query['_id'], str):
             query['_id'] = ObjectId(query['_id'])
-        async for document in collection.find(query):
+        cursor = collection.find(query, projection)
+        if sort:
+            cursor = cursor.sort(sort)
+        if limit:
+            cursor = cursor.limit(limit)
+        async for document in cursor:
             # Convert ObjectId to string
-            document['_id'] = str(document['_id'])
+            if '_id' in document:
+                document['_id'] = str(document['_id'])
             documents.append(document)
         return documents
 
-    async def update_one(self, db_name: str, collection_name: str, query: Dict[str, Any], update_data: Dict[str, Any]) -> int:
+    @timed_operation
+    async def update_one(self, db_name: str, collection_name: str, query: Dict[str, Any], update_data: Dict[str, Any], upsert: bool = False) -> Dict[str, Any]:
         """
         Update a single document in a specified MongoDB collection based on the given query.
 
@@ -146,18 +299,198 @@ class MongoDB:
             db_name (str): The name of the database.
             collection_name (str): The name of the collection within the database.
             query (Dict[str, Any]): A dictionary representing the query to find the document to update.
-            update_data (Dict[str, Any]): A dictionary representing the data to update in the document.
+            update_data (Dict[str, Any]): Fields to `$set`, or an update document with explicit
+                operators (e.g. `$inc`, `$setOnInsert`) or an aggregation pipeline.
+            upsert (bool, optional): Insert a new document when none matches. Defaults to False.
+
+        Returns:
+            Dict[str, Any]: `matched` and `modified` (each 0 or 1) and `upserted_id` (string,
+            or None when nothing was inserted), as for `update_many`.
+        """
+        collection = self.get_collection(db_name, collection_name)
+        if '_id' in query and isinstance(query['_id'], str):
+            query['_id'] = ObjectId(query['_id'])
+        result = await collection.update_one(query, as_update_document(update_data), upsert=upsert)
+        return update_counts(result)
+
+    @timed_operation
+    async def update_many(self, db_name: str, collection_name: str, query: Dict[str, Any], update_data: Dict[str, Any], upsert: bool = False) -> Dict[str, Any]:
+        """
+        Update every document in a specified MongoDB collection that matches the given query.
+
+        Args:
+            db_name (str): The name of the database.
+            collection_name (str): The name of the collection within the database.
+            query (Dict[str, Any]): A dictionary representing the query to find the documents to update.
+            update_data (Dict[str, Any]): Fields to `$set`, or an update document with explicit
+                operators (e.g. `$inc`, `$setOnInsert`) or an aggregation pipeline.
+            upsert (bool, optional): Insert a new document when none matches. Defaults to False.
+
+        Returns:
+            Dict[str, Any]: `matched`, `modified` and `upserted_id` (string, or None when nothing was inserted).
+        """
+        collection = self.get_collection(db_name, collection_name)
+        if '_id' in query and isinstance(query['_id'], str):
+            query['_id'] = ObjectId(query['_id'])
+        result = await collection.update_many(query, as_update_document(update_data), upsert=upsert)
+        return update_counts(result)
+
+    @timed_operation
+    async def find_one_and_update(
+        self,
+        db_name: str,
+        collection_name: str,
+        query: Dict[str, Any],
+        update_data: Dict[str, Any],
+        upsert: bool = False,
+        return_new: bool = True,
+        projection: Optional[Dict[str, Any]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Atomically update a single document and return it, in one round trip.
+
+        Args:
+            db_name (str): The name of the database.
+            collection_name (str): The name of the collection within the database.
+            query (Dict[str, Any]): A dictionary representing the query to find the document to update.
+            update_data (Dict[str, Any]): Fields to `$set`, or an update document with explicit
+                operators (e.g. `$inc`, `$setOnInsert`) or an aggregation pipeline.
+            upsert (bool, optional): Insert a new document when none matches. Defaults to False.
+            return_new (bool, optional): Return the document after the update instead of before. Defaults to True.
+            projection (Dict[str, Any], optional): Fields to include or exclude in the returned document.
 
         Returns:
-            int: The number of documents modified. In this case, it will be either 0 or 1,
-            indicating whether the update operation was successful.
+            Optional[Dict[str, Any]]: The matched document (before or after the update), or None when
+            nothing matched (or, with `return_new=False`, when the document was just upserted).
+            The '_id' field of the returned document is converted to a string.
         """
         collection = self.get_collection(db_name, collection_name)
         if '_id' in query and isinstance(query['_id'], str):
             query['_id'] = ObjectId(query['_id'])
-        result = await collection.update_one(query, {'$set': update_data})
-        return result.modified_count
+        document = await collection.find_one_and_update(
+            query,
+            as_update_document(update_data),
+            projection=projection,
+            upsert=upsert,
+            return_document=ReturnDocument.AFTER if return_new else ReturnDocument.BEFORE,
+        )
+        if document and '_id' in document:
+            document['_id'] = str(document['_id'])
+        return document
+
+    @timed_operation
+    async def find_one_and_delete(self, db_name: str, collection_name: str, query: Dict[str, Any], projection: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Atomically delete a single document and return it, in one round trip (e.g. to consume
+        a one-time token exactly once across workers).
+
+        Args:
+            db_name (str): The name of the database.
+            collection_name (str): The name of the collection within the database.
+            query (Dict[str, Any]): A dictionary representing the query to find the document to delete.
+            projection (Dict[str, Any], optional): Fields to include or exclude in the returned document.
 
+        Returns:
+            Optional[Dict[str, Any]]: The deleted document, or None when nothing matched.
+            The '_id' field of the returned document is converted to a string.
+        """
+        collection = self.get_collection(db_name, collection_name)
+        if '_id' in query and isinstance(query['_id'], str):
+            query['_id'] = ObjectId(query['_id'])
+        document = await collection.find_one_and_delete(query, projection=projection)
+        if document and '_id' in document:
+            document['_id'] = str(document['_id'])
+        return document
+
+    @timed_operation
+    async def distinct(self, db_name: str, collection_name: str, key: str, query: Optional[Dict[str, Any]] = None) -> List[Any]:
+        """
+        Distinct values of `key` across the documents matching `query` (all documents by default).
+
+        Args:
+            db_name (str): The name of the database.
+            collection_name (str): The name of the collection within the database.
+            key (str): The field whose distinct values are returned.
+            query (Dict[str, Any], optional): A dictionary representing the query to filter documents.
+
+        Returns:
+            List[Any]: The distinct values.
+        """
+        collection = self.get_collection(db_name, collection_name)
+        return await collection.distinct(key, query)
+
+    @timed_operation
+    async def aggregate(self, db_name: str, collection_name: str, pipeline: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Run an aggregation pipeline and return all of its result documents.
+
+        Args:
+            db_name (str): The name of the database.
+            collection_name (str): The name of the collection within the database.
+            pipeline (List[Dict[str, Any]]): The aggregation stages.
+
+        Returns:
+            List[Dict[str, Any]]: The pipeline's output documents.
+        """
+        collection = self.get_collection(db_name, collection_name)
+        return [document async for document in collection.aggregate(pipeline)]
+
+    @timed_operation
+    async def bulk_write(self, db_name: str, collection_name: str, operations: Sequence[Any], ordered: bool = False, chunk_size: int = 1000) -> Dict[str, int]:
+        """
+        Execute write operations in batches instead of one round trip per document.
+
+        Operations are pymongo write models (`InsertOne`, `UpdateOne`, `UpdateMany`, `DeleteOne`, ...).
+        They are sent in chunks of `chunk_size`; unordered batches let the server apply them
+        in parallel and continue past individual failures.
+
+        Args:
+            db_name (str): The name of the database.
+            collection_name (str): The name of the collection within the database.
+            operations (Sequence[Any]): The write models to execute.
+            ordered (bool, optional): Stop at the first error and apply in order. Defaults to False.
+            chunk_size (int, optional): Maximum operations per batch. Defaults to 1000.
+
+        Returns:
+            Dict[str, int]: Summed `inserted`, `matched`, `modified`, `deleted` and `upserted` counts.
+
+        Raises:
+            BulkWriteError: Some operations failed. An ordered write stops at the first failing
+                chunk; an unordered one still sends the remaining chunks and raises at the end.
+                Either way the error's `counts` hold the summed counts of everything that was
+                applied, across all chunks, and its `details["writeErrors"]` carry indexes into
+                `operations`.
+        """
+        collection = self.get_collection(db_name, collection_name)
+        counts = {'inserted': 0, 'matched': 0, 'modified': 0, 'deleted': 0, 'upserted': 0}
+        write_errors: List[Dict[str, Any]] = []
+        for i in range(0, len(operations), chunk_size):
+            try:
+                result = await collection.bulk_write(list(operations[i:i + chunk_size]), ordered=ordered)
+            except BulkWriteError as e:
+                # The chunk was applied up to (ordered) or except (unordered) its failed operations
+                for field, key in _BULK_ERROR_COUNTS.items():
+                    counts[field] += e.details.get(key, 0)
+                write_errors.extend({**error, 'index': error['index'] + i} for error in e.details.get('writeErrors', []))
+                if ordered:
+                    break
+                continue
+            counts['inserted'] += result.inserted_count
+            counts['matched'] += result.matched_count
+            counts['modified'] += result.modified_count
+            counts['deleted'] += result.deleted_count
+            counts['upserted'] += result.upserted_count
+        if write_errors:
+            error = BulkWriteError({
+                'writeErrors': write_errors,
+                'writeConcernErrors': [],
+                **{key: counts[field] for field, key in _BULK_ERROR_COUNTS.items()},
+            })
+            error.counts = counts
+            raise error
+        return counts
+
+    @timed_operation
     async def delete_one(self, db_name: str, collection_name: str, query: Dict[str, Any]) -> int:
         """
         Delete a single document from a specified MongoDB collection based on the given query.
@@ -181,25 +514,31 @@ class MongoDB:
         result = await collection.delete_one(query)
         return result.deleted_count
 
-    async def create_index(self, db_name: str, collection_name: str, field_name: str, unique: bool = False) -> int:
+    @timed_operation
+    async def create_index(self, db_name: str, collection_name: str, field_name: Union[str, List[Tuple[str, int]]], unique: bool = False, expire_after_seconds: Optional[int] = None) -> str:
         """
         Create an index on a specified field in a MongoDB collection.
 
-        This asynchronous method creates an index on the specified field in the given collection
-        of the specified database. If the index is unique, duplicate values are not allowed.
+        This asynchronous method creates an index on the specified field (or compound key) in the
+        given collection of the specified database. If the index is unique, duplicate values are not allowed.
+        Creating an index that already exists with the same options is a no-op.
 
         Args:
             db_name (str): The name of the database.
             collection_name (str): The name of the collection within the database.
-            field_name (str): The name of the field on which to create the index.
+            field_name (Union[str, List[Tuple[str, int]]]): The field to index, or a list of
+                (field, direction) pairs for a compound index.
             unique (bool, optional): A flag indicating whether the index should be unique. Defaults to False.
+            expire_after_seconds (int, optional): Make it a TTL index: documents are removed this many
+                seconds after the date in the (single) indexed field. Defaults to None.
 
         Returns:
-            int: The result of the index creation operation. If the index creation is successful,
-            this method returns 1. Otherwise, it returns 0.
+            str: The name of the created (or already existing) index.
         """
         collection = self.get_collection(db_name, collection_name)
-        result = await collection.create_index([(field_name, 1)], unique=unique)
+        keys = [(field_name, 1)] if isinstance(field_name, str) else field_name
+        options = {} if expire_after_seconds is None else {"expireAfterSeconds": expire_after_seconds}
+        result = await collection.create_index(keys, unique=unique, **options)
         return result
 
     def close(self):
@@ -216,4 +555,11 @@ class MongoDB:
         Returns:
             None
         """
-        self.client.close()
\ No newline at end of file
+        self.client.close()
+
+
+def get_mongo(request: Request) -> MongoDB:
+    """
+    FastAPI dependency: the application-wide MongoDB instance created in the app lifespan.
+    """
+    return request.app.state.mongo
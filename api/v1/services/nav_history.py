@@ -0,0 +1,251 @@
+# /api/v1/services/nav_history.py
+
+"""
+NAV history: persisted per (scheme, date) in MongoDB and served from compact in-memory arrays.
+
+Every snapshot refresh upserts the NAVs it carries into `nav_history`, one document per
+scheme and NAV date, keyed by a unique (Scheme_Code, date) index so re-ingesting the same
+day is idempotent. Reads go through an LRU of per-scheme series, each a pair of parallel
+arrays (`array('i')` date ordinals, `array('d')` NAVs) covering the last
+NAV_HISTORY_CACHE_DAYS, so a range query is two bisects and a slice.
+"""
+
+import logging
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from api.v1.config import CONFIG
+from api.v1.services.mongo import MongoDB
+from api.v1.services.nav_snapshot import NavSnapshot
+
+logger = logging.getLogger(__name__)
+
+DB_NAME = CONFIG['MONGO_DB_NAME']
+COLLECTION_NAME = "nav_history"
+
+_parsed_dates: Dict[str, Optional[int]] = {}
+
+
+def parse_nav_date(value: str) -> Optional[int]:
+    """
+    Convert an upstream NAV date ("14-Jan-2025") to a date ordinal, or None if unparseable.
+
+    Every row of a snapshot carries one of a handful of distinct dates, so results are memoized.
+    """
+    ordinal = _parsed_dates.get(value, False)
+    if ordinal is False:
+        try:
+            ordinal = datetime.strptime(value, "%d-%b-%Y").date().toordinal()
+        except (TypeError, ValueError):
+            ordinal = None
+        _parsed_dates[value] = ordinal
+    return ordinal
+
+
+def ordinal_to_datetime(ordinal: int) -> datetime:
+    """
+    The BSON-storable form of a NAV date: midnight UTC of that day.
+    """
+    return datetime.combine(date.fromordinal(ordinal), datetime.min.time(), tzinfo=timezone.utc)
+
+
+class SchemeHistory:
+    __slots__ = ("dates", "navs")
+
+    def __init__(self, dates: array = None, navs: array = None):
+        """
+        NAV series of one scheme as parallel arrays, sorted by date.
+
+        Args:
+            dates (array): `array('i')` of date ordinals.
+            navs (array): `array('d')` of NAVs, one per date.
+
+        Returns:
+            None
+        """
+        self.dates = dates if dates is not None else array("i")
+        self.navs = navs if navs is not None else array("d")
+
+    def __len__(self):
+        return len(self.dates)
+
+    def add(self, ordinal: int, nav: float) -> None:
+        """
+        Insert or replace the NAV of one day (appending is the common case).
+        """
+        if not self.dates or ordinal > self.dates[-1]:
+            self.dates.append(ordinal)
+            self.navs.append(nav)
+            return
+        i = bisect_left(self.dates, ordinal)
+        if i < len(self.dates) and self.dates[i] == ordinal:
+            self.navs[i] = nav
+        else:
+            self.dates.insert(i, ordinal)
+            self.navs.insert(i, nav)
+
+    def trim(self, first_ordinal: int) -> None:
+        """
+        Drop points older than `first_ordinal`.
+        """
+        i = bisect_left(self.dates, first_ordinal)
+        if i:
+            del self.dates[:i]
+            del self.navs[:i]
+
+    def range(self, start: int, end: int) -> Tuple[array, array]:
+        """
+        Points with `start <= date <= end`, as array slices.
+        """
+        lo = bisect_left(self.dates, start)
+        hi = bisect_right(self.dates, end)
+        return self.dates[lo:hi], self.navs[lo:hi]
+
+
+class NavHistoryStore:
+    def __init__(self, window_days: int, max_schemes: int):
+        """
+        Read-through cache of recent NAV history per scheme, plus the ingestion path.
+
+        Args:
+            window_days (int): Days of history kept in memory per scheme; older ranges are
+                read from MongoDB without caching.
+            max_schemes (int): Series kept in memory; the least recently used is evicted first.
+
+        Returns:
+            None
+        """
+        self.window_days = window_days
+        self.max_schemes = max_schemes
+        self._series: "OrderedDict[int, SchemeHistory]" = OrderedDict()
+        # Last (date, nav) written per scheme, so unchanged NAVs aren't re-upserted every refresh
+        self._last_ingested: Dict[int, Tuple[int, float]] = {}
+        self.hits = 0
+        self.loads = 0
+        self.last_ingest: Dict[str, Any] = {}
+
+    def _window_start(self) -> int:
+        return date.today().toordinal() - self.window_days
+
+    async def ingest(self, mongo: MongoDB, snapshot: NavSnapshot, persist: bool = True) -> int:
+        """
+        Persist the NAVs of a snapshot and append them to the cached series.
+
+        Only (scheme, date, NAV) triples not already written by this worker are sent, as
+        unordered bulk upserts on the unique (Scheme_Code, date) key.
+
+        Args:
+            mongo (MongoDB): The application-wide MongoDB instance.
+            snapshot (NavSnapshot): The snapshot that was just swapped in.
+            persist (bool, optional): Write the points to MongoDB. Workers that received the
+                snapshot from the leader only update their cached series. Defaults to True.
+
+        Returns:
+            int: Number of points written.
+        """
+        start = time.perf_counter()
+        operations = []
+        points = []
+        for code, scheme in snapshot.by_code.items():
+            ordinal = parse_nav_date(scheme.get("Date"))
+            nav = scheme.get("Net_Asset_Value")
+            if ordinal is None or not isinstance(nav, (int, float)):
+                continue
+            point = (ordinal, float(nav))
+            if self._last_ingested.get(code) == point:
+                continue
+            operations.append(UpdateOne(
+                {"Scheme_Code": code, "date": ordinal_to_datetime(ordinal)},
+                {"$set": {"nav": point[1]}},
+                upsert=True,
+            ))
+            points.append((code, point))
+
+        if operations and persist:
+            await mongo.bulk_write(DB_NAME, COLLECTION_NAME, operations)
+        for code, point in points:
+            self._last_ingested[code] = point
+            series = self._series.get(code)
+            if series is not None:
+                series.add(*point)
+
+        self.last_ingest = {"points": len(points), "duration": time.perf_counter() - start}
+        if points:
+            logger.info("NAV history: %d points ingested in %.2fs", len(points), self.last_ingest["duration"])
+        return len(points)
+
+    async def _load(self, mongo: MongoDB, scheme_code: int, start: int, end: Optional[int] = None) -> SchemeHistory:
+        query: Dict[str, Any] = {"$gte": ordinal_to_datetime(start)}
+        if end is not None:
+            query["$lte"] = ordinal_to_datetime(end)
+        documents = await mongo.find_all(
+            DB_NAME, COLLECTION_NAME,
+            {"Scheme_Code": scheme_code, "date": query}, {"_id": 0, "date": 1, "nav": 1}, sort=[("date", 1)],
+        )
+        series = SchemeHistory()
+        for document in documents:
+            series.add(document["date"].date().toordinal(), document["nav"])
+        return series
+
+    async def history(self, mongo: MongoDB, scheme_code: int, start: int, end: int) -> Tuple[array, array]:
+        """
+        NAV points of a scheme between two date ordinals (inclusive).
+
+        Ranges inside the in-memory window are served from the cached series (loaded from
+        MongoDB on first use); ranges reaching further back are read from MongoDB directly.
+
+        Returns:
+            Tuple[array, array]: Date ordinals and NAVs, in date order.
+        """
+        window_start = self._window_start()
+        if start < window_start:
+            series = await self._load(mongo, scheme_code, start, end)
+            return series.dates, series.navs
+
+        series = self._series.get(scheme_code)
+        if series is not None:
+            self.hits += 1
+            self._series.move_to_end(scheme_code)
+        else:
+            self.loads += 1
+            series = await self._load(mongo, scheme_code, window_start)
+            last = self._last_ingested.get(scheme_code)
+            if last is not None:
+                series.add(*last)  # in case an ingest landed while loading
+            self._series[scheme_code] = series
+            while len(self._series) > self.max_schemes:
+                self._series.popitem(last=False)
+        series.trim(window_start)
+        return series.range(start, end)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "cached_schemes": len(self._series),
+            "cached_points": sum(len(series) for series in self._series.values()),
+            "hits": self.hits,
+            "loads": self.loads,
+            "last_ingest": self.last_ingest,
+        }
+
+
+def history_response(scheme_code: int, dates: array, navs: array) -> Dict[str, Any]:
+    """
+    Columnar response body: parallel `dates` (ISO) and `navs` lists.
+    """
+    return {
+        "status": "success",
+        "data": {
+            "Scheme_Code": scheme_code,
+            "dates": [date.fromordinal(ordinal).isoformat() for ordinal in dates],
+            "navs": navs.tolist(),
+        },
+    }
+
+
+nav_history = NavHistoryStore(CONFIG['NAV_HISTORY_CACHE_DAYS'], CONFIG['NAV_HISTORY_CACHE_SCHEMES'])
@@ -0,0 +1,275 @@
+# /api/v1/services/nav_snapshot.py
+
+import asyncio
+import json
+import logging
+import sys
+import time
+import zlib
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from bson import Binary
+from pymongo.errors import DuplicateKeyError
+
+from api.v1.config import CONFIG
+from api.v1.services.fast_json import dumps
+from api.v1.services.leader import LeaderLease
+from api.v1.services.metrics import NAV_REFRESH_FAILURES, NAV_REFRESH_SECONDS, NAV_REFRESH_TIMESTAMP, NAV_SNAPSHOT_SCHEMES
+from api.v1.services.mongo import MongoDB
+from api.v1.services.rapidapi_mutfund import RapidAPIService
+from api.v1.services.snapshot_file import SnapshotFileError, read_snapshot_file, write_snapshot_file
+from api.v1.services.upstream_scheduler import background_priority
+
+logger = logging.getLogger(__name__)
+
+# Where the lease holder shares its snapshot with the other workers
+SNAPSHOT_DB = CONFIG['MONGO_DB_NAME']
+SNAPSHOT_COLLECTION = "nav_snapshots"
+SNAPSHOT_NAME = "open_ended"
+
+# Fields repeated on every row; interning them keeps one copy per distinct value
+_INTERNED_FIELDS = ("Scheme_Type", "Scheme_Category", "Mutual_Fund_Family", "Date")
+
+
+class NavSnapshot:
+    __slots__ = ("fetched_at", "by_code", "by_family", "by_category", "families", "response_cache")
+
+    def __init__(self, schemes: List[Dict[str, Any]], fetched_at: float):
+        """
+        Build read-only indexes over one full `/latest` open-ended dataset.
+
+        Args:
+            schemes (List[Dict[str, Any]]): Scheme rows as returned by RapidAPI.
+            fetched_at (float): Unix timestamp of the upstream fetch.
+
+        Returns:
+            None
+
+        Note:
+            The indexes are never mutated after construction, so readers can hold a
+            reference while a newer snapshot is swapped in.
+        """
+        by_code: Dict[int, Dict[str, Any]] = {}
+        for scheme in schemes:
+            for field in _INTERNED_FIELDS:
+                value = scheme.get(field)
+                if isinstance(value, str):
+                    scheme[field] = sys.intern(value)
+            by_code[int(scheme["Scheme_Code"])] = scheme
+
+        by_family: Dict[str, List[Dict[str, Any]]] = {}
+        by_category: Dict[str, List[int]] = {}
+        for code in sorted(by_code):
+            scheme = by_code[code]
+            by_family.setdefault(scheme.get("Mutual_Fund_Family"), []).append(scheme)
+            by_category.setdefault(scheme.get("Scheme_Category"), []).append(code)
+
+        self.fetched_at = fetched_at
+        self.by_code = by_code
+        self.by_family: Dict[str, Tuple[Dict[str, Any], ...]] = {k: tuple(v) for k, v in by_family.items()}
+        self.by_category: Dict[str, Tuple[int, ...]] = {k: tuple(v) for k, v in by_category.items()}
+        self.families: Tuple[str, ...] = tuple(sorted(f for f in by_family if f))
+        # Encoded (and compressed) responses derived from this snapshot; dropped with it
+        self.response_cache: Dict[Any, Any] = {}
+
+    def __len__(self):
+        return len(self.by_code)
+
+    def scheme(self, scheme_code) -> Optional[Dict[str, Any]]:
+        return self.by_code.get(int(scheme_code))
+
+    def family_schemes(self, fund_family: str) -> Tuple[Dict[str, Any], ...]:
+        return self.by_family.get(fund_family, ())
+
+    def category_schemes(self, category: str) -> Tuple[Dict[str, Any], ...]:
+        return tuple(self.by_code[code] for code in self.by_category.get(category, ()))
+
+    def nav(self, scheme_code) -> Optional[float]:
+        scheme = self.scheme(scheme_code)
+        return scheme["Net_Asset_Value"] if scheme else None
+
+
+class NavSnapshotStore:
+    def __init__(self):
+        """
+        Holder for the current NavSnapshot of this worker.
+
+        `current` is replaced by a single reference assignment, so a request sees either the
+        old or the new snapshot in full and never a half-built index.
+        """
+        self.current: Optional[NavSnapshot] = None
+        self.last_refresh_duration: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._listeners: List[Callable[[NavSnapshot], Awaitable[None]]] = []
+        # Version (fetched_at) of the snapshot file last read or written by this worker
+        self._file_fetched_at: Optional[float] = None
+        self._notify_task: Optional[asyncio.Future] = None
+        self._notify_lock = asyncio.Lock()
+
+    def add_listener(self, listener: Callable[[NavSnapshot], Awaitable[None]]) -> None:
+        """
+        Register a coroutine function called with every newly swapped-in snapshot.
+        """
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[NavSnapshot], Awaitable[None]]) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    async def _notify(self, snapshot: NavSnapshot) -> None:
+        # Listeners see snapshots one at a time and in install order (the lock is FIFO)
+        async with self._notify_lock:
+            # One failing consumer must not keep the others from seeing the new snapshot
+            for listener in list(self._listeners):
+                try:
+                    await listener(snapshot)
+                except Exception:
+                    logger.exception("NAV snapshot listener %r failed", listener)
+
+    async def _install(self, snapshot: NavSnapshot, source: str, duration: float, wait: bool = True) -> NavSnapshot:
+        """
+        Swap in `snapshot` and notify the listeners (in a background task unless `wait`).
+        """
+        self.current = snapshot
+        self.last_refresh_duration = duration
+        self.last_error = None
+        NAV_REFRESH_SECONDS.set(duration)
+        NAV_REFRESH_TIMESTAMP.set(snapshot.fetched_at)
+        NAV_SNAPSHOT_SCHEMES.set(len(snapshot))
+        logger.info(
+            "NAV snapshot loaded from %s: %d schemes, %d families in %.2fs",
+            source, len(snapshot), len(snapshot.families), duration,
+        )
+        if wait:
+            await self._notify(snapshot)
+        else:
+            self._notify_task = asyncio.ensure_future(self._notify(snapshot))
+        return snapshot
+
+    async def refresh(self) -> NavSnapshot:
+        """
+        Pull the full open-ended dataset in one upstream call and swap in a new snapshot.
+        """
+        start = time.perf_counter()
+        schemes = await RapidAPIService.fetch_latest_open_ended_schemes()
+        return await self._install(NavSnapshot(schemes, time.time()), "upstream", time.perf_counter() - start)
+
+    async def save(self, mongo: MongoDB, snapshot: NavSnapshot) -> None:
+        """
+        Share a snapshot with the other workers: one document in `nav_snapshots`, with the
+        rows as zlib-compressed JSON and `fetched_at` as its version.
+
+        A stored snapshot that is at least as new is kept, so a deposed leader finishing a
+        slow refresh cannot replace its successor's snapshot with an older one.
+        """
+        payload = await asyncio.to_thread(lambda: zlib.compress(dumps(list(snapshot.by_code.values())), 6))
+        try:
+            await mongo.update_one(
+                SNAPSHOT_DB, SNAPSHOT_COLLECTION,
+                {"name": SNAPSHOT_NAME, "fetched_at": {"$not": {"$gte": snapshot.fetched_at}}},
+                {"$set": {"fetched_at": snapshot.fetched_at, "schemes": Binary(payload)}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            logger.info("A newer NAV snapshot is already saved; not replacing it")
+
+    async def sync(self, mongo: MongoDB) -> Optional[NavSnapshot]:
+        """
+        Install the shared snapshot if it is newer than ours: a version check, then one read.
+
+        Returns:
+            Optional[NavSnapshot]: The installed snapshot, or None if ours is current.
+        """
+        current = self.current
+        newer = {"name": SNAPSHOT_NAME}
+        if current is not None:
+            newer["fetched_at"] = {"$gt": current.fetched_at}
+        if await mongo.find_one(SNAPSHOT_DB, SNAPSHOT_COLLECTION, newer, {"_id": 1}) is None:
+            return None
+        start = time.perf_counter()
+        document = await mongo.find_one(
+            SNAPSHOT_DB, SNAPSHOT_COLLECTION, {"name": SNAPSHOT_NAME}, {"_id": 0, "fetched_at": 1, "schemes": 1}
+        )
+        schemes = await asyncio.to_thread(lambda: json.loads(zlib.decompress(document["schemes"])))
+        return await self._install(NavSnapshot(schemes, document["fetched_at"]), "MongoDB", time.perf_counter() - start)
+
+    async def load_file(self, path: str) -> Optional[NavSnapshot]:
+        """
+        Install the snapshot saved at `path` (at startup, before the first refresh).
+
+        Requests are served from it as soon as it is decoded; listeners (search index, NAV
+        history) catch up in the background.
+
+        Returns:
+            Optional[NavSnapshot]: The installed snapshot, or None if there is no readable file.
+        """
+        start = time.perf_counter()
+        try:
+            schemes, fetched_at = await asyncio.to_thread(read_snapshot_file, path)
+        except FileNotFoundError:
+            return None
+        except (OSError, SnapshotFileError):
+            logger.exception("Ignoring unreadable NAV snapshot file %s", path)
+            return None
+        self._file_fetched_at = fetched_at
+        return await self._install(NavSnapshot(schemes, fetched_at), path, time.perf_counter() - start, wait=False)
+
+    async def save_file(self, path: str, snapshot: NavSnapshot) -> None:
+        """
+        NavSnapshotStore listener (bound to a path): write snapshots newer than the file to it.
+        """
+        if self._file_fetched_at is not None and snapshot.fetched_at <= self._file_fetched_at:
+            return
+        size = await asyncio.to_thread(write_snapshot_file, path, list(snapshot.by_code.values()), snapshot.fetched_at)
+        self._file_fetched_at = snapshot.fetched_at
+        logger.info("NAV snapshot saved to %s (%d bytes)", path, size)
+
+    async def run_refresh_loop(self, interval: float = None, mongo: MongoDB = None, lease: LeaderLease = None):
+        """
+        Keep the snapshot fresh. Failures keep the previous snapshot.
+
+        Without a lease, refresh from upstream immediately and then every `interval` seconds.
+        With one, only the lease holder goes upstream (when its snapshot is `interval` old)
+        and saves the result to MongoDB; the other workers check for a newer saved snapshot
+        every NAV_SNAPSHOT_POLL_SECONDS, so upstream quota doesn't grow with the worker count.
+        The leader checks too, so a new leader picks up its predecessor's snapshot rather
+        than going upstream early because its own (e.g. restored from disk) is older.
+        """
+        interval = interval or CONFIG['NAV_SNAPSHOT_REFRESH_SECONDS']
+        while True:
+            try:
+                if lease is None:
+                    with background_priority():
+                        await self.refresh()
+                elif lease.is_leader:
+                    try:
+                        await self.sync(mongo)
+                    except Exception:
+                        logger.exception("Could not load the saved NAV snapshot; refreshing from upstream")
+                    if self.current is None or time.time() - self.current.fetched_at >= interval:
+                        with background_priority():
+                            snapshot = await self.refresh()
+                        # The upstream call can outlast the lease: only a current leader shares
+                        if lease.is_leader:
+                            await self.save(mongo, snapshot)
+                else:
+                    await self.sync(mongo)
+            except Exception as e:
+                self.last_error = str(e)
+                NAV_REFRESH_FAILURES.inc()
+                logger.exception("NAV snapshot refresh failed; keeping previous snapshot")
+            await asyncio.sleep(interval if lease is None else CONFIG['NAV_SNAPSHOT_POLL_SECONDS'])
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self.current
+        return {
+            "loaded": snapshot is not None,
+            "schemes": len(snapshot) if snapshot else 0,
+            "families": len(snapshot.families) if snapshot else 0,
+            "fetched_at": snapshot.fetched_at if snapshot else None,
+            "last_refresh_duration": self.last_refresh_duration,
+            "last_error": self.last_error,
+        }
+
+
+nav_snapshot = NavSnapshotStore()
@@ -0,0 +1,302 @@
+# /api/v1/services/nav_stream.py
+
+"""
+Live NAV and holding-value push for connected portfolio streams (GET /portfolio/stream).
+
+Each connection loads the user's holdings once and registers a Subscription under every
+scheme code it holds. A NAV change for a scheme is fanned out by walking that scheme's
+subscriber set and recording the new NAV in each subscription's pending map: no database
+query and no per-connection encoding at publish time, and a burst of changes collapses
+into one event per connection (latest NAV wins). Each connection's writer then turns its
+pending NAVs into value deltas and emits one Server-Sent Event.
+
+Streams are registered on one worker, but the changes they show happen on any: snapshot
+NAVs reach every worker through the shared snapshot, and purchase writes (buys and
+revaluation, on whichever worker or the lease holder) through MongoDB. Each worker polls
+the purchases of its streaming users that changed since its last look (`last_updated`)
+and feeds the differences in, so the worker that made a change pushing it at once is only
+a shortcut. `last_updated` comes from the writing worker's clock; the poll looks back
+NAV_STREAM_SYNC_OVERLAP_SECONDS further to absorb skew, which is harmless since only
+differences are pushed.
+"""
+
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Set
+
+from api.v1.config import CONFIG
+from api.v1.services.fast_json import dumps
+from api.v1.services.metrics import Counter, Gauge
+from api.v1.services.mongo import MongoDB
+from api.v1.services.nav_snapshot import NavSnapshot, nav_snapshot
+
+logger = logging.getLogger(__name__)
+
+DB_NAME = CONFIG['MONGO_DB_NAME']
+PURCHASES = "purchases"
+
+EVENTS_SENT = Counter("nav_stream_events", "Server-Sent Events written to portfolio streams, by event type.", ("event",))
+
+
+class Subscription:
+    __slots__ = ("email", "holdings", "pending", "total_value", "wakeup", "closed")
+
+    def __init__(self, email: str, holdings: Dict[int, List[float]]):
+        """
+        One connected portfolio stream.
+
+        Args:
+            email (str): The subscribed user.
+            holdings (Dict[int, List[float]]): Scheme code to `[units, nav, value]` as last sent to the client.
+
+        Returns:
+            None
+        """
+        self.email = email
+        self.holdings = holdings
+        self.pending: Dict[int, float] = {}
+        self.total_value = sum(holding[2] for holding in holdings.values())
+        self.wakeup = asyncio.Event()
+        self.closed = False
+
+    def offer(self, scheme_code: int, nav: float) -> None:
+        holding = self.holdings.get(scheme_code)
+        if holding is not None and holding[1] != nav:
+            self.pending[scheme_code] = nav
+            self.wakeup.set()
+
+    def set_holding(self, scheme_code: int, units: float, nav: float) -> None:
+        if scheme_code not in self.holdings:
+            self.holdings[scheme_code] = [units, nav, 0.0]
+        else:
+            self.holdings[scheme_code][0] = units
+        self.pending[scheme_code] = nav
+        self.wakeup.set()
+
+    def sync_holding(self, scheme_code: int, units: float, nav: float) -> None:
+        """
+        `set_holding`, but only if units or NAV differ from what the client was last sent.
+        """
+        holding = self.holdings.get(scheme_code)
+        if holding is None or holding[0] != units or self.pending.get(scheme_code, holding[1]) != nav:
+            self.set_holding(scheme_code, units, nav)
+
+    def close(self) -> None:
+        self.closed = True
+        self.wakeup.set()
+
+    def drain(self) -> List[Dict[str, Any]]:
+        """
+        Turn pending NAVs into per-holding value deltas and mark them as sent.
+        """
+        changes = []
+        for scheme_code, nav in self.pending.items():
+            holding = self.holdings[scheme_code]
+            value = holding[0] * nav
+            change = value - holding[2]
+            holding[1], holding[2] = nav, value
+            self.total_value += change
+            changes.append({"Scheme_Code": scheme_code, "nav": nav, "value": value, "value_change": change})
+        self.pending.clear()
+        return changes
+
+
+class NavBroadcaster:
+    def __init__(self):
+        """
+        Registry of connected portfolio streams, indexed by scheme code and by user.
+        """
+        self._by_scheme: Dict[int, Set[Subscription]] = defaultdict(set)
+        self._by_user: Dict[str, Set[Subscription]] = defaultdict(set)
+        self.published = 0
+        self.synced_holdings = 0
+
+    def subscribe(self, email: str, holdings: Dict[int, List[float]]) -> Subscription:
+        subscription = Subscription(email, holdings)
+        self._by_user[email].add(subscription)
+        for scheme_code in holdings:
+            self._by_scheme[scheme_code].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        for scheme_code in subscription.holdings:
+            subscribers = self._by_scheme.get(scheme_code)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._by_scheme[scheme_code]
+        subscribers = self._by_user.get(subscription.email)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._by_user[subscription.email]
+
+    def subscribed_codes(self) -> Iterable[int]:
+        return self._by_scheme.keys()
+
+    def publish(self, navs: Dict[int, float]) -> None:
+        """
+        Fan new NAVs out to every stream holding those schemes.
+        """
+        for scheme_code, nav in navs.items():
+            for subscription in self._by_scheme.get(scheme_code, ()):
+                subscription.offer(scheme_code, nav)
+        self.published += 1
+
+    async def publish_snapshot(self, snapshot: NavSnapshot) -> None:
+        """
+        NavSnapshotStore listener: publish the new NAVs of the schemes someone is watching.
+        """
+        navs = {}
+        for scheme_code in self.subscribed_codes():
+            nav = snapshot.nav(scheme_code)
+            if nav is not None:
+                navs[scheme_code] = nav
+        self.publish(navs)
+
+    def update_holding(self, email: str, scheme_code: int, units: float, nav: float) -> None:
+        """
+        Reflect a /buy in the user's open streams (the holding may be new to them).
+        """
+        for subscription in self._by_user.get(email, ()):
+            self._by_scheme[scheme_code].add(subscription)
+            subscription.set_holding(scheme_code, units, nav)
+
+    async def sync(self, mongo: MongoDB, since: datetime, chunk_size: int = 1000) -> datetime:
+        """
+        Push purchase changes made by any worker since `since` to this worker's streams.
+
+        Holdings are valued like `initial_holdings`: at the snapshot NAV when there is one,
+        else at the purchase's stored NAV.
+
+        Args:
+            mongo (MongoDB): The application-wide MongoDB instance.
+            since (datetime): When the previous sync started.
+            chunk_size (int, optional): Users per query. Defaults to 1000.
+
+        Returns:
+            datetime: When this sync started, for the next call.
+        """
+        started = datetime.now(timezone.utc)
+        emails = list(self._by_user)
+        changed_since = since - timedelta(seconds=CONFIG['NAV_STREAM_SYNC_OVERLAP_SECONDS'])
+        snapshot = nav_snapshot.current
+        for i in range(0, len(emails), chunk_size):
+            purchases = await mongo.find_all(
+                DB_NAME, PURCHASES,
+                {"email": {"$in": emails[i:i + chunk_size]}, "last_updated": {"$gte": changed_since}},
+                {"_id": 0, "email": 1, "Scheme_Code": 1, "units": 1, "Net_Asset_Value": 1},
+            )
+            for purchase in purchases:
+                scheme_code = purchase["Scheme_Code"]
+                nav = snapshot.nav(scheme_code) if snapshot is not None else None
+                if nav is None:
+                    nav = purchase.get("Net_Asset_Value") or 0.0
+                for subscription in self._by_user.get(purchase["email"], ()):
+                    self._by_scheme[scheme_code].add(subscription)
+                    subscription.sync_holding(scheme_code, purchase.get("units") or 0, nav)
+                self.synced_holdings += 1
+        return started
+
+    async def run_sync_loop(self, mongo: MongoDB, interval: float = None) -> None:
+        """
+        `sync` every NAV_STREAM_SYNC_SECONDS until cancelled; a failed sync is retried over
+        the same window on the next tick.
+        """
+        interval = interval or CONFIG['NAV_STREAM_SYNC_SECONDS']
+        since = datetime.now(timezone.utc)
+        while True:
+            await asyncio.sleep(interval)
+            if not self._by_user:
+                since = datetime.now(timezone.utc)
+                continue
+            try:
+                since = await self.sync(mongo, since)
+            except Exception:
+                logger.exception("Could not sync portfolio streams with MongoDB")
+
+    def close(self) -> None:
+        """
+        End every open stream (on shutdown).
+        """
+        for subscriptions in list(self._by_user.values()):
+            for subscription in list(subscriptions):
+                subscription.close()
+
+    def connections(self) -> int:
+        return sum(len(subscriptions) for subscriptions in self._by_user.values())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connections": self.connections(),
+            "users": len(self._by_user),
+            "schemes": len(self._by_scheme),
+            "published": self.published,
+            "synced_holdings": self.synced_holdings,
+        }
+
+
+def format_event(event: str, data: Any) -> bytes:
+    EVENTS_SENT.labels(event).inc()
+    return b"event: " + event.encode() + b"\ndata: " + dumps(data) + b"\n\n"
+
+
+def initial_holdings(purchases: Iterable[Dict[str, Any]], snapshot: Optional[NavSnapshot]) -> Dict[int, List[float]]:
+    """
+    `[units, nav, value]` per held scheme, valued at the snapshot NAV when available.
+    """
+    holdings = {}
+    for purchase in purchases:
+        scheme_code = purchase["Scheme_Code"]
+        nav = snapshot.nav(scheme_code) if snapshot is not None else None
+        if nav is None:
+            nav = purchase.get("Net_Asset_Value") or 0.0
+        units = purchase.get("units") or 0
+        holdings[scheme_code] = [units, nav, units * nav]
+    return holdings
+
+
+async def portfolio_events(
+    broadcaster: NavBroadcaster,
+    email: str,
+    holdings: Dict[int, List[float]],
+    keepalive: float = None,
+) -> AsyncIterator[bytes]:
+    """
+    The SSE body of one stream: a `ready` event with the baseline holdings, then a `nav`
+    event whenever held NAVs (or holdings) change, and comment keep-alives in between.
+
+    The subscription lives exactly as long as the body is being sent.
+    """
+    keepalive = keepalive or CONFIG['NAV_STREAM_KEEPALIVE_SECONDS']
+    subscription = broadcaster.subscribe(email, holdings)
+    try:
+        yield format_event("ready", {
+            "holdings": [
+                {"Scheme_Code": code, "units": units, "nav": nav, "value": value}
+                for code, (units, nav, value) in subscription.holdings.items()
+            ],
+            "portfolio_value": subscription.total_value,
+        })
+        while not subscription.closed:
+            try:
+                await asyncio.wait_for(subscription.wakeup.wait(), keepalive)
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            subscription.wakeup.clear()
+            changes = subscription.drain()
+            if changes:
+                yield format_event("nav", {"changes": changes, "portfolio_value": subscription.total_value})
+    finally:
+        broadcaster.unsubscribe(subscription)
+
+
+nav_broadcaster = NavBroadcaster()
+
+Gauge(
+    "nav_stream_connections", "Open portfolio streams on this worker.",
+    function=lambda: {(): nav_broadcaster.connections()},
+)
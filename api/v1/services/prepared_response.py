@@ -0,0 +1,73 @@
+# /api/v1/services/prepared_response.py
+
+import hashlib
+from typing import Any, Dict
+
+from fastapi import Request, Response
+
+from api.v1.config import CONFIG
+from api.v1.services import fast_json
+from api.v1.services.compression import compress, negotiate_encoding
+
+
+class PreparedResponse:
+    def __init__(self, content: Any, cache_control: str):
+        """
+        A JSON response body encoded once and served as-is until its content changes.
+
+        Compressed variants are built lazily, once per encoding, so a payload shared by many
+        clients is never recompressed per request.
+
+        Args:
+            content (Any): JSON-serializable payload.
+            cache_control (str): Value of the Cache-Control header sent with every response.
+
+        Returns:
+            None
+        """
+        self.body = fast_json.dumps(content)
+        # Strong validator: derived from the exact bytes on the wire
+        self.etag = '"' + hashlib.sha256(self.body).hexdigest()[:32] + '"'
+        self.cache_control = cache_control
+        self._variants: Dict[str, bytes] = {}
+
+    def variant_etag(self, encoding: str = None) -> str:
+        # Each content-coding is a different representation, so it gets its own strong ETag
+        return self.etag if encoding is None else f'{self.etag[:-1]}-{encoding}"'
+
+    def variant(self, encoding: str) -> bytes:
+        body = self._variants.get(encoding)
+        if body is None:
+            body = self._variants[encoding] = compress(self.body, encoding)
+        return body
+
+    def not_modified(self, request: Request) -> bool:
+        if_none_match = request.headers.get("if-none-match")
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        # If-None-Match uses weak comparison, so a W/ prefix on the client's copy still matches;
+        # any encoding of the same content counts as the same version
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return any(self.variant_etag(encoding) in candidates for encoding in (None, "gzip", "br"))
+
+    def respond(self, request: Request) -> Response:
+        """
+        304 with no body when the client already holds this version, else the stored bytes,
+        precompressed when the client accepts gzip or brotli.
+        """
+        encoding = None
+        if len(self.body) >= CONFIG['COMPRESSION_MIN_SIZE']:
+            encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+        headers = {
+            "ETag": self.variant_etag(encoding),
+            "Cache-Control": self.cache_control,
+            "Vary": "Accept-Encoding",
+        }
+        if self.not_modified(request):
+            return Response(status_code=304, headers=headers)
+        if encoding is None:
+            return Response(content=self.body, media_type="application/json", headers=headers)
+        headers["Content-Encoding"] = encoding
+        return Response(content=self.variant(encoding), media_type="application/json", headers=headers)
@@ -1,26 +1,151 @@
 # /api/v1/services/rapidapi_mutfund.py
 
+import asyncio
+import logging
+import time
 import httpx
 from api.v1.config import CONFIG
+from api.v1.services.cache import AsyncTTLCache
+from api.v1.services.metrics import Gauge, UPSTREAM_REQUESTS, UPSTREAM_REQUEST_SECONDS, UPSTREAM_RETRIES
+from api.v1.services.resilience import CircuitBreaker, call_with_retries
+from api.v1.services.upstream_scheduler import scheduler
 import urllib.parse
 
+logger = logging.getLogger(__name__)
+
+RAPID_API_HOST = "latest-mutual-fund-nav.p.rapidapi.com"
+
+# One long-lived client per worker so connections (and their TCP/TLS handshakes)
+# are reused across requests. Created on app startup, closed on shutdown.
+_client = None
+
+# Per-family and per-scheme NAV lookups, shared by every request on this worker.
+# Expired entries keep being served (and refreshed in the background) during an upstream outage.
+family_cache = AsyncTTLCache(CONFIG['NAV_CACHE_TTL_SECONDS'], CONFIG['NAV_CACHE_MAX_FAMILIES'], CONFIG['NAV_CACHE_STALE_SECONDS'])
+scheme_cache = AsyncTTLCache(CONFIG['NAV_CACHE_TTL_SECONDS'], CONFIG['NAV_CACHE_MAX_SCHEMES'], CONFIG['NAV_CACHE_STALE_SECONDS'])
+
+# Shared by every RapidAPI call on this worker: they all hit the same upstream
+breaker = CircuitBreaker(CONFIG['RAPID_BREAKER_FAILURES'], CONFIG['RAPID_BREAKER_RESET_SECONDS'])
+Gauge(
+    "upstream_circuit_open", "1 while the RapidAPI circuit breaker is open or half-open.",
+    function=lambda: {(): 0.0 if breaker.state == CircuitBreaker.CLOSED else 1.0},
+)
+
+
+def _build_client() -> httpx.AsyncClient:
+    """
+    Build the pooled upstream client from CONFIG.
+
+    HTTP/2 is only enabled when requested and the optional `h2` package is installed
+    (`pip install httpx[http2]`); otherwise the client falls back to HTTP/1.1 keep-alive.
+    """
+    http2 = CONFIG['RAPID_HTTP2']
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("RAPID_HTTP2 is set but the 'h2' package is not installed; using HTTP/1.1")
+            http2 = False
+
+    limits = httpx.Limits(
+        max_connections=CONFIG['RAPID_HTTP_MAX_CONNECTIONS'],
+        max_keepalive_connections=CONFIG['RAPID_HTTP_MAX_KEEPALIVE'],
+        keepalive_expiry=CONFIG['RAPID_HTTP_KEEPALIVE_EXPIRY'],
+    )
+    timeout = httpx.Timeout(CONFIG['RAPID_HTTP_TIMEOUT'], connect=CONFIG['RAPID_HTTP_CONNECT_TIMEOUT'])
+    return httpx.AsyncClient(
+        limits=limits,
+        timeout=timeout,
+        http2=http2,
+        headers={
+            "X-RapidAPI-Key": CONFIG["RAPID_MUT_FUND_KEY"] or "",
+            "X-RapidAPI-Host": RAPID_API_HOST,
+        },
+    )
+
+
 class RapidAPIService:
     @staticmethod
-    async def fetch_latest_open_ended_schemes():
+    async def startup():
         """
-        Fetch all the open ended schemes
+        Create the shared upstream client. Called once from the app startup hook.
         """
+        global _client
+        if _client is None:
+            _client = _build_client()
 
-        url = f"{CONFIG['RAPID_URL']}/latest?Scheme_Type=Open"
-        headers = {
-            "X-RapidAPI-Key": CONFIG["RAPID_MUT_FUND_KEY"],
-            "X-RapidAPI-Host": "latest-mutual-fund-nav.p.rapidapi.com"
-        }
+    @staticmethod
+    async def shutdown():
+        """
+        Close the shared upstream client and release its pooled connections.
+        """
+        global _client
+        if _client is not None:
+            await _client.aclose()
+            _client = None
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=headers)
+    @staticmethod
+    def get_client() -> httpx.AsyncClient:
+        """
+        Return the shared upstream client, creating it lazily when used outside the app
+        lifecycle (e.g. scripts and benchmarks).
+        """
+        global _client
+        if _client is None:
+            _client = _build_client()
+        return _client
+
+    @staticmethod
+    async def _attempt(url: str, operation: str):
+        """
+        One GET of `url` on the shared client, recording latency and outcome under `operation`.
+        """
+        start = time.perf_counter()
+        status = "error"
+        try:
+            response = await RapidAPIService.get_client().get(url)
+            status = str(response.status_code)  # 4xx/5xx are labelled by code
             response.raise_for_status()  # Raise an exception for HTTP errors
             return response.json()
+        except httpx.TransportError as e:
+            status = type(e).__name__  # connection errors, httpx timeouts
+            raise
+        except asyncio.CancelledError:
+            status = "cancelled"  # includes hitting the per-call timeout
+            raise
+        finally:
+            UPSTREAM_REQUEST_SECONDS.labels(operation).observe(time.perf_counter() - start)
+            UPSTREAM_REQUESTS.labels(operation, status).inc()
+
+    @staticmethod
+    async def _get(url: str, operation: str, timeout: float = None):
+        """
+        GET `url` with retries on transient failures, behind the shared circuit breaker.
+        Each attempt first takes a token from the upstream scheduler at the caller's priority.
+
+        Raises:
+            UpstreamUnavailable: The circuit is open, the call was not admitted by the
+                scheduler (QuotaExceeded), or every attempt failed.
+        """
+        return await call_with_retries(
+            lambda: RapidAPIService._attempt(url, operation),
+            breaker,
+            attempts=CONFIG['RAPID_RETRY_ATTEMPTS'],
+            timeout=timeout or CONFIG['RAPID_CALL_TIMEOUT'],
+            base_delay=CONFIG['RAPID_RETRY_BASE_DELAY'],
+            max_delay=CONFIG['RAPID_RETRY_MAX_DELAY'],
+            on_retry=lambda error: UPSTREAM_RETRIES.labels(operation).inc(),
+            before_attempt=scheduler.acquire,
+        )
+
+    @staticmethod
+    async def fetch_latest_open_ended_schemes():
+        """
+        Fetch all the open ended schemes
+        """
+
+        url = f"{CONFIG['RAPID_URL']}/latest?Scheme_Type=Open"
+        return await RapidAPIService._get(url, "fetch_latest_open_ended_schemes", CONFIG['RAPID_SNAPSHOT_CALL_TIMEOUT'])
         
     @staticmethod
     async def fetch_latest_ff_open_ended_schemes(fund_family):
@@ -32,15 +157,7 @@ class RapidAPIService:
         encoded_fund_family = urllib.parse.quote(fund_family)
 
         url = f"{CONFIG['RAPID_URL']}/latest?Scheme_Type=Open&Mutual_Fund_Family={encoded_fund_family}"
-        headers = {
-            "X-RapidAPI-Key": CONFIG["RAPID_MUT_FUND_KEY"],
-            "X-RapidAPI-Host": "latest-mutual-fund-nav.p.rapidapi.com"
-        }
-
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=headers)
-            response.raise_for_status()  # Raise an exception for HTTP errors
-            return response.json()
+        return await RapidAPIService._get(url, "fetch_latest_ff_open_ended_schemes")
         
 
     @staticmethod
@@ -53,10 +170,6 @@ class RapidAPIService:
         encoded_scheme_code = urllib.parse.quote(str(scheme_code))
 
         url = f"{CONFIG['RAPID_URL']}/latest?Scheme_Type=Open&Scheme_Code={encoded_scheme_code}"
-        headers = {
-            "X-RapidAPI-Key": CONFIG["RAPID_MUT_FUND_KEY"],
-            "X-RapidAPI-Host": "latest-mutual-fund-nav.p.rapidapi.com"
-        }
 
         # Dev for UI
         # return {
@@ -76,7 +189,37 @@ class RapidAPIService:
         #     ]
         #     }
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=headers)
-            response.raise_for_status()  # Raise an exception for HTTP errors
-            return {'status': "success", "data": response.json()}
\ No newline at end of file
+        return {'status': "success", "data": await RapidAPIService._get(url, "fetch_oes_schemes")}
+
+    @staticmethod
+    async def get_ff_open_ended_schemes(fund_family):
+        """
+        Cached `fetch_latest_ff_open_ended_schemes`.
+
+        Concurrent requests for the same family share one upstream call. Each row of the
+        family listing also primes the per-scheme cache, since it carries the same NAV.
+        """
+        async def load():
+            schemes = await RapidAPIService.fetch_latest_ff_open_ended_schemes(fund_family)
+            for scheme in schemes:
+                scheme_cache.set(int(scheme["Scheme_Code"]), {"status": "success", "data": [scheme]})
+            return schemes
+
+        return await family_cache.get_or_load(fund_family, load)
+
+    @staticmethod
+    async def get_oes_schemes(scheme_code):
+        """
+        Cached `fetch_oes_schemes`; concurrent requests for the same scheme share one upstream call.
+        """
+        return await scheme_cache.get_or_load(
+            int(scheme_code), lambda: RapidAPIService.fetch_oes_schemes(scheme_code)
+        )
+
+    @staticmethod
+    def cache_stats():
+        """
+        Hit, miss and coalesced counts for the NAV lookup caches.
+        """
+        return {"families": family_cache.stats(), "schemes": scheme_cache.stats(), "circuit": breaker.stats(),
+                "scheduler": scheduler.stats()}
@@ -0,0 +1,213 @@
+# /api/v1/services/resilience.py
+
+"""
+Failure handling for upstream calls: bounded retries with jittered backoff, a per-attempt
+timeout and a circuit breaker that fails fast while the upstream is unhealthy.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Statuses worth retrying: rate limiting and server-side failures
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class UpstreamUnavailable(Exception):
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        """
+        The upstream could not serve the call: the circuit is open or every retry failed.
+
+        Args:
+            message (str): What failed.
+            retry_after (Optional[float]): Seconds until a retry is worth attempting, if known.
+        """
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Timeouts, connection errors, 429 and 5xx are transient; other 4xx are not.
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRYABLE_STATUSES
+    return isinstance(error, (httpx.TransportError, TimeoutError))
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """
+    The upstream's Retry-After (in seconds) on a 429/503, if it sent one.
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        value = error.response.headers.get("Retry-After")
+        if value:
+            try:
+                return max(0.0, float(value))
+            except ValueError:
+                return None
+    return None
+
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float) -> float:
+    """
+    "Full jitter" exponential backoff: uniform in [0, min(max_delay, base_delay * 2**attempt)],
+    so clients that failed together don't retry together.
+    """
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        """
+        Consecutive-failure circuit breaker.
+
+        After `failure_threshold` consecutive failures the circuit opens and calls fail
+        immediately for `reset_timeout` seconds. Then one trial call is let through
+        (half-open): success closes the circuit, failure re-opens it.
+
+        Args:
+            failure_threshold (int): Consecutive failures that open the circuit.
+            reset_timeout (float): Seconds to stay open before a trial call.
+
+        Returns:
+            None
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.times_opened = 0
+        self.rejected = 0
+
+    def retry_after(self) -> float:
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def check(self) -> None:
+        """
+        Raise UpstreamUnavailable if a call would be rejected right now, without claiming
+        the half-open trial (used before queueing for the call).
+        """
+        if self.state == self.OPEN and self.retry_after() > 0:
+            self.rejected += 1
+            raise UpstreamUnavailable("Upstream circuit is open", self.retry_after())
+        if self.state == self.HALF_OPEN and self.trial_in_flight:
+            self.rejected += 1
+            raise UpstreamUnavailable("Upstream circuit is half-open; trial call in flight", self.reset_timeout)
+
+    def before_call(self) -> None:
+        """
+        Raise UpstreamUnavailable if the call should not be attempted; otherwise let it
+        through, claiming the trial when half-open. Call it immediately before the request.
+        """
+        self.check()
+        if self.state == self.OPEN:
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN:
+            self.trial_in_flight = True
+
+    def record_success(self) -> None:
+        if self.state != self.CLOSED:
+            logger.info("Upstream circuit closed")
+        self.state = self.CLOSED
+        self.failures = 0
+        self.trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self.trial_in_flight = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.times_opened += 1
+                logger.warning("Upstream circuit opened after %d consecutive failures", self.failures)
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """
+        Forget a half-open trial that ended without a verdict (e.g. a non-retryable 4xx).
+        """
+        self.trial_in_flight = False
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+            "retry_after": self.retry_after() if self.state == self.OPEN else 0.0,
+        }
+
+
+async def call_with_retries(
+    call: Callable[[], Awaitable[Any]],
+    breaker: CircuitBreaker,
+    attempts: int,
+    timeout: float,
+    base_delay: float,
+    max_delay: float,
+    on_retry: Callable[[BaseException], None] = None,
+    before_attempt: Callable[[], Awaitable[None]] = None,
+) -> Any:
+    """
+    Run `call` behind `breaker`, with a timeout per attempt and jittered backoff between
+    retryable failures.
+
+    Args:
+        call (Callable[[], Awaitable[Any]]): Coroutine factory for one attempt.
+        breaker (CircuitBreaker): Breaker consulted before, and updated after, every attempt.
+        attempts (int): Maximum attempts, including the first.
+        timeout (float): Seconds allowed per attempt.
+        base_delay (float): Backoff base in seconds.
+        max_delay (float): Backoff cap in seconds (also caps an upstream Retry-After).
+        on_retry (Callable[[BaseException], None], optional): Called before each retry.
+        before_attempt (Callable[[], Awaitable[None]], optional): Awaited before each attempt,
+            outside its timeout (e.g. rate-limit admission). Its exceptions end the call. The
+            breaker only claims its half-open trial once this returns, so a call waiting here
+            never blocks the trial for others.
+
+    Returns:
+        Any: The result of the first successful attempt.
+
+    Raises:
+        UpstreamUnavailable: The circuit is open, or every attempt failed with a transient error.
+        httpx.HTTPStatusError: The upstream rejected the call with a non-retryable status.
+    """
+    for attempt in range(attempts):
+        # Fail fast while the circuit is open rather than queueing for admission first
+        breaker.check()
+        if before_attempt is not None:
+            await before_attempt()
+        breaker.before_call()
+        try:
+            async with asyncio.timeout(timeout):
+                result = await call()
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+        except Exception as e:
+            if not is_retryable(e):
+                breaker.release()
+                raise
+            breaker.record_failure()
+            if attempt + 1 >= attempts:
+                raise UpstreamUnavailable(f"Upstream failed after {attempts} attempts: {e!r}") from e
+            if on_retry is not None:
+                on_retry(e)
+            delay = retry_after_seconds(e)
+            await asyncio.sleep(min(max_delay, delay) if delay is not None else backoff_delay(attempt, base_delay, max_delay))
+        else:
+            breaker.record_success()
+            return result
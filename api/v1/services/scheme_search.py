@@ -0,0 +1,229 @@
+# /api/v1/services/scheme_search.py
+
+"""
+Typeahead search over every open-ended scheme (GET /fund_schemes/search).
+
+A SchemeSearchIndex is built from one NavSnapshot and never mutated; each snapshot
+refresh builds a new one off the event loop and swaps it in with a single assignment.
+
+Scheme names, both ISINs and the Scheme_Code are split into lowercase alphanumeric tokens.
+Every query term is matched as a token prefix and all terms must match. Postings are
+`array('i')` of scheme ids, and ids are assigned in static rank order (shorter names
+first), so posting lists are already sorted by tie-break rank:
+
+- prefixes up to SHORT_PREFIX_LENGTH characters have precomputed postings, since they
+  are what users type first and would otherwise expand to hundreds of tokens;
+- longer terms bisect the sorted token vocabulary and lazily merge the postings in range.
+
+Results are ranked in tiers (exact Scheme_Code/ISIN, then whole words, then prefixes),
+each read in posting order from its most selective term until `limit` are found, so a
+query costs roughly what it returns rather than what it matches. Recent queries are
+memoized per index.
+"""
+
+import asyncio
+import heapq
+import logging
+import re
+import time
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from api.v1.services.nav_snapshot import NavSnapshot
+
+logger = logging.getLogger(__name__)
+
+SHORT_PREFIX_LENGTH = 3
+QUERY_CACHE_SIZE = 2048
+# Prefixes spanning more tokens than this scan their short-prefix posting instead
+MAX_MERGED_TOKENS = 256
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+# Placeholder ISINs in the upstream data
+_NO_ISIN = ("", "-")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower()) if text else []
+
+
+class SchemeSearchIndex:
+    def __init__(self, snapshot: NavSnapshot):
+        """
+        Build the search index of one NAV snapshot.
+
+        Args:
+            snapshot (NavSnapshot): The snapshot whose schemes are indexed.
+
+        Returns:
+            None
+        """
+        start = time.perf_counter()
+        schemes = sorted(
+            snapshot.by_code.values(),
+            key=lambda scheme: (len(scheme.get("Scheme_Name") or ""), scheme.get("Scheme_Name") or "", scheme["Scheme_Code"]),
+        )
+        # Per scheme id: the row, and its tokens as " tok1 tok2 ... " so that checking a
+        # candidate against a term is one substring search
+        self.schemes: Tuple[Dict[str, Any], ...] = tuple(schemes)
+        self.texts: List[str] = []
+
+        postings: Dict[str, array] = {}
+        identifier_postings: Dict[str, array] = {}
+        short_postings: Dict[str, array] = {}
+        for scheme_id, scheme in enumerate(schemes):
+            name_tokens = tuple(tokenize(scheme.get("Scheme_Name")))
+            identifiers = [str(scheme["Scheme_Code"])]
+            for field in ("ISIN_Div_Payout_ISIN_Growth", "ISIN_Div_Reinvestment"):
+                isin = scheme.get(field)
+                if isinstance(isin, str) and isin not in _NO_ISIN:
+                    identifiers.append(isin.lower())
+            self.texts.append(" " + " ".join(name_tokens + tuple(identifiers)) + " ")
+
+            tokens = set(name_tokens)
+            tokens.update(identifiers)
+            prefixes = {token[:length] for token in tokens for length in range(1, min(len(token), SHORT_PREFIX_LENGTH) + 1)}
+            for token in tokens:
+                postings.setdefault(token, array("i")).append(scheme_id)
+            for identifier in set(identifiers):
+                identifier_postings.setdefault(identifier, array("i")).append(scheme_id)
+            for prefix in prefixes:
+                short_postings.setdefault(prefix, array("i")).append(scheme_id)
+
+        self.vocabulary: List[str] = sorted(postings)
+        self.postings: List[array] = [postings[token] for token in self.vocabulary]
+        self.identifier_postings = identifier_postings
+        self.short_postings = short_postings
+        self.fetched_at = snapshot.fetched_at
+        self.build_duration = time.perf_counter() - start
+        self._cache: "OrderedDict[Tuple[str, int], List[Dict[str, Any]]]" = OrderedDict()
+        self.cache_hits = 0
+        self.queries = 0
+
+    def __len__(self):
+        return len(self.schemes)
+
+    def _token_postings(self, token: str):
+        """
+        Sorted scheme ids having exactly this token.
+        """
+        i = bisect_left(self.vocabulary, token)
+        if i < len(self.vocabulary) and self.vocabulary[i] == token:
+            return self.postings[i]
+        return ()
+
+    def _prefix_postings(self, term: str) -> Tuple[int, Iterable[int]]:
+        """
+        Scheme ids having a token that starts with `term`, in id order, with their count.
+
+        Long terms merge the postings of the vocabulary range lazily; ranges too wide to
+        merge cheaply fall back to the (superset) short-prefix posting, which the caller
+        filters anyway.
+        """
+        if len(term) <= SHORT_PREFIX_LENGTH:
+            postings = self.short_postings.get(term, ())
+            return len(postings), postings
+        lo = bisect_left(self.vocabulary, term)
+        hi = bisect_left(self.vocabulary, term + "\uffff", lo)
+        if hi - lo == 1:
+            return len(self.postings[lo]), self.postings[lo]
+        if hi - lo <= MAX_MERGED_TOKENS:
+            in_range = self.postings[lo:hi]
+            return sum(len(postings) for postings in in_range), heapq.merge(*in_range)
+        return self._prefix_postings(term[:SHORT_PREFIX_LENGTH])
+
+    def _has_prefix(self, scheme_id: int, term: str) -> bool:
+        return " " + term in self.texts[scheme_id]
+
+    def _has_token(self, scheme_id: int, term: str) -> bool:
+        return " " + term + " " in self.texts[scheme_id]
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Top `limit` schemes matching every term of `query` as a token prefix.
+
+        Results are ranked in tiers, each in static rank order: schemes where a term is
+        exactly their Scheme_Code or ISIN, then schemes where every term is a whole token,
+        then the remaining prefix matches. Each tier is scanned from the posting list of
+        its most selective term and stops as soon as `limit` results are found.
+
+        Args:
+            query (str): Free text: words of the scheme name, a Scheme_Code or an ISIN (or prefixes of them).
+            limit (int): Maximum number of results.
+
+        Returns:
+            List[Dict[str, Any]]: Snapshot rows, best match first.
+        """
+        self.queries += 1
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        key = (" ".join(terms), limit)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self.cache_hits += 1
+            self._cache.move_to_end(key)
+            return cached
+
+        found: List[int] = []
+        seen = set()
+
+        def collect(driver, check) -> bool:
+            for scheme_id in driver:
+                if scheme_id not in seen and check(scheme_id):
+                    seen.add(scheme_id)
+                    found.append(scheme_id)
+                    if len(found) >= limit:
+                        return True
+            return False
+
+        prefix_match = lambda scheme_id: all(self._has_prefix(scheme_id, term) for term in terms)
+        done = any(collect(self.identifier_postings.get(term, ()), prefix_match) for term in terms)
+        if not done:
+            done = collect(
+                min((self._token_postings(term) for term in terms), key=len),
+                lambda scheme_id: all(self._has_token(scheme_id, term) for term in terms),
+            )
+        if not done:
+            collect(min((self._prefix_postings(term) for term in terms), key=lambda item: item[0])[1], prefix_match)
+
+        results = [self.schemes[scheme_id] for scheme_id in found]
+        self._cache[key] = results
+        if len(self._cache) > QUERY_CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "schemes": len(self.schemes),
+            "tokens": len(self.vocabulary),
+            "short_prefixes": len(self.short_postings),
+            "fetched_at": self.fetched_at,
+            "build_duration": self.build_duration,
+            "queries": self.queries,
+            "cache_hits": self.cache_hits,
+        }
+
+
+class SchemeSearch:
+    def __init__(self):
+        """
+        Holder for the search index of the current snapshot; `current` is replaced atomically.
+        """
+        self.current: Optional[SchemeSearchIndex] = None
+
+    async def rebuild(self, snapshot: NavSnapshot) -> None:
+        """
+        NavSnapshotStore listener: index the new snapshot on a worker thread, then swap it in.
+        """
+        index = await asyncio.to_thread(SchemeSearchIndex, snapshot)
+        self.current = index
+        logger.info("Scheme search index: %d schemes, %d tokens in %.2fs", len(index), len(index.vocabulary), index.build_duration)
+
+    def stats(self) -> Dict[str, Any]:
+        return self.current.stats() if self.current is not None else {"schemes": 0}
+
+
+scheme_search = SchemeSearch()
@@ -0,0 +1,206 @@
+# /api/v1/services/snapshot_file.py
+
+"""
+The NAV snapshot as a local binary file, so a restarted worker serves data before its
+first upstream refresh.
+
+Layout (all numbers in the writer's native byte order, recorded in the header):
+
+    MAGIC | u32 header length | header (JSON) | padding to 8 | column data ...
+
+The header lists each field's column: `i` (int64), `d` (float64), or `s` (uint32 ids
+into a shared string table; other values are stored JSON-encoded in the table with type
+`j`). Id 0 is None and id 1 marks a row without the field; the table itself is one
+NUL-separated UTF-8 blob holding every distinct string once, so the fields repeated on
+every row (category, family, date, type) cost four bytes per row.
+
+Reading maps the file, casts each numeric column in place (`memoryview.cast`), splits
+the string table in one call and rebuilds the rows. Writing goes to a temporary file in
+the same directory that replaces the old one with `os.replace`, so readers never see a
+partial file.
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from typing import Any, Dict, List, Tuple
+
+MAGIC = b"MFBNAV\x00\x01"
+_ALIGN = 8
+NONE_ID = 0
+MISSING_ID = 1
+_MISSING = object()
+
+
+class SnapshotFileError(ValueError):
+    """
+    The file is not a snapshot this version can read.
+    """
+
+
+def _column_type(values: List[Any]) -> str:
+    if all(type(value) is int for value in values):
+        return "i"
+    if all(type(value) in (int, float) for value in values):
+        return "d"
+    if all(value is None or value is _MISSING or (type(value) is str and "\0" not in value) for value in values):
+        return "s"
+    return "j"
+
+
+def encode_snapshot(schemes: List[Dict[str, Any]], fetched_at: float) -> bytes:
+    """
+    Serialize scheme rows column-wise.
+
+    Args:
+        schemes (List[Dict[str, Any]]): Snapshot rows (as in `NavSnapshot.by_code`).
+        fetched_at (float): Unix timestamp of the upstream fetch.
+
+    Returns:
+        bytes: The file contents.
+    """
+    fields = list(dict.fromkeys(field for scheme in schemes for field in scheme))
+    string_ids: Dict[str, int] = {}
+    layout: List[Dict[str, Any]] = []
+    columns: List[bytes] = []
+    offset = 0
+
+    def add_column(field: str, kind: str, data: bytes, **extra) -> None:
+        nonlocal offset
+        layout.append({"field": field, "type": kind, "offset": offset, "size": len(data), **extra})
+        columns.append(data)
+        offset += len(data) + -len(data) % _ALIGN
+
+    for field in fields:
+        values = [scheme.get(field, _MISSING) for scheme in schemes]
+        kind = _column_type(values)
+        if kind == "i":
+            add_column(field, kind, array("q", values).tobytes())
+        elif kind == "d":
+            add_column(field, kind, array("d", values).tobytes())
+        else:
+            ids = array("I")
+            for value in values:
+                if value is None:
+                    ids.append(NONE_ID)
+                elif value is _MISSING:
+                    ids.append(MISSING_ID)
+                else:
+                    if kind == "j":
+                        value = json.dumps(value)
+                    ids.append(string_ids.setdefault(value, len(string_ids) + 2))
+            add_column(field, kind, ids.tobytes(), missing=MISSING_ID in ids)
+    add_column("", "strings", "\0".join(string_ids).encode("utf-8"), count=len(string_ids))
+
+    header = json.dumps({
+        "byteorder": sys.byteorder,
+        "fetched_at": fetched_at,
+        "rows": len(schemes),
+        "columns": layout,
+    }).encode("utf-8")
+    start = len(MAGIC) + 4 + len(header)
+    parts = [MAGIC, struct.pack("<I", len(header)), header, b"\0" * (-start % _ALIGN)]
+    for data in columns:
+        parts.append(data)
+        parts.append(b"\0" * (-len(data) % _ALIGN))
+    return b"".join(parts)
+
+
+def decode_snapshot(buffer) -> Tuple[List[Dict[str, Any]], float]:
+    """
+    Rebuild the scheme rows from `encode_snapshot` output (bytes, mmap, memoryview).
+
+    Returns:
+        Tuple[List[Dict[str, Any]], float]: The rows and their `fetched_at`.
+
+    Raises:
+        SnapshotFileError: Wrong magic, byte order or a truncated file.
+    """
+    view = memoryview(buffer)
+    # Views into a mapped file must all be released before it can be unmapped
+    views = [view]
+    try:
+        if bytes(view[:len(MAGIC)]) != MAGIC:
+            raise SnapshotFileError("Not a NAV snapshot file")
+        (header_size,) = struct.unpack_from("<I", view, len(MAGIC))
+        start = len(MAGIC) + 4
+        header = json.loads(bytes(view[start:start + header_size]))
+        if header["byteorder"] != sys.byteorder:
+            raise SnapshotFileError(f"Snapshot written on a {header['byteorder']}-endian machine")
+        base = start + header_size
+        base += -base % _ALIGN
+
+        def column_data(column: Dict[str, Any]) -> memoryview:
+            offset = base + column["offset"]
+            if offset + column["size"] > len(view):
+                raise SnapshotFileError("Truncated NAV snapshot file")
+            views.append(view[offset:offset + column["size"]])
+            return views[-1]
+
+        *columns, strings_column = header["columns"]
+        text = str(column_data(strings_column), "utf-8")
+        table: List[Any] = [None, _MISSING] + (text.split("\0") if strings_column["count"] else [])
+        if len(table) != strings_column["count"] + 2:
+            raise SnapshotFileError("Corrupt string table")
+
+        rows = header["rows"]
+        decoded: List[Tuple[Dict[str, Any], List[Any]]] = []
+        for column in columns:
+            kind = column["type"]
+            views.append(column_data(column).cast({"i": "q", "d": "d"}.get(kind, "I")))
+            if kind in ("i", "d"):
+                values = views[-1].tolist()
+            else:
+                values = list(map(table.__getitem__, views[-1]))
+                if kind == "j":
+                    values = [value if value is None or value is _MISSING else json.loads(value) for value in values]
+            if len(values) != rows:
+                raise SnapshotFileError(f"Column {column['field']!r} has {len(values)} values for {rows} rows")
+            decoded.append((column, values))
+    except (IndexError, KeyError, TypeError, UnicodeDecodeError, json.JSONDecodeError, struct.error) as e:
+        raise SnapshotFileError(f"Corrupt NAV snapshot file: {e!r}") from e
+    finally:
+        for exported in reversed(views):
+            exported.release()
+
+    names = [column["field"] for column, _ in decoded]
+    schemes = [dict(zip(names, row)) for row in zip(*(values for _, values in decoded))] if decoded else []
+    if any(column.get("missing") for column, _ in decoded):
+        schemes = [{k: v for k, v in scheme.items() if v is not _MISSING} for scheme in schemes]
+    return schemes, header["fetched_at"]
+
+
+def write_snapshot_file(path: str, schemes: List[Dict[str, Any]], fetched_at: float) -> int:
+    """
+    Atomically replace `path` with the encoded snapshot. Returns the file size.
+    """
+    data = encode_snapshot(schemes, fetched_at)
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    return len(data)
+
+
+def read_snapshot_file(path: str) -> Tuple[List[Dict[str, Any]], float]:
+    """
+    Map `path` and decode it. Raises FileNotFoundError if there is no snapshot yet.
+    """
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return decode_snapshot(mapped)
@@ -0,0 +1,200 @@
+# /api/v1/services/upstream_scheduler.py
+
+"""
+Quota-aware admission for RapidAPI calls.
+
+Every upstream attempt takes a token from a token bucket sized to the plan's per-second
+limit. When the bucket is empty, callers queue by priority: interactive lookups are
+always served before background work (snapshot refresh, revaluation). The queue is
+bounded, and a caller that cannot get a token within its priority's wait budget is
+rejected up front (or dropped once the budget runs out) instead of holding a request open.
+
+Background jobs mark their calls with `with background_priority(): ...`; everything else
+is interactive.
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from api.v1.config import CONFIG
+from api.v1.services.metrics import Counter, Gauge, Histogram
+from api.v1.services.resilience import UpstreamUnavailable
+
+INTERACTIVE = 0
+BACKGROUND = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+_priority: ContextVar[int] = ContextVar("upstream_priority", default=INTERACTIVE)
+
+QUEUE_WAIT_SECONDS = Histogram(
+    "upstream_queue_wait_seconds", "Time RapidAPI calls waited for a rate-limit token, by priority.", ("priority",),
+)
+REJECTED = Counter(
+    "upstream_scheduler_rejected", "RapidAPI calls rejected by the scheduler, by priority and reason.",
+    ("priority", "reason"),
+)
+
+
+class QuotaExceeded(UpstreamUnavailable):
+    """
+    The call could not be admitted within its wait budget (or the queue is full).
+    """
+
+
+@contextmanager
+def background_priority():
+    """
+    Run upstream calls made inside the block (and tasks created in it) at background priority.
+    """
+    token = _priority.set(BACKGROUND)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class UpstreamScheduler:
+    def __init__(self, rate: float, burst: int, max_queue: int, max_wait: Dict[int, float]):
+        """
+        Token bucket with a bounded priority queue in front.
+
+        Args:
+            rate (float): Tokens added per second (the plan's requests/second). 0 disables limiting.
+            burst (int): Bucket capacity, i.e. calls allowed back to back after an idle period.
+            max_queue (int): Callers allowed to wait at once; further callers are rejected.
+            max_wait (Dict[int, float]): Longest wait for a token, per priority class.
+
+        Returns:
+            None
+        """
+        self.rate = rate
+        self.burst = burst
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._queue: List[tuple] = []  # (priority, seq, future)
+        self._waiting = {INTERACTIVE: 0, BACKGROUND: 0}
+        self._seq = itertools.count()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self.admitted = 0
+        self.rejected = 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _expected_wait(self, priority: int) -> float:
+        # Everyone of the same or higher priority already queued is served first
+        ahead = sum(count for p, count in self._waiting.items() if p <= priority)
+        return max(0.0, (ahead + 1 - self._tokens) / self.rate)
+
+    def _reject(self, priority: int, reason: str, retry_after: float) -> QuotaExceeded:
+        self.rejected += 1
+        REJECTED.labels(PRIORITY_NAMES[priority], reason).inc()
+        return QuotaExceeded(f"Upstream request quota exceeded ({reason})", retry_after)
+
+    async def acquire(self, priority: int = None) -> None:
+        """
+        Wait for a token at `priority` (default: the caller's context priority).
+
+        Raises:
+            QuotaExceeded: The queue is full, or no token is available within the wait budget.
+        """
+        if self.rate <= 0:
+            return
+        priority = _priority.get() if priority is None else priority
+        name = PRIORITY_NAMES[priority]
+        self._refill()
+        if not self.queued() and self._tokens >= 1:
+            self._tokens -= 1
+            self.admitted += 1
+            QUEUE_WAIT_SECONDS.labels(name).observe(0.0)
+            return
+
+        max_wait = self.max_wait[priority]
+        expected_wait = self._expected_wait(priority)
+        if self.queued() >= self.max_queue:
+            raise self._reject(priority, "queue_full", expected_wait)
+        if expected_wait > max_wait:
+            raise self._reject(priority, "deadline", expected_wait)
+
+        start = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._seq), future))
+        self._waiting[priority] += 1
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.ensure_future(self._dispatch())
+        try:
+            async with asyncio.timeout(max_wait):
+                await future
+        except TimeoutError:
+            # The dispatcher may have handed us a token just as the wait ran out: use it
+            if not (future.done() and not future.cancelled()):
+                raise self._reject(priority, "deadline", self._expected_wait(priority))
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted, but the caller is gone: put the token back in the bucket
+                self._refill()
+                self._tokens = min(self.burst, self._tokens + 1)
+            raise
+        finally:
+            # A timeout or cancellation also cancels `future` itself, so test for the grant,
+            # not for `done()`: the dispatcher only counts down waiters it granted
+            if future.cancelled() or not future.done():
+                future.cancel()  # the dispatcher skips it
+                self._waiting[priority] -= 1
+        self.admitted += 1
+        QUEUE_WAIT_SECONDS.labels(name).observe(time.monotonic() - start)
+
+    async def _dispatch(self) -> None:
+        """
+        Hand out tokens to queued callers in priority order as the bucket refills.
+        """
+        while self._queue:
+            self._refill()
+            while self._queue and self._tokens >= 1:
+                priority, _, future = heapq.heappop(self._queue)
+                if future.done():
+                    continue  # gave up waiting
+                self._waiting[priority] -= 1
+                self._tokens -= 1
+                future.set_result(None)
+            if self._queue:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def queued(self) -> int:
+        return sum(self._waiting.values())
+
+    def stats(self) -> Dict[str, Any]:
+        self._refill()
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "tokens": self._tokens,
+            "queued": {PRIORITY_NAMES[p]: count for p, count in self._waiting.items()},
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
+
+
+scheduler = UpstreamScheduler(
+    CONFIG['RAPID_RATE_LIMIT_PER_SECOND'],
+    CONFIG['RAPID_RATE_LIMIT_BURST'],
+    CONFIG['RAPID_QUEUE_MAX'],
+    {
+        INTERACTIVE: CONFIG['RAPID_QUEUE_MAX_WAIT_INTERACTIVE'],
+        BACKGROUND: CONFIG['RAPID_QUEUE_MAX_WAIT_BACKGROUND'],
+    },
+)
+
+Gauge(
+    "upstream_queue_depth", "RapidAPI calls waiting for a rate-limit token, by priority.", ("priority",),
+    function=lambda: {(PRIORITY_NAMES[p],): count for p, count in scheduler._waiting.items()},
+)
@@ -0,0 +1,124 @@
+# /benchmarks/bench_buy_concurrency.py
+
+"""
+Concurrency stress test for POST /buy: atomic upsert vs. the old find-then-write path.
+
+Fires `--buys` parallel purchases of the same scheme for each of `--users` users and
+checks the final state (one document per user, units == buys * units_per_buy), then
+reports p50/p99 latency. The legacy path (find_one, then update_one or insert_one) is
+replayed directly against the same collection for comparison.
+
+    MONGO_URL=mongodb://localhost:27017 python -m benchmarks.bench_buy_concurrency --users 20 --buys 50
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret")
+# Everything the app writes (purchases, portfolio summaries, ...) goes to a scratch database
+os.environ["MONGO_DB_NAME"] = "mfb_bench"
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from api.v1.auth.auth_security import AuthSecurity  # noqa: E402
+from api.v1.config import CONFIG  # noqa: E402
+from api.v1.funds import fund_routes  # noqa: E402
+from api.v1.services.mongo import MongoDB  # noqa: E402
+
+SCHEME = {
+    "Scheme_Code": 119551,
+    "Scheme_Name": "Aditya Birla Sun Life Banking & PSU Debt Fund  - DIRECT - IDCW",
+    "Date": "14-Jan-2025",
+    "Scheme_Category": "Debt Scheme - Banking and PSU Fund",
+    "Mutual_Fund_Family": "Aditya Birla Sun Life Mutual Fund",
+    "nav": 102.5067,
+    "ISIN_Div_Payout_ISIN_Growth": "INF209KA12Z1",
+    "ISIN_Div_Reinvestment": "INF209KA13Z9",
+}
+UNITS_PER_BUY = 3
+
+
+async def legacy_buy(mongo, db, collection, email):
+    # The pre-upsert implementation, two round trips and no atomicity
+    existing = await mongo.find_one(db, collection, {"email": email, "Scheme_Code": SCHEME["Scheme_Code"]})
+    if existing:
+        units = existing["units"] + UNITS_PER_BUY
+        await mongo.update_one(db, collection, {"_id": existing["_id"]}, {
+            "units": units, "Net_Asset_Value": SCHEME["nav"], "total_cost": units * SCHEME["nav"],
+            "last_updated": datetime.now(timezone.utc),
+        })
+    else:
+        await mongo.insert_one(db, collection, {
+            "email": email, **SCHEME, "Net_Asset_Value": SCHEME["nav"], "units": UNITS_PER_BUY,
+            "total_cost": UNITS_PER_BUY * SCHEME["nav"], "purchase_date": datetime.now(timezone.utc),
+        })
+
+
+def report(label, latencies, docs, args):
+    latencies.sort()
+    expected = args.buys * UNITS_PER_BUY
+    wrong = sum(1 for doc_units in docs.values() if doc_units != [expected])
+    print(
+        f"{label:<16} p50={latencies[len(latencies) // 2] * 1000:7.2f}ms  "
+        f"p99={latencies[int(len(latencies) * 0.99) - 1] * 1000:7.2f}ms  "
+        f"users_with_wrong_state={wrong}/{args.users}"
+    )
+
+
+async def collect(mongo, db, collection):
+    docs = {}
+    for doc in await mongo.find_all(db, collection, {"Scheme_Code": SCHEME["Scheme_Code"]}):
+        docs.setdefault(doc["email"], []).append(doc["units"])
+    return docs
+
+
+async def main(args):
+    mongo = MongoDB(args.mongo_url)
+    db = CONFIG['MONGO_DB_NAME']
+    collection = fund_routes.collection_name = "purchases_bench"
+    await mongo.client.drop_database(db)
+
+    # Legacy path first (no unique index, so races show up as duplicates or lost units)
+    latencies = []
+
+    async def timed(coro):
+        start = time.perf_counter()
+        await coro
+        latencies.append(time.perf_counter() - start)
+
+    emails = [f"bench{i}@example.com" for i in range(args.users)]
+    await asyncio.gather(*(
+        timed(legacy_buy(mongo, db, collection, email)) for email in emails for _ in range(args.buys)
+    ))
+    report("legacy", latencies, await collect(mongo, db, collection), args)
+
+    await mongo.get_collection(db, collection).drop()
+    await mongo.create_index(db, collection, [("email", 1), ("Scheme_Code", 1)], unique=True)
+    app = FastAPI()
+    app.include_router(fund_routes.router)
+    app.state.mongo = mongo
+    latencies = []
+    body = {**SCHEME, "units": UNITS_PER_BUY}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def buy(email):
+            token = AuthSecurity.create_access_token({"email": email})
+            response = await client.post("/buy", json=body, headers={"Authorization": f"Bearer {token}"})
+            response.raise_for_status()
+
+        await asyncio.gather(*(timed(buy(email)) for email in emails for _ in range(args.buys)))
+    report("atomic upsert", latencies, await collect(mongo, db, collection), args)
+    await mongo.client.drop_database(db)
+    mongo.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo-url", default=os.getenv("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--buys", type=int, default=50, help="Parallel buys per user")
+    asyncio.run(main(parser.parse_args()))
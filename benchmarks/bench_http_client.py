@@ -0,0 +1,82 @@
+# /benchmarks/bench_http_client.py
+
+"""
+Per-call `httpx.AsyncClient` vs. the shared pooled client in `RapidAPIService`.
+
+Starts the local fake RapidAPI server with a simulated handshake delay and times
+sequential and concurrent `fetch_oes_schemes` calls both ways.
+
+    python -m benchmarks.bench_http_client --requests 200 --handshake-delay 0.03
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+from api.v1.config import CONFIG  # noqa: E402
+from api.v1.services.rapidapi_mutfund import RapidAPIService  # noqa: E402
+from benchmarks.fake_rapidapi import FakeRapidAPI  # noqa: E402
+
+
+async def per_call_client(scheme_code):
+    # The pre-pooling behaviour: a fresh client (and connection) per call
+    url = f"{CONFIG['RAPID_URL']}/latest?Scheme_Type=Open&Scheme_Code={scheme_code}"
+    async with httpx.AsyncClient() as client:
+        response = await client.get(url)
+        response.raise_for_status()
+        return response.json()
+
+
+async def shared_client(scheme_code):
+    return await RapidAPIService.fetch_oes_schemes(scheme_code)
+
+
+async def run(label, fn, server, n, concurrency):
+    server.connections = 0
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            start = time.perf_counter()
+            await fn(119551)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(n)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    print(
+        f"{label:<22} c={concurrency:<3} total={elapsed:7.3f}s  "
+        f"mean={statistics.mean(latencies) * 1000:7.2f}ms  "
+        f"p50={latencies[len(latencies) // 2] * 1000:7.2f}ms  "
+        f"p99={latencies[int(len(latencies) * 0.99) - 1] * 1000:7.2f}ms  "
+        f"connections={server.connections}"
+    )
+
+
+async def main(args):
+    server = FakeRapidAPI(handshake_delay=args.handshake_delay)
+    CONFIG['RAPID_URL'] = await server.start()
+    await RapidAPIService.startup()
+    try:
+        for concurrency in (1, args.concurrency):
+            await run("per-call client", per_call_client, server, args.requests, concurrency)
+            await run("shared pooled client", shared_client, server, args.requests, concurrency)
+    finally:
+        await RapidAPIService.shutdown()
+        await server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--handshake-delay", type=float, default=0.03)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,106 @@
+# /benchmarks/bench_json_encoding.py
+
+"""
+Encode time and allocations for large scheme and portfolio payloads.
+
+Payloads are generated from the recorded `response_data.json` rows: `--schemes` scheme
+dicts (as /fund_schemes/latest/open_ended returns them) and `--holdings` portfolio rows
+with datetime fields. Compares:
+  * jsonable_encoder + stdlib json (FastAPI's default path, with isoformat() pre-pass
+    for the portfolio as the handler used to do)
+  * fast_json in "std" mode
+  * fast_json in "orjson" mode
+
+    python -m benchmarks.bench_json_encoding --schemes 5000 --holdings 2000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from api.v1.services import fast_json  # noqa: E402
+from benchmarks.fake_rapidapi import load_fixture  # noqa: E402
+
+
+def scheme_payload(n):
+    rows = load_fixture()
+    return {"status": "success", "data": [
+        {**rows[i % len(rows)], "Scheme_Code": 100000 + i, "Net_Asset_Value": 10 + i * 0.0137}
+        for i in range(n)
+    ]}
+
+
+def portfolio_payload(n):
+    rows = load_fixture()
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return {"status": "success", "portfolio": [
+        {
+            "_id": f"{i:024x}", "email": "user@example.com", **{k: rows[i % len(rows)][k] for k in (
+                "Scheme_Code", "Scheme_Name", "Date", "Scheme_Category",
+                "ISIN_Div_Payout_ISIN_Growth", "ISIN_Div_Reinvestment")},
+            "units": 1 + i % 40, "Net_Asset_Value": 10 + i * 0.0137, "total_cost": (1 + i % 40) * (10 + i * 0.0137),
+            "purchase_date": now - timedelta(days=i % 900), "last_updated": now,
+        }
+        for i in range(n)
+    ]}
+
+
+def legacy_encode(content):
+    # FastAPI default: jsonable_encoder walk, then JSONResponse's json.dumps
+    if "portfolio" in content:
+        content = {**content, "portfolio": [
+            {**row, "purchase_date": row["purchase_date"].isoformat(), "last_updated": row["last_updated"].isoformat()}
+            for row in content["portfolio"]
+        ]}
+    return json.dumps(jsonable_encoder(content), ensure_ascii=False, allow_nan=False,
+                      indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def fast_encode(mode):
+    def encode(content):
+        fast_json.JSON_MODE = mode
+        return fast_json.dumps(content)
+    return encode
+
+
+def measure(label, encode, payload, repeat):
+    encode(payload)  # warm up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        body = encode(payload)
+    elapsed = (time.perf_counter() - start) / repeat
+    tracemalloc.start()
+    encode(payload)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:<28} {elapsed * 1000:9.2f}ms  peak_alloc={peak / 1024:9.0f}KiB  body={len(body) / 1024:7.0f}KiB")
+
+
+def main(args):
+    encoders = [
+        ("jsonable_encoder + json", legacy_encode),
+        ("fast_json std", fast_encode("std")),
+        ("fast_json orjson", fast_encode("orjson")),
+    ]
+    for name, payload in (
+        (f"schemes x{args.schemes}", scheme_payload(args.schemes)),
+        (f"portfolio x{args.holdings}", portfolio_payload(args.holdings)),
+    ):
+        print(name)
+        for label, encode in encoders:
+            measure(label, encode, payload, args.repeat)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--schemes", type=int, default=5000)
+    parser.add_argument("--holdings", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=10)
+    main(parser.parse_args())
@@ -0,0 +1,89 @@
+# /benchmarks/bench_login_storm.py
+
+"""
+Event-loop health during a login storm: inline bcrypt vs. the bcrypt thread pool.
+
+Fires `--logins` concurrent password verifications through an in-process app while a
+probe polls a cheap endpoint (standing in for the health check and cached portfolio
+reads) every 10 ms. Reports probe latency for both modes; with inline bcrypt every
+probe waits behind the hashes queued ahead of it.
+
+    python -m benchmarks.bench_login_storm --logins 40
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from api.v1.auth.auth_security import AuthSecurity  # noqa: E402
+
+PASSWORD = "Benchmark123"
+HASHED = AuthSecurity.hash_password(PASSWORD)
+
+app = FastAPI()
+
+
+@app.get("/")
+async def health_check():
+    return {"message": "ok"}
+
+
+@app.post("/login/inline")
+async def login_inline():
+    # Pre-offload behaviour: bcrypt on the event loop
+    return {"ok": AuthSecurity.verify_password(PASSWORD, HASHED)}
+
+
+@app.post("/login/offloaded")
+async def login_offloaded():
+    return {"ok": await AuthSecurity.verify_password_async(PASSWORD, HASHED)}
+
+
+async def storm(client, path, logins):
+    probes = []
+    done = asyncio.Event()
+
+    async def probe():
+        # Latency is measured from when the probe was due, so time spent waiting for a
+        # blocked event loop counts against it
+        due = time.perf_counter()
+        while True:
+            await client.get("/")
+            probes.append(time.perf_counter() - due)
+            if done.is_set():
+                break
+            due = time.perf_counter() + 0.01
+            await asyncio.sleep(0.01)
+
+    probe_task = asyncio.create_task(probe())
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await asyncio.gather(*(client.post(path) for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await probe_task
+    probes.sort()
+    print(
+        f"{path:<18} logins={logins:<4} storm={elapsed:6.2f}s  health probes={len(probes):<4} "
+        f"p50={statistics.median(probes) * 1000:8.2f}ms  max={probes[-1] * 1000:8.2f}ms  "
+        f"queue_depth_after={AuthSecurity.hash_pool_stats()['queue_depth']}"
+    )
+
+
+async def main(args):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        await storm(client, "/login/inline", args.logins)
+        await storm(client, "/login/offloaded", args.logins)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=40)
+    asyncio.run(main(parser.parse_args()))
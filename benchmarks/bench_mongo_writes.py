@@ -0,0 +1,81 @@
+# /benchmarks/bench_mongo_writes.py
+
+"""
+Per-document `update_one` loop vs. the batch primitives on `MongoDB`.
+
+Seeds N purchase-shaped documents into a scratch collection and times the same
+revaluation (set NAV, recompute total_cost) as:
+  * the old loop: one `update_one` round trip per document
+  * `bulk_write` of `UpdateOne` models (unordered, chunked)
+  * one `update_many` per scheme with a pipeline update
+
+    MONGO_URL=mongodb://localhost:27017 python -m benchmarks.bench_mongo_writes --docs 5000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bson import ObjectId  # noqa: E402
+from pymongo import UpdateOne  # noqa: E402
+from api.v1.services.mongo import MongoDB  # noqa: E402
+
+DB_NAME = "mfb_bench"
+COLLECTION = "purchases_bench"
+
+
+async def seed(mongo: MongoDB, docs: int, schemes: int):
+    await mongo.get_collection(DB_NAME, COLLECTION).drop()
+    await mongo.insert_many(DB_NAME, COLLECTION, [
+        {"email": f"user{i}@example.com", "Scheme_Code": 100000 + i % schemes, "units": 1 + i % 50,
+         "Net_Asset_Value": 10.0, "total_cost": 10.0 * (1 + i % 50)}
+        for i in range(docs)
+    ])
+    return await mongo.find_all(DB_NAME, COLLECTION)
+
+
+async def per_document_loop(mongo, documents, nav):
+    for doc in documents:
+        await mongo.update_one(DB_NAME, COLLECTION, {"_id": doc["_id"]},
+                               {"Net_Asset_Value": nav, "total_cost": nav * doc["units"]})
+
+
+async def bulk_update_one(mongo, documents, nav):
+    await mongo.bulk_write(DB_NAME, COLLECTION, [
+        UpdateOne({"_id": ObjectId(doc["_id"])}, {"$set": {"Net_Asset_Value": nav, "total_cost": nav * doc["units"]}})
+        for doc in documents
+    ])
+
+
+async def update_many_per_scheme(mongo, documents, nav):
+    for code in {doc["Scheme_Code"] for doc in documents}:
+        await mongo.update_many(DB_NAME, COLLECTION, {"Scheme_Code": code},
+                                [{"$set": {"Net_Asset_Value": nav, "total_cost": {"$multiply": ["$units", nav]}}}])
+
+
+async def main(args):
+    mongo = MongoDB(args.mongo_url)
+    documents = await seed(mongo, args.docs, args.schemes)
+    for i, (label, fn) in enumerate((
+        ("update_one loop", per_document_loop),
+        ("bulk_write(UpdateOne)", bulk_update_one),
+        ("update_many per scheme", update_many_per_scheme),
+    )):
+        start = time.perf_counter()
+        await fn(mongo, documents, 11.0 + i)
+        elapsed = time.perf_counter() - start
+        print(f"{label:<24} docs={args.docs:<7} {elapsed * 1000:9.1f}ms  {args.docs / elapsed:10.0f} docs/s")
+    await mongo.get_collection(DB_NAME, COLLECTION).drop()
+    mongo.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo-url", default=os.getenv("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--docs", type=int, default=5000)
+    parser.add_argument("--schemes", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
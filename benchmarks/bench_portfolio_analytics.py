@@ -0,0 +1,69 @@
+# /benchmarks/bench_portfolio_analytics.py
+
+"""
+Time GET /portfolio/analytics' computation for portfolios of 10, 1,000 and 100,000 holdings.
+
+Purchase documents are generated from the recorded `response_data.json` rows (random
+units, purchase dates over the last five years and NAV drift). For each size it times
+column extraction and the analytics over the columns.
+
+    python -m benchmarks.bench_portfolio_analytics --sizes 10 1000 100000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.v1.portfolio import analytics  # noqa: E402
+from benchmarks.fake_rapidapi import generate_schemes  # noqa: E402
+
+
+def purchases(count, seed=3):
+    rng = random.Random(seed)
+    schemes = generate_schemes(count)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    documents = []
+    for scheme in schemes:
+        units = rng.randint(1, 500)
+        bought_at = scheme["Net_Asset_Value"] / rng.uniform(0.7, 1.6)
+        documents.append({
+            "Scheme_Code": scheme["Scheme_Code"],
+            "Scheme_Category": scheme["Scheme_Category"],
+            "Mutual_Fund_Family": scheme["Mutual_Fund_Family"],
+            "units": units,
+            "Net_Asset_Value": bought_at,
+            "total_cost": units * bought_at,
+            "invested_amount": units * bought_at,
+            "purchase_date": now - timedelta(days=rng.randint(1, 5 * 365)),
+        })
+    navs = {scheme["Scheme_Code"]: scheme["Net_Asset_Value"] for scheme in schemes}
+    return documents, navs
+
+
+def best_of(repeat, fn):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    now = datetime.now(timezone.utc)
+    print(f"{'holdings':>9} {'columns':>10} {'analytics':>10}  xirr%")
+    for size in args.sizes:
+        documents, navs = purchases(size)
+        extract, columns = best_of(args.repeat, lambda: analytics.holdings_columns(documents, navs.get, now))
+        analytics_time, result = best_of(args.repeat, lambda: analytics.compute_analytics(columns))
+        print(f"{size:>9} {extract * 1000:8.2f}ms {analytics_time * 1000:8.2f}ms  {result['xirr_percent']}")
@@ -0,0 +1,70 @@
+# /benchmarks/bench_scheme_search.py
+
+"""
+Time building the scheme search index and answering typeahead queries against it.
+
+Schemes are generated from the recorded `response_data.json` rows. Each query is timed
+uncached (the per-index query cache is cleared before every run) as it would be typed,
+one keystroke at a time, and the slowest keystroke is reported alongside the median.
+
+    python -m benchmarks.bench_scheme_search --schemes 15000
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.v1.services.nav_snapshot import NavSnapshot  # noqa: E402
+from api.v1.services.scheme_search import SchemeSearchIndex  # noqa: E402
+from benchmarks.fake_rapidapi import generate_schemes  # noqa: E402
+
+QUERIES = [
+    "benchmark 17 growth",
+    "bench 3 sch 99",
+    "scheme 12345",
+    "mutual fund idcw",
+    "INF209KA12Z1",
+    "119551",
+    "mutual",
+]
+
+
+def keystrokes(query):
+    return [query[:i] for i in range(1, len(query) + 1)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--schemes", type=int, default=15000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    snapshot = NavSnapshot(generate_schemes(args.schemes), time.time())
+    start = time.perf_counter()
+    index = SchemeSearchIndex(snapshot)
+    print(f"index: {len(index)} schemes, {len(index.vocabulary)} tokens, {len(index.short_postings)} short prefixes, "
+          f"built in {(time.perf_counter() - start) * 1000:.0f}ms")
+
+    print(f"{'query':<34} {'median':>9} {'slowest':>9}  top result")
+    for query in QUERIES:
+        timings = []
+        for prefix in keystrokes(query):
+            best = float("inf")
+            for _ in range(args.repeat):
+                index._cache.clear()
+                started = time.perf_counter()
+                results = index.search(prefix, args.limit)
+                best = min(best, time.perf_counter() - started)
+            timings.append(best)
+        top = results[0]["Scheme_Name"] if results else "-"
+        print(f"{query:<34} {statistics.median(timings) * 1e6:7.0f}us {max(timings) * 1e6:7.0f}us  {top[:60]}")
+
+    started = time.perf_counter()
+    for _ in range(1000):
+        index.search("benchmark 17 growth", args.limit)
+    print(f"cached query: {(time.perf_counter() - started) * 1000:.0f}us")
@@ -0,0 +1,136 @@
+# /benchmarks/fake_rapidapi.py
+
+"""
+Local stand-in for the RapidAPI `/latest` endpoint, used by the benchmarks.
+
+Serves schemes from the recorded `response_data.json` fixture over plain HTTP/1.1 with
+keep-alive. `handshake_delay` is paid once per new TCP connection to model the extra
+round trips of a real TCP+TLS handshake to RapidAPI.
+
+`generate_schemes` scales the fixture up to a realistic dataset size: rows are cloned
+across synthetic fund families with unique Scheme_Codes and jittered NAVs.
+
+Run standalone:
+    python -m benchmarks.fake_rapidapi --port 8900 --handshake-delay 0.05 --schemes 15000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import urllib.parse
+
+FIXTURE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "response_data.json")
+
+
+def load_fixture():
+    with open(FIXTURE_PATH, "r") as f:
+        return json.load(f)["data"]
+
+
+def generate_schemes(count: int, families: int = 40, seed: int = 7):
+    """
+    Build `count` scheme rows from the fixture, spread over `families` fund families.
+    """
+    rng = random.Random(seed)
+    rows = load_fixture()
+    schemes = []
+    for i in range(count):
+        row = dict(rows[i % len(rows)])
+        family = i % families
+        row["Scheme_Code"] = 100000 + i
+        row["Mutual_Fund_Family"] = rows[0]["Mutual_Fund_Family"] if family == 0 else f"Benchmark {family} Mutual Fund"
+        row["Scheme_Name"] = f"{row['Mutual_Fund_Family']} Scheme {i} - {'Growth' if i % 3 else 'IDCW'}"
+        row["Net_Asset_Value"] = round(row["Net_Asset_Value"] * rng.uniform(0.2, 5.0), 4)
+        schemes.append(row)
+    return schemes
+
+
+class FakeRapidAPI:
+    def __init__(self, schemes=None, handshake_delay: float = 0.0, latency: float = 0.0):
+        self.schemes = schemes if schemes is not None else load_fixture()
+        self.handshake_delay = handshake_delay
+        self.latency = latency
+        self.connections = 0
+        self.requests = 0
+        self._bodies = {}
+        self._server = None
+
+    def _body(self, query: str) -> bytes:
+        # Responses are encoded once per distinct query so the stand-in never becomes the bottleneck
+        body = self._bodies.get(query)
+        if body is None:
+            params = urllib.parse.parse_qs(query)
+            schemes = self.schemes
+            if "Scheme_Code" in params:
+                code = int(params["Scheme_Code"][0])
+                schemes = [s for s in schemes if s["Scheme_Code"] == code]
+            if "Mutual_Fund_Family" in params:
+                family = params["Mutual_Fund_Family"][0]
+                schemes = [s for s in schemes if s["Mutual_Fund_Family"] == family]
+            body = self._bodies[query] = json.dumps(schemes).encode()
+        return body
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        if self.handshake_delay:
+            await asyncio.sleep(self.handshake_delay)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                # Drain headers
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                self.requests += 1
+                _, target, _ = request_line.decode().split(" ", 2)
+                parsed = urllib.parse.urlsplit(target)
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                if parsed.path.endswith("/latest"):
+                    status, body = "200 OK", self._body(parsed.query)
+                else:
+                    status, body = "404 Not Found", b'{"message": "not found"}'
+                writer.write(
+                    f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\nConnection: keep-alive\r\n\r\n".encode() + body
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """
+        Start listening and return the base URL to use as RAPID_URL.
+        """
+        self._server = await asyncio.start_server(self._handle, host, port)
+        bound_port = self._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{bound_port}"
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+
+async def _serve(args):
+    schemes = generate_schemes(args.schemes) if args.schemes else None
+    server = FakeRapidAPI(schemes, handshake_delay=args.handshake_delay, latency=args.latency)
+    url = await server.start(args.host, args.port)
+    print(f"Fake RapidAPI listening on {url}")
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--handshake-delay", type=float, default=0.0, help="Seconds added to every new connection")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every request")
+    parser.add_argument("--schemes", type=int, default=0, help="Generate this many schemes (default: fixture rows)")
+    asyncio.run(_serve(parser.parse_args()))
@@ -0,0 +1,241 @@
+# /benchmarks/harness.py
+
+"""
+Offline end-to-end benchmark harness.
+
+Starts a local fake RapidAPI `/latest` (generated at scale from `response_data.json`,
+with configurable latency) and the real app under uvicorn in a subprocess, pointed at
+either an in-memory Mongo stand-in or a scratch MongoDB server. Then drives
+/auth/login, /fund_schemes/latest/open_ended, /buy and /portfolio at a fixed concurrency
+and reports throughput and p50/p95/p99 latency per endpoint.
+
+Results are written as JSON tagged with the git commit, so runs can be compared:
+
+    python -m benchmarks.harness --in-memory-mongo --output before.json
+    git checkout <other commit>
+    python -m benchmarks.harness --in-memory-mongo --output after.json --compare before.json
+
+With --mongo-url the app writes to (and the harness leaves behind) an `mfb_bench` database,
+never the app's own.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import secrets
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import httpx  # noqa: E402
+from benchmarks.fake_rapidapi import FakeRapidAPI, generate_schemes  # noqa: E402
+
+PASSWORD = "Benchmark123"
+# GET /stats is only served with the app's INTERNAL_ENDPOINTS_TOKEN
+STATS_TOKEN = secrets.token_urlsafe(16)
+STATS_HEADERS = {"Authorization": f"Bearer {STATS_TOKEN}"}
+SCENARIOS = ("login", "schemes", "buy", "portfolio")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+async def wait_for_app(client: httpx.AsyncClient, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            stats = (await client.get("/stats", headers=STATS_HEADERS)).json()
+            if stats["nav_snapshot"]["loaded"]:
+                return stats
+        except (httpx.TransportError, KeyError, ValueError):
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("App did not become ready (is the NAV snapshot loading?)")
+
+
+async def drive(name, make_request, requests, concurrency):
+    latencies = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            try:
+                response = await make_request(i)
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    result = {
+        "requests": requests,
+        "errors": errors,
+        "throughput": requests / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+    print(
+        f"{name:<10} {result['throughput']:9.1f} req/s  p50={result['p50_ms']:8.2f}ms  "
+        f"p95={result['p95_ms']:8.2f}ms  p99={result['p99_ms']:8.2f}ms  errors={errors}"
+    )
+    return result
+
+
+async def run(args, base_url):
+    rng = random.Random(args.seed)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        await wait_for_app(client)
+
+        emails = [f"bench{i}@example.com" for i in range(args.users)]
+        tokens = []
+        for email in emails:
+            await client.post("/v1/auth/register", json={"email": email, "password": PASSWORD})
+            login = await client.post("/v1/auth/login", json={"email": email, "password": PASSWORD})
+            login.raise_for_status()
+            tokens.append({"Authorization": f"Bearer {login.json()['access_token']}"})
+
+        families = (await client.get("/v1/fund_families", headers=tokens[0])).json()["fund_families"]
+        schemes = generate_schemes(args.schemes)
+
+        def login_request(i):
+            return client.post("/v1/auth/login", json={"email": emails[i % len(emails)], "password": PASSWORD})
+
+        def schemes_request(i):
+            return client.post("/v1/fund_schemes/latest/open_ended", headers=tokens[i % len(tokens)],
+                               json={"fund_family": rng.choice(families)})
+
+        def buy_request(i):
+            scheme = rng.choice(schemes[:args.held_schemes])
+            return client.post("/v1/buy", headers=tokens[i % len(tokens)], json={
+                **{k: scheme[k] for k in ("Scheme_Code", "Scheme_Name", "Date", "Scheme_Category",
+                                          "Mutual_Fund_Family", "ISIN_Div_Payout_ISIN_Growth",
+                                          "ISIN_Div_Reinvestment")},
+                "nav": scheme["Net_Asset_Value"], "units": 1 + i % 10,
+            })
+
+        def portfolio_request(i):
+            return client.get("/v1/portfolio", headers=tokens[i % len(tokens)])
+
+        # every user holds at least one scheme, otherwise /portfolio answers 404
+        for i in range(len(tokens)):
+            (await buy_request(i)).raise_for_status()
+
+        makers = {"login": login_request, "schemes": schemes_request, "buy": buy_request, "portfolio": portfolio_request}
+        results = {}
+        for name in args.scenarios:
+            # bcrypt makes logins orders of magnitude slower; keep that scenario short
+            requests = args.login_requests if name == "login" else args.requests
+            results[name] = await drive(name, makers[name], requests, args.concurrency)
+        results["_app_stats"] = (await client.get("/stats", headers=STATS_HEADERS)).json()
+        return results
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nvs {baseline_path} (commit {baseline.get('commit')}):")
+    for name in SCENARIOS:
+        new, old = results["scenarios"].get(name), baseline["scenarios"].get(name)
+        if not new or not old:
+            continue
+        deltas = "  ".join(
+            f"{metric}={(new[metric] - old[metric]) / old[metric] * 100:+6.1f}%"
+            for metric in ("throughput", "p50_ms", "p95_ms", "p99_ms") if old[metric]
+        )
+        print(f"{name:<10} {deltas}")
+
+
+async def main(args):
+    fake = FakeRapidAPI(generate_schemes(args.schemes), latency=args.upstream_latency)
+    rapid_url = await fake.start()
+    port = free_port()
+    env = {
+        **os.environ,
+        "RAPID_URL": rapid_url,
+        "RAPID_MUT_FUND_KEY": "benchmark",
+        "JWT_SECRET_KEY": os.environ.get("JWT_SECRET_KEY", "benchmark-secret-key-with-32-bytes!!"),
+        "MONGO_URL": args.mongo_url or "mongodb://in-memory",
+        "MONGO_DB_NAME": "mfb_bench",
+        "INTERNAL_ENDPOINTS_TOKEN": STATS_TOKEN,
+        # Always load the generated dataset from the fake upstream, never a snapshot file of an earlier run
+        "NAV_SNAPSHOT_PATH": "",
+    }
+    command = [sys.executable, "-m", "benchmarks.serve_app", "--port", str(port)]
+    if not args.mongo_url:
+        command.append("--in-memory-mongo")
+    app_process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL)
+    try:
+        print(f"commit={git_commit()} schemes={args.schemes} concurrency={args.concurrency} "
+              f"upstream_latency={args.upstream_latency}s mongo={'in-memory' if not args.mongo_url else args.mongo_url}")
+        scenario_results = await run(args, f"http://127.0.0.1:{port}")
+    finally:
+        app_process.terminate()
+        app_process.wait(timeout=30)
+        await fake.stop()
+
+    app_stats = scenario_results.pop("_app_stats")
+    results = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "params": vars(args),
+        "upstream_requests": fake.requests,
+        "scenarios": scenario_results,
+        "app_stats": app_stats,
+    }
+    print(f"upstream requests: {fake.requests}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--schemes", type=int, default=15000, help="Size of the fake /latest dataset")
+    parser.add_argument("--upstream-latency", type=float, default=0.05, help="Seconds added per upstream request")
+    parser.add_argument("--mongo-url", default=None, help="Scratch MongoDB server (default: in-memory stand-in)")
+    parser.add_argument("--in-memory-mongo", action="store_true", help="Explicitly use the in-memory stand-in (default)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=1000, help="Requests per scenario")
+    parser.add_argument("--login-requests", type=int, default=50)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--held-schemes", type=int, default=200, help="Buys pick from the first N schemes")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write results JSON here")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against")
+    asyncio.run(main(parser.parse_args()))
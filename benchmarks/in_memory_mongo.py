@@ -0,0 +1,53 @@
+# /benchmarks/in_memory_mongo.py
+
+"""
+In-memory MongoDB stand-in for the benchmarks (and the Mongo-backed tests).
+
+Backed by the `benchmark` dependency group's pinned mongomock/mongomock-motor
+(`poetry install --with benchmark`). mongomock 4.3.0 predates pymongo 4.11's `sort`
+argument on UpdateOne/ReplaceOne, and pymongo passes it to the bulk builder even when
+unset, so `MongoDB.bulk_write` fails with `TypeError: add_update() got an unexpected
+keyword argument 'sort'`. `in_memory_client()` teaches the builder to accept an unset
+`sort` (a set one still fails loudly) before handing out a client.
+
+What the stand-in exercises: every MongoDB wrapper method, so /auth/*, /buy (the
+pipeline upsert), /portfolio, the summary documents, revaluation and its bulk
+summary writes, the leader lease, the NAV snapshot and NAV history collections. What it does not: query plans (`MONGO_VERIFY_QUERY_PLANS`
+needs `explain()`), TTL expiry, real index/locking behaviour under concurrency,
+or anything network-bound - Mongo-bound latencies from an in-memory run say
+nothing about a server, so compare them only against other in-memory runs.
+"""
+
+import functools
+
+from mongomock.collection import BulkOperationBuilder
+from mongomock_motor import AsyncMongoMockClient
+
+
+def _accept_unset_sort(add):
+    @functools.wraps(add)
+    def wrapper(self, *args, sort=None, **kwargs):
+        if sort is not None:
+            raise NotImplementedError("mongomock does not support sort on bulk updates")
+        return add(self, *args, **kwargs)
+
+    wrapper._accepts_sort = True
+    return wrapper
+
+
+def _patch_bulk_builder():
+    for name in ("add_update", "add_replace"):
+        add = getattr(BulkOperationBuilder, name)
+        if not getattr(add, "_accepts_sort", False):
+            setattr(BulkOperationBuilder, name, _accept_unset_sort(add))
+
+
+def in_memory_client():
+    """
+    Build an in-memory Mongo client compatible with the installed pymongo.
+
+    Returns:
+        AsyncMongoMockClient: A fresh client with its own empty databases.
+    """
+    _patch_bulk_builder()
+    return AsyncMongoMockClient()
@@ -0,0 +1,47 @@
+# /benchmarks/serve_app.py
+
+"""
+Run the FastAPI app under uvicorn for the benchmark harness.
+
+With `--in-memory-mongo` the app's MongoDB client is backed by the mongomock-motor
+stand-in in `benchmarks.in_memory_mongo` (`poetry install --with benchmark`) instead of
+a server, so the whole stack runs offline. See that module for which code paths the
+stand-in can and cannot exercise.
+Everything else (RAPID_URL, JWT_SECRET_KEY, ...) comes from the environment.
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def use_in_memory_mongo():
+    from benchmarks.in_memory_mongo import in_memory_client
+    from api.v1.services.mongo import MongoDB
+
+    from_config = MongoDB.from_config
+
+    def in_memory_from_config():
+        mongo = from_config()
+        mongo.client = in_memory_client()
+        return mongo
+
+    MongoDB.from_config = staticmethod(in_memory_from_config)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--in-memory-mongo", action="store_true")
+    args = parser.parse_args()
+
+    if args.in_memory_mongo:
+        use_in_memory_mongo()
+
+    import uvicorn
+    from main import app
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
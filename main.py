@@ -1,17 +1,108 @@
 import logging
 import asyncio
-from fastapi import FastAPI
+import functools
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, Request, Response
 # FUT: Enable while using with UI
 from fastapi.middleware.cors import CORSMiddleware
 from api.v1.api import api_router
-from api.v1.portfolio.portfolio_routes import run_hourly_updates
+from api.v1.config import CONFIG
+from api.v1.auth.auth_security import AuthSecurity, token_cache
+from api.v1.auth.auth_dependencies import require_internal_token
+from api.v1.services.mongo import MongoDB
+from api.v1.services.indexes import ensure_indexes, verify_query_plans
+from api.v1.portfolio.revaluation import run_hourly_updates, run_summary_reconcile, last_cycle as revaluation_last_cycle
+from api.v1.services.rapidapi_mutfund import RapidAPIService
+from api.v1.services.nav_snapshot import nav_snapshot
+from api.v1.services.nav_history import nav_history
+from api.v1.services.nav_stream import nav_broadcaster
+from api.v1.services.scheme_search import scheme_search
+from api.v1.services.compression import CompressionMiddleware
+from api.v1.services.leader import LeaderLease
+from api.v1.services import metrics
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Application lifespan: owns the shared MongoDB client, the upstream HTTP client and
+    the background jobs, and tears them down in reverse order on shutdown.
+    """
+    # One MongoDB client (and connection pool) per worker, shared by every router
+    mongo_service = MongoDB.from_config()
+    app.state.mongo = mongo_service
+    metrics.Gauge(
+        "mongo_pool_connections", "MongoDB connection pool usage of this worker.", ("state",),
+        function=lambda: {(state,): value for state, value in mongo_service.pool_stats().items()
+                          if state in ("open", "in_use", "waiting")},
+    )
+    await RapidAPIService.startup()
+    try:
+        await ensure_indexes(mongo_service)
+        if CONFIG['MONGO_VERIFY_QUERY_PLANS']:
+            await verify_query_plans(mongo_service)
+    except Exception:
+        logger.exception("Could not apply MongoDB indexes")
+
+    # Only the lease holder refreshes from upstream, revalues and writes shared results;
+    # the other workers pick them up from MongoDB
+    lease = LeaderLease(mongo_service, "background_jobs", CONFIG['LEADER_LEASE_SECONDS'])
+    app.state.lease = lease
+    try:
+        await lease.try_acquire()
+    except Exception:
+        logger.exception("Could not contend for the background jobs lease; retrying in the background")
+
+    # Every refreshed snapshot is appended to the NAV history (written once, by the leader)
+    async def ingest_nav_history(snapshot):
+        await nav_history.ingest(mongo_service, snapshot, persist=lease.is_leader)
+    nav_snapshot.add_listener(ingest_nav_history)
+    # ...and pushed to the portfolio streams holding the schemes that moved
+    nav_snapshot.add_listener(nav_broadcaster.publish_snapshot)
+    # ...and reindexed for /fund_schemes/search
+    nav_snapshot.add_listener(scheme_search.rebuild)
+
+    # Serve the last snapshot saved on this host right away, and keep the file current
+    snapshot_path = CONFIG['NAV_SNAPSHOT_PATH']
+    save_snapshot_file = functools.partial(nav_snapshot.save_file, snapshot_path)
+    if snapshot_path:
+        await nav_snapshot.load_file(snapshot_path)
+        nav_snapshot.add_listener(save_snapshot_file)
+
+    logger.info("Starting NAV snapshot refresh and hourly updates...")
+    background_tasks = [
+        asyncio.create_task(lease.run()),
+        asyncio.create_task(nav_snapshot.run_refresh_loop(mongo=mongo_service, lease=lease)),
+        asyncio.create_task(run_hourly_updates(mongo_service, lease)),
+        asyncio.create_task(run_summary_reconcile(mongo_service, lease)),
+        # Buys and revaluations written by any worker reach this worker's portfolio streams
+        asyncio.create_task(nav_broadcaster.run_sync_loop(mongo_service)),
+    ]
+    try:
+        yield
+    finally:
+        nav_broadcaster.close()
+        for task in background_tasks:
+            task.cancel()
+        await asyncio.gather(*background_tasks, return_exceptions=True)
+        try:
+            await lease.release()
+        except Exception:
+            logger.exception("Could not release the background jobs lease")
+        nav_snapshot.remove_listener(ingest_nav_history)
+        nav_snapshot.remove_listener(nav_broadcaster.publish_snapshot)
+        nav_snapshot.remove_listener(scheme_search.rebuild)
+        nav_snapshot.remove_listener(save_snapshot_file)
+        await RapidAPIService.shutdown()
+        AuthSecurity.shutdown_hash_pool()
+        mongo_service.close()
+        metrics.REGISTRY.unregister("mongo_pool_connections")
+
 # FastAPI setup
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Allow all origins to make requests
 app.add_middleware(
@@ -22,10 +113,43 @@ app.add_middleware(
     allow_headers=["*"],  # Allow all headers
 )
 
+# gzip/brotli for large responses (threshold and levels from CONFIG)
+app.add_middleware(CompressionMiddleware)
+
+# Outermost, so request latency includes compression
+app.add_middleware(metrics.MetricsMiddleware)
+
 @app.get("/")
 async def health_check():
     return {"message": "ok"}
 
+@app.get("/stats", dependencies=[Depends(require_internal_token)], include_in_schema=False)
+async def stats(request: Request):
+    """
+    In-process cache, connection pool and background job statistics for this worker
+    (only with INTERNAL_ENDPOINTS_TOKEN, see `require_internal_token`).
+    """
+    return {
+        "mongo_pool": request.app.state.mongo.pool_stats(),
+        "rapidapi_cache": RapidAPIService.cache_stats(),
+        "nav_snapshot": nav_snapshot.stats(),
+        "nav_history": nav_history.stats(),
+        "nav_stream": nav_broadcaster.stats(),
+        "scheme_search": scheme_search.stats(),
+        "revaluation": revaluation_last_cycle,
+        "leader": request.app.state.lease.stats(),
+        "password_hash_pool": AuthSecurity.hash_pool_stats(),
+        "token_cache": token_cache.stats(),
+    }
+
+@app.get("/metrics", dependencies=[Depends(require_internal_token)], include_in_schema=False)
+async def metrics_endpoint():
+    """
+    Prometheus scrape endpoint for this worker (scraped with INTERNAL_ENDPOINTS_TOKEN as
+    the bearer token, see `require_internal_token`).
+    """
+    return Response(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
 # v1 sub-router 
 app.include_router(api_router, prefix="/v1")
 
@@ -38,11 +162,3 @@ ascii_art = """
 ╰━━━╯╱╱╰╯╱╰┻━━╯╱╰╯╱╰━━━╯
 """
 print(ascii_art)
-
-@app.on_event("startup")
-async def startup_event():
-    """
-    Startup event to run the hourly updates in the background.
-    """
-    logger.info("Starting hourly updates...")
-    asyncio.create_task(run_hourly_updates())
\ No newline at end of file
@@ -0,0 +1,14 @@
+# /tests/conftest.py
+
+import pytest
+
+from api.v1.services.mongo import MongoDB
+from benchmarks.in_memory_mongo import in_memory_client
+
+
+@pytest.fixture
+def mongo():
+    # The app's MongoDB wrapper over a fresh in-memory database (see benchmarks.in_memory_mongo)
+    service = MongoDB("mongodb://in-memory")
+    service.client = in_memory_client()
+    return service
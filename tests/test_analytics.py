@@ -0,0 +1,101 @@
+# /tests/test_analytics.py
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from api.v1.portfolio.analytics import DAYS_PER_YEAR, compute_analytics, holdings_columns
+
+NOW = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def purchase(code, units, nav, invested, years_ago, category="Equity", family="Family"):
+    return {
+        "Scheme_Code": code,
+        "Scheme_Category": category,
+        "Mutual_Fund_Family": family,
+        "units": units,
+        "Net_Asset_Value": nav,
+        "invested_amount": invested,
+        "purchase_date": NOW - timedelta(days=years_ago * DAYS_PER_YEAR),
+    }
+
+
+def analyze(purchases, navs=None):
+    return compute_analytics(holdings_columns(purchases, (navs or {}).get, NOW))
+
+
+def reference_xirr(flows, value):
+    # Bisection on value - sum(amount * (1 + r) ** years) = 0, independent of the Newton solver
+    low, high = -0.99, 10.0
+    for _ in range(200):
+        rate = (low + high) / 2
+        if value - sum(amount * (1 + rate) ** years for amount, years in flows) > 0:
+            low = rate
+        else:
+            high = rate
+    return rate
+
+
+def test_one_year_holding_has_its_simple_return_as_xirr():
+    result = analyze([purchase(1, 10, 10.0, 100.0, years_ago=1)], {1: 11.0})
+    assert result["current_value"] == 110.0
+    assert (result["gain"], result["gain_percent"]) == (10.0, 10.0)
+    assert result["xirr_percent"] == 10.0
+
+
+def test_xirr_matches_a_reference_solver():
+    holdings = [
+        purchase(1, 100, 10.0, 800.0, years_ago=3),
+        purchase(2, 50, 20.0, 1200.0, years_ago=0.5, category="Debt"),
+        purchase(3, 10, 5.0, 40.0, years_ago=1.5, family="Other"),
+    ]
+    navs = {1: 10.0, 2: 20.0, 3: 5.0}
+    result = analyze(holdings, navs)
+    expected = reference_xirr([(800.0, 3), (1200.0, 0.5), (40.0, 1.5)], 1000.0 + 1000.0 + 50.0)
+    assert result["xirr_percent"] == pytest.approx(expected * 100, abs=0.01)
+    assert result["holdings"] == 3
+
+
+def test_losses_give_a_negative_xirr():
+    result = analyze([purchase(1, 10, 10.0, 200.0, years_ago=2)], {1: 5.0})
+    assert result["xirr_percent"] == pytest.approx(reference_xirr([(200.0, 2)], 50.0) * 100, abs=0.01)
+    assert result["xirr_percent"] < 0
+
+
+def test_allocation_is_grouped_and_weighted_by_current_value():
+    holdings = [
+        purchase(1, 10, 10.0, 100.0, years_ago=1, category="Equity", family="A"),
+        purchase(2, 30, 10.0, 300.0, years_ago=1, category="Debt", family="A"),
+        purchase(3, 10, 10.0, 100.0, years_ago=1, category="Equity", family=None),
+    ]
+    allocation = analyze(holdings)["allocation"]
+    assert allocation["Scheme_Category"] == [
+        {"name": "Debt", "value": 300.0, "weight": 0.6},
+        {"name": "Equity", "value": 200.0, "weight": 0.4},
+    ]
+    assert [row["name"] for row in allocation["Mutual_Fund_Family"]] == ["A", "Unknown"]
+
+
+def test_missing_values_fall_back_to_stored_figures():
+    legacy = {
+        "Scheme_Code": 1,
+        "units": 10,
+        "Net_Asset_Value": 12.0,
+        "total_cost": 100.0,  # no invested_amount: written before the cost basis was tracked
+        "purchase_date": (NOW - timedelta(days=DAYS_PER_YEAR)).replace(tzinfo=None),  # naive UTC from PyMongo
+    }
+    result = analyze([legacy])  # not in the snapshot: valued at its stored NAV
+    assert (result["invested_amount"], result["current_value"]) == (100.0, 120.0)
+    assert result["xirr_percent"] == 20.0
+    assert result["allocation"]["Scheme_Category"][0]["name"] == "Unknown"
+
+
+def test_xirr_is_undefined_for_an_empty_or_brand_new_portfolio():
+    empty = analyze([])
+    assert empty["holdings"] == 0 and empty["xirr_percent"] is None and empty["gain_percent"] is None
+    assert empty["allocation"] == {"Scheme_Category": [], "Mutual_Fund_Family": []}
+
+    today = analyze([purchase(1, 10, 10.0, 100.0, years_ago=0)], {1: 11.0})
+    assert today["xirr_percent"] is None
+    assert today["gain"] == 10.0
@@ -0,0 +1,109 @@
+# /tests/test_buy.py
+
+import asyncio
+
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+from api.v1.funds import fund_routes
+from api.v1.funds.models import BuyRequest
+from api.v1.portfolio import summaries
+
+USER = {"email": "a@x.com"}
+
+
+def buy_request(units, nav, code=101, **fields):
+    return BuyRequest(**{
+        "Scheme_Code": code,
+        "Scheme_Name": "Scheme",
+        "Date": "14-Jan-2025",
+        "Scheme_Category": "Equity",
+        "Mutual_Fund_Family": "Family",
+        "units": units,
+        "nav": nav,
+        "ISIN_Div_Payout_ISIN_Growth": "INF000000001",
+        "ISIN_Div_Reinvestment": "-",
+        **fields,
+    })
+
+
+async def holdings(mongo, code=101):
+    return await mongo.find_all(fund_routes.db_name, fund_routes.collection_name, {"email": USER["email"], "Scheme_Code": code})
+
+
+def test_first_buy_creates_the_holding_and_later_buys_add_to_it(mongo):
+    async def scenario():
+        created = await fund_routes.buy_fund(buy_request(10, 5.0), USER, mongo)
+        assert created["message"] == "Purchase created successfully."
+        updated = await fund_routes.buy_fund(buy_request(5, 6.0, Scheme_Name="Renamed"), USER, mongo)
+        assert updated["message"] == "Purchase updated successfully."
+        assert updated["total_cost"] == "30.00"
+
+        [holding] = await holdings(mongo)
+        assert holding["units"] == 15
+        assert holding["Net_Asset_Value"] == 6.0
+        assert holding["total_cost"] == 90.0
+        assert holding["invested_amount"] == 80.0
+        assert holding["Scheme_Name"] == "Scheme"  # static fields come from the first buy
+        assert holding["purchase_date"] <= holding["last_updated"]
+
+        # The summary deltas applied by the two buys
+        summary = await mongo.find_one(summaries.DB_NAME, summaries.SUMMARIES, USER)
+        assert (summary["invested_amount"], summary["current_value"], summary["holdings"]) == (80.0, 90.0, 1)
+
+    asyncio.run(scenario())
+
+
+def test_user_strings_are_stored_literally(mongo):
+    async def scenario():
+        await fund_routes.buy_fund(buy_request(1, 5.0, Scheme_Name="$units", Scheme_Category="$total_cost"), USER, mongo)
+        [holding] = await holdings(mongo)
+        assert (holding["Scheme_Name"], holding["Scheme_Category"]) == ("$units", "$total_cost")
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_buys_of_one_scheme_keep_every_unit(mongo):
+    async def scenario():
+        await asyncio.gather(*(fund_routes.buy_fund(buy_request(1, 5.0), USER, mongo) for _ in range(20)))
+        [holding] = await holdings(mongo)
+        assert (holding["units"], holding["total_cost"]) == (20, 100.0)
+        summary = await mongo.find_one(summaries.DB_NAME, summaries.SUMMARIES, USER)
+        assert (summary["current_value"], summary["holdings"]) == (100.0, 1)
+
+    asyncio.run(scenario())
+
+
+def test_a_lost_insert_race_is_retried_as_an_update(mongo, monkeypatch):
+    async def scenario():
+        find_one_and_update = mongo.find_one_and_update
+        calls = []
+
+        async def racing_find_one_and_update(*args, **kwargs):
+            calls.append(args)
+            if len(calls) == 1:
+                # Another request created the document between our match and our insert
+                await fund_routes.buy_fund(buy_request(3, 5.0), USER, mongo)
+                raise DuplicateKeyError("E11000 duplicate key error")
+            return await find_one_and_update(*args, **kwargs)
+
+        monkeypatch.setattr(mongo, "find_one_and_update", racing_find_one_and_update)
+        result = await fund_routes.buy_fund(buy_request(2, 5.0), USER, mongo)
+        assert result["message"] == "Purchase updated successfully."
+        [holding] = await holdings(mongo)
+        assert holding["units"] == 5
+        summary = await mongo.find_one(summaries.DB_NAME, summaries.SUMMARIES, USER)
+        assert (summary["current_value"], summary["holdings"]) == (25.0, 1)
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("units,nav", [(0, 5.0), (1, 0.0)])
+def test_non_positive_units_or_nav_are_rejected(mongo, units, nav):
+    async def scenario():
+        with pytest.raises(fund_routes.HTTPException) as raised:
+            await fund_routes.buy_fund(buy_request(units, nav), USER, mongo)
+        assert raised.value.status_code == 400
+        assert await holdings(mongo) == []
+
+    asyncio.run(scenario())
@@ -0,0 +1,225 @@
+# /tests/test_cache.py
+
+import asyncio
+
+import pytest
+
+from api.v1.services import cache
+from api.v1.services.cache import AsyncTTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache, "time", clock)
+    return clock
+
+
+async def settle():
+    # Let pending loads and their done callbacks run
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def counting_loader(values):
+    calls = []
+
+    async def loader():
+        calls.append(None)
+        return values[len(calls) - 1]
+
+    return loader, calls
+
+
+def test_fresh_entry_is_served_until_ttl(clock):
+    async def scenario():
+        c = AsyncTTLCache(ttl=10, maxsize=8)
+        loader, calls = counting_loader(["a", "b"])
+        assert await c.get_or_load("k", loader) == "a"
+        clock.now += 9.9
+        assert await c.get_or_load("k", loader) == "a"
+        clock.now += 0.2
+        assert await c.get_or_load("k", loader) == "b"
+        assert len(calls) == 2
+        assert (c.hits, c.misses) == (1, 2)
+
+    asyncio.run(scenario())
+
+
+def test_stale_entry_is_served_while_one_refresh_runs(clock):
+    async def scenario():
+        c = AsyncTTLCache(ttl=10, maxsize=8, stale_ttl=5)
+        release = asyncio.Event()
+        values = iter(["a", "b"])
+
+        async def loader():
+            value = next(values)
+            if value == "b":
+                await release.wait()
+            return value
+
+        await c.get_or_load("k", loader)
+        clock.now += 12
+        # Past the TTL but within stale_ttl: the stale value, and a single refresh in flight
+        assert await c.get_or_load("k", loader) == "a"
+        assert await c.get_or_load("k", loader) == "a"
+        assert c.stale_hits == 2
+        assert c.stats()["inflight"] == 1
+        release.set()
+        await settle()
+        assert await c.get_or_load("k", loader) == "b"
+
+    asyncio.run(scenario())
+
+
+def test_failed_refresh_keeps_stale_value(clock):
+    async def scenario():
+        c = AsyncTTLCache(ttl=10, maxsize=8, stale_ttl=5)
+
+        async def failing():
+            raise RuntimeError("upstream down")
+
+        await c.get_or_load("k", lambda: asyncio.sleep(0, "a"))
+        clock.now += 11
+        assert await c.get_or_load("k", failing) == "a"
+        await settle()
+        assert c.refresh_failures == 1
+        assert await c.get_or_load("k", failing) == "a"
+
+    asyncio.run(scenario())
+
+
+def test_entry_past_stale_ttl_is_reloaded(clock):
+    async def scenario():
+        c = AsyncTTLCache(ttl=10, maxsize=8, stale_ttl=5)
+        loader, calls = counting_loader(["a", "b"])
+        await c.get_or_load("k", loader)
+        clock.now += 15.1
+        assert await c.get_or_load("k", loader) == "b"
+        assert c.stale_hits == 0
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_misses_share_one_load(clock):
+    async def scenario():
+        c = AsyncTTLCache(ttl=10, maxsize=8)
+        release = asyncio.Event()
+        calls = []
+
+        async def loader():
+            calls.append(None)
+            await release.wait()
+            return "a"
+
+        waiters = [asyncio.ensure_future(c.get_or_load("k", loader)) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+        assert await asyncio.gather(*waiters) == ["a"] * 5
+        assert len(calls) == 1
+        assert c.coalesced == 4
+
+    asyncio.run(scenario())
+
+
+def test_load_error_reaches_every_waiter_and_is_not_cached(clock):
+    async def scenario():
+        c = AsyncTTLCache(ttl=10, maxsize=8)
+
+        async def failing():
+            await asyncio.sleep(0)
+            raise RuntimeError("boom")
+
+        results = await asyncio.gather(*(c.get_or_load("k", failing) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert c.stats()["size"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_load(clock):
+    async def scenario():
+        c = AsyncTTLCache(ttl=10, maxsize=8)
+        release = asyncio.Event()
+
+        async def loader():
+            await release.wait()
+            return "a"
+
+        first = asyncio.ensure_future(c.get_or_load("k", loader))
+        second = asyncio.ensure_future(c.get_or_load("k", loader))
+        await asyncio.sleep(0)
+        first.cancel()
+        release.set()
+        assert await second == "a"
+        assert await c.get_or_load("k", loader) == "a"
+
+    asyncio.run(scenario())
+
+
+def test_invalidate_fences_in_flight_load(clock):
+    async def scenario():
+        c = AsyncTTLCache(ttl=10, maxsize=8)
+        release = asyncio.Event()
+        values = iter(["old", "new"])
+
+        async def loader():
+            value = next(values)
+            if value == "old":
+                await release.wait()
+            return value
+
+        stale_waiter = asyncio.ensure_future(c.get_or_load("k", loader))
+        await asyncio.sleep(0)
+        c.invalidate("k")
+        # A caller after the invalidation starts its own load rather than joining the old one
+        assert await asyncio.wait_for(c.get_or_load("k", loader), 1) == "new"
+        release.set()
+        assert await stale_waiter == "old"
+        # The older generation's result was not cached over the newer one
+        assert await c.get_or_load("k", loader) == "new"
+        assert c.stats()["inflight"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_invalidate_all_drops_entries_and_in_flight_results(clock):
+    async def scenario():
+        c = AsyncTTLCache(ttl=10, maxsize=8)
+        release = asyncio.Event()
+
+        async def slow():
+            await release.wait()
+            return "late"
+
+        await c.get_or_load("a", lambda: asyncio.sleep(0, 1))
+        pending = asyncio.ensure_future(c.get_or_load("b", slow))
+        await asyncio.sleep(0)
+        c.invalidate()
+        release.set()
+        assert await pending == "late"
+        assert c.stats()["size"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    async def scenario():
+        c = AsyncTTLCache(ttl=10, maxsize=2)
+        for key in ("a", "b"):
+            await c.get_or_load(key, lambda key=key: asyncio.sleep(0, key))
+        await c.get_or_load("a", lambda: asyncio.sleep(0, "reloaded"))  # hit: "a" becomes most recent
+        await c.get_or_load("c", lambda: asyncio.sleep(0, "c"))
+        assert c.evictions == 1
+        assert await c.get_or_load("a", lambda: asyncio.sleep(0, "reloaded")) == "a"
+        assert await c.get_or_load("b", lambda: asyncio.sleep(0, "reloaded")) == "reloaded"
+
+    asyncio.run(scenario())
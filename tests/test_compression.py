@@ -0,0 +1,64 @@
+# /tests/test_compression.py
+
+import asyncio
+import gzip
+
+import brotli
+import pytest
+
+from api.v1.services.compression import CompressionMiddleware, negotiate_encoding
+
+
+@pytest.mark.parametrize("header,expected", [
+    (None, None),
+    ("identity", None),
+    ("gzip", "gzip"),
+    ("gzip, deflate, br", "br"),
+    ("br;q=0.5, gzip", "gzip"),
+    ("br;q=0, gzip;q=0", None),
+    ("*", "br"),
+    ("*;q=0.2, gzip;q=0.5", "gzip"),
+    ("br;q=oops, gzip", "gzip"),
+])
+def test_negotiate_encoding(header, expected):
+    assert negotiate_encoding(header) == expected
+
+
+def run(app, accept_encoding):
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "headers": [(b"accept-encoding", accept_encoding.encode())]}
+    asyncio.run(CompressionMiddleware(app, minimum_size=100)(scope, None, send))
+    return dict(messages[0]["headers"]), b"".join(message.get("body", b"") for message in messages[1:])
+
+
+def json_app(body, headers=()):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json"), *headers]})
+        await send({"type": "http.response.body", "body": body})
+
+    return app
+
+
+def test_large_json_bodies_are_compressed_with_the_negotiated_coding():
+    body = b'{"data":"' + b"x" * 500 + b'"}'
+    headers, sent = run(json_app(body), "br")
+    assert headers[b"content-encoding"] == b"br"
+    assert headers[b"vary"] == b"Accept-Encoding"
+    assert brotli.decompress(sent) == body
+
+    headers, sent = run(json_app(body), "gzip")
+    assert int(headers[b"content-length"]) == len(sent)
+    assert gzip.decompress(sent) == body
+
+
+def test_small_and_precompressed_bodies_pass_through():
+    headers, sent = run(json_app(b"{}"), "br")
+    assert b"content-encoding" not in headers and sent == b"{}"
+
+    precompressed = gzip.compress(b"x" * 500)
+    headers, sent = run(json_app(precompressed, [(b"content-encoding", b"gzip")]), "br")
+    assert headers[b"content-encoding"] == b"gzip" and sent == precompressed
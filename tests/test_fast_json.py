@@ -0,0 +1,36 @@
+# /tests/test_fast_json.py
+
+import json
+from datetime import date, datetime, timezone
+
+import pytest
+
+from api.v1.services import fast_json
+
+CONTENT = {
+    "status": "success",
+    "data": [{"Scheme_Code": 1, "Scheme_Name": "Fund – Growth", "Net_Asset_Value": 12.5, "held": True, "isin": None}],
+    "updated_at": datetime(2025, 1, 14, 9, 30, tzinfo=timezone.utc),
+    "date": date(2025, 1, 14),
+}
+
+
+@pytest.mark.parametrize("mode", ["orjson", "std"])
+def test_modes_produce_the_same_json(monkeypatch, mode):
+    monkeypatch.setattr(fast_json, "JSON_MODE", mode)
+    body = fast_json.dumps(CONTENT)
+    assert json.loads(body) == {
+        **CONTENT,
+        "updated_at": "2025-01-14T09:30:00+00:00",
+        "date": "2025-01-14",
+    }
+    assert b'": ' not in body and b", " not in body  # compact separators
+
+
+def test_modes_agree_byte_for_byte_on_plain_payloads(monkeypatch):
+    content = {key: value for key, value in CONTENT.items() if key != "updated_at"}
+    bodies = []
+    for mode in ("orjson", "std"):
+        monkeypatch.setattr(fast_json, "JSON_MODE", mode)
+        bodies.append(fast_json.dumps(content))
+    assert bodies[0] == bodies[1]
@@ -0,0 +1,55 @@
+# /tests/test_internal_endpoints.py
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.v1.config import CONFIG
+from api.v1.services.leader import LeaderLease
+from main import app
+
+TOKEN = "internal-token"
+
+
+@pytest.fixture
+def client():
+    # No lifespan: the gate answers before any handler touches app state
+    return TestClient(app)
+
+
+@pytest.fixture
+def internal_token(monkeypatch):
+    monkeypatch.setitem(CONFIG, "INTERNAL_ENDPOINTS_TOKEN", TOKEN)
+    return TOKEN
+
+
+@pytest.mark.parametrize("path", ["/stats", "/metrics"])
+def test_internal_endpoints_are_not_served_by_default(client, monkeypatch, path):
+    monkeypatch.setitem(CONFIG, "INTERNAL_ENDPOINTS_TOKEN", None)
+    assert client.get(path).status_code == 404
+    assert client.get(path, headers={"Authorization": "Bearer "}).status_code == 404
+
+
+@pytest.mark.parametrize("path", ["/stats", "/metrics"])
+@pytest.mark.parametrize("authorization", [None, "Bearer wrong-token", TOKEN, "Basic " + TOKEN])
+def test_internal_endpoints_need_the_token(client, internal_token, path, authorization):
+    headers = {"Authorization": authorization} if authorization else {}
+    assert client.get(path, headers=headers).status_code == 404
+
+
+def test_stats_are_served_with_the_token(client, internal_token, mongo, monkeypatch):
+    monkeypatch.setattr(app.state, "mongo", mongo, raising=False)
+    monkeypatch.setattr(app.state, "lease", LeaderLease(mongo, "jobs", ttl=30), raising=False)
+    response = client.get("/stats", headers={"Authorization": f"Bearer {internal_token}"})
+    assert response.status_code == 200
+    assert {"mongo_pool", "leader", "token_cache"} <= response.json().keys()
+
+
+def test_metrics_are_served_with_the_token(client, internal_token):
+    response = client.get("/metrics", headers={"Authorization": f"Bearer {internal_token}"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+
+
+def test_internal_endpoints_are_kept_out_of_the_api_schema(client):
+    paths = client.get("/openapi.json").json()["paths"]
+    assert "/stats" not in paths and "/metrics" not in paths
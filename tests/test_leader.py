@@ -0,0 +1,126 @@
+# /tests/test_leader.py
+
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from api.v1.portfolio import revaluation, summaries
+from api.v1.services import leader
+from api.v1.services.leader import COLLECTION_NAME, DB_NAME, LeaderLease
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(leader, "time", clock)
+    return clock
+
+
+async def leases(mongo):
+    await mongo.create_index(DB_NAME, COLLECTION_NAME, [("name", 1)], unique=True)
+    return (
+        LeaderLease(mongo, "jobs", ttl=30, owner="worker-a"),
+        LeaderLease(mongo, "jobs", ttl=30, owner="worker-b"),
+    )
+
+
+async def expire(mongo):
+    # As if the holder stopped renewing and the TTL passed on the wall clock
+    await mongo.update_one(
+        DB_NAME, COLLECTION_NAME, {"name": "jobs"}, {"$set": {"expires_at": datetime(2000, 1, 1, tzinfo=timezone.utc)}}
+    )
+
+
+def test_one_holder_at_a_time_and_renewal_keeps_the_epoch(mongo, clock):
+    async def scenario():
+        a, b = await leases(mongo)
+        assert await a.try_acquire()
+        assert not await b.try_acquire()
+        assert (a.is_leader, b.is_leader) == (True, False)
+        assert a.epoch == 1
+
+        clock.now += 10
+        assert await a.try_acquire()
+        assert a.epoch == 1
+        assert a.transitions == 1
+
+    asyncio.run(scenario())
+
+
+def test_takeover_after_expiry_bumps_the_epoch(mongo, clock):
+    async def scenario():
+        a, b = await leases(mongo)
+        await a.try_acquire()
+        await expire(mongo)
+
+        assert await b.try_acquire()
+        assert b.epoch == 2
+        # The deposed holder learns it on its next renewal
+        assert not await a.try_acquire()
+        assert not a.is_leader
+        assert a.epoch == 1
+
+        # Retaking an expired lease counts as a change of hands too, even for the same owner
+        await expire(mongo)
+        assert await b.try_acquire()
+        assert b.epoch == 3
+
+    asyncio.run(scenario())
+
+
+def test_leadership_lapses_locally_at_the_ttl_without_a_renewal(mongo, clock):
+    async def scenario():
+        a, _ = await leases(mongo)
+        await a.try_acquire()
+        clock.now += 29.9
+        assert a.is_leader
+        clock.now += 0.2
+        assert not a.is_leader
+
+    asyncio.run(scenario())
+
+
+def test_release_lets_another_worker_take_over_at_once(mongo, clock):
+    async def scenario():
+        a, b = await leases(mongo)
+        await a.try_acquire()
+        await a.release()
+        assert not a.is_leader
+        assert await b.try_acquire()
+        assert b.epoch == 2
+        assert b.stats()["epoch"] == 2 and b.stats()["leader"]
+
+    asyncio.run(scenario())
+
+
+def test_revaluation_stops_before_writing_once_the_lease_lapses(mongo, clock, monkeypatch):
+    async def scenario():
+        a, _ = await leases(mongo)
+        await a.try_acquire()
+        await mongo.get_collection(DB_NAME, summaries.PURCHASES).insert_one(
+            {"email": "a@x.com", "Scheme_Code": 1, "units": 1, "Net_Asset_Value": 5.0, "total_cost": 5.0}
+        )
+
+        async def slow_navs(codes):
+            clock.now += 31  # the NAV lookups outlast the lease
+            return {1: 6.0}
+
+        monkeypatch.setattr(revaluation, "fetch_latest_navs", slow_navs)
+        with pytest.raises(leader.LeaseLost):
+            await revaluation.revalue_portfolios(mongo, a)
+        document = await mongo.find_one(DB_NAME, summaries.PURCHASES, {"email": "a@x.com"})
+        assert document["Net_Asset_Value"] == 5.0
+
+    asyncio.run(scenario())
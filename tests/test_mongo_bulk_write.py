@@ -0,0 +1,84 @@
+# /tests/test_mongo_bulk_write.py
+
+import asyncio
+
+import pytest
+from pymongo import DeleteOne, InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+DB, COLLECTION = "test_db", "items"
+
+
+@pytest.fixture
+def batches(mongo, monkeypatch):
+    # Sizes of the batches MongoDB.bulk_write sends
+    sizes = []
+    get_collection = mongo.get_collection
+
+    def recording_get_collection(db_name, collection_name):
+        collection = get_collection(db_name, collection_name)
+        bulk_write = collection.bulk_write
+
+        async def recording_bulk_write(operations, **kwargs):
+            sizes.append(len(operations))
+            return await bulk_write(operations, **kwargs)
+
+        collection.bulk_write = recording_bulk_write
+        return collection
+
+    monkeypatch.setattr(mongo, "get_collection", recording_get_collection)
+    return sizes
+
+
+def test_operations_are_sent_in_chunks_and_counts_summed(mongo, batches):
+    async def scenario():
+        counts = await mongo.bulk_write(DB, COLLECTION, [InsertOne({"k": i}) for i in range(5)], chunk_size=2)
+        assert batches == [2, 2, 1]
+        assert counts == {"inserted": 5, "matched": 0, "modified": 0, "deleted": 0, "upserted": 0}
+
+        operations = [
+            UpdateOne({"k": 0}, {"$set": {"v": 1}}),
+            UpdateOne({"k": 1}, {"$set": {"v": 1}}),
+            UpdateOne({"k": 9}, {"$set": {"v": 1}}, upsert=True),
+            DeleteOne({"k": 4}),
+        ]
+        counts = await mongo.bulk_write(DB, COLLECTION, operations, chunk_size=3)
+        assert batches[3:] == [3, 1]
+        assert counts == {"inserted": 0, "matched": 2, "modified": 2, "deleted": 1, "upserted": 1}
+
+    asyncio.run(scenario())
+
+
+async def with_unique_k(mongo):
+    await mongo.create_index(DB, COLLECTION, [("k", 1)], unique=True)
+    await mongo.bulk_write(DB, COLLECTION, [InsertOne({"k": 1})])
+
+
+def test_unordered_failures_are_aggregated_across_chunks(mongo, batches):
+    async def scenario():
+        await with_unique_k(mongo)
+        operations = [InsertOne({"k": k}) for k in (2, 1, 3, 4, 1, 5)]
+        with pytest.raises(BulkWriteError) as raised:
+            await mongo.bulk_write(DB, COLLECTION, operations, chunk_size=4)
+        assert batches[1:] == [4, 2]
+        error = raised.value
+        assert error.counts["inserted"] == 4
+        assert error.details["nInserted"] == 4
+        # Indexes point into the whole operation list, not into their chunk
+        assert [e["index"] for e in error.details["writeErrors"]] == [1, 4]
+
+    asyncio.run(scenario())
+
+
+def test_ordered_write_stops_at_the_first_failing_chunk(mongo, batches):
+    async def scenario():
+        await with_unique_k(mongo)
+        operations = [InsertOne({"k": k}) for k in (2, 1, 3, 4, 5)]
+        with pytest.raises(BulkWriteError) as raised:
+            await mongo.bulk_write(DB, COLLECTION, operations, ordered=True, chunk_size=2)
+        assert batches[1:] == [2]
+        assert raised.value.counts["inserted"] == 1
+        assert [e["index"] for e in raised.value.details["writeErrors"]] == [1]
+        assert len(await mongo.find_all(DB, COLLECTION, {})) == 2
+
+    asyncio.run(scenario())
@@ -0,0 +1,102 @@
+# /tests/test_nav_history.py
+
+import asyncio
+from array import array
+from datetime import date
+
+from api.v1.services.nav_history import COLLECTION_NAME, DB_NAME, NavHistoryStore, SchemeHistory, history_response, parse_nav_date
+from api.v1.services.nav_snapshot import NavSnapshot
+
+TODAY = date.today().toordinal()
+
+
+def snapshot(navs, day=TODAY):
+    # navs: Scheme_Code -> NAV, all dated `day`
+    label = date.fromordinal(day).strftime("%d-%b-%Y")
+    return NavSnapshot([
+        {"Scheme_Code": code, "Scheme_Name": f"Scheme {code}", "Net_Asset_Value": nav, "Date": label}
+        for code, nav in navs.items()
+    ], 0.0)
+
+
+async def stored_points(mongo):
+    return len(await mongo.find_all(DB_NAME, COLLECTION_NAME, {}))
+
+
+def test_parse_nav_date():
+    assert parse_nav_date("14-Jan-2025") == date(2025, 1, 14).toordinal()
+    assert parse_nav_date("2025-01-14") is None
+    assert parse_nav_date(None) is None
+
+
+def test_scheme_history_keeps_points_sorted_and_unique():
+    series = SchemeHistory()
+    for ordinal, nav in ((10, 1.0), (12, 1.2), (11, 1.1), (12, 1.25), (9, 0.9)):
+        series.add(ordinal, nav)
+    assert list(series.dates) == [9, 10, 11, 12]
+    assert list(series.navs) == [0.9, 1.0, 1.1, 1.25]
+    assert series.range(10, 11) == (array("i", [10, 11]), array("d", [1.0, 1.1]))
+    series.trim(11)
+    assert list(series.dates) == [11, 12]
+
+
+def test_ingest_writes_only_new_points(mongo):
+    async def scenario():
+        store = NavHistoryStore(window_days=30, max_schemes=10)
+        assert await store.ingest(mongo, snapshot({1: 10.0, 2: 20.0})) == 2
+        assert await store.ingest(mongo, snapshot({1: 10.0, 2: 20.0})) == 0
+        assert await store.ingest(mongo, snapshot({1: 10.5, 2: 20.0})) == 1  # a same-day correction
+        assert await store.ingest(mongo, snapshot({1: 10.5}, day=TODAY - 1)) == 1
+        assert await stored_points(mongo) == 3
+
+        # Points taken from the leader's snapshot aren't written again
+        follower = NavHistoryStore(window_days=30, max_schemes=10)
+        assert await follower.ingest(mongo, snapshot({3: 30.0}), persist=False) == 1
+        assert await stored_points(mongo) == 3
+
+    asyncio.run(scenario())
+
+
+def test_history_serves_the_window_from_memory_and_older_ranges_from_mongo(mongo):
+    async def scenario():
+        writer = NavHistoryStore(window_days=30, max_schemes=10)
+        for age in (100, 20, 10):
+            await writer.ingest(mongo, snapshot({1: 100.0 - age}, day=TODAY - age))
+
+        store = NavHistoryStore(window_days=30, max_schemes=10)
+        dates, navs = await store.history(mongo, 1, TODAY - 30, TODAY)
+        assert list(dates) == [TODAY - 20, TODAY - 10]
+        assert list(navs) == [80.0, 90.0]
+        await store.history(mongo, 1, TODAY - 15, TODAY)
+        assert (store.loads, store.hits) == (1, 1)
+
+        # Ingested points extend the cached series without another load
+        await store.ingest(mongo, snapshot({1: 100.0}))
+        dates, navs = await store.history(mongo, 1, TODAY - 1, TODAY)
+        assert (list(dates), list(navs)) == ([TODAY], [100.0])
+        assert store.loads == 1
+
+        # Reaching past the window reads MongoDB and leaves the cache alone
+        dates, _ = await store.history(mongo, 1, TODAY - 200, TODAY - 50)
+        assert list(dates) == [TODAY - 100]
+        assert store.stats()["cached_points"] == 3
+
+        body = history_response(1, array("i", [TODAY]), array("d", [100.0]))
+        assert body["data"]["dates"] == [date.today().isoformat()]
+
+    asyncio.run(scenario())
+
+
+def test_least_recently_used_series_is_evicted(mongo):
+    async def scenario():
+        store = NavHistoryStore(window_days=30, max_schemes=2)
+        await store.ingest(mongo, snapshot({1: 10.0, 2: 20.0, 3: 30.0}))
+        for code in (1, 2, 1, 3):
+            await store.history(mongo, code, TODAY - 1, TODAY)
+        assert list(store._series) == [1, 3]
+
+        await store.history(mongo, 2, TODAY - 1, TODAY)
+        assert list(store._series) == [3, 2]
+        assert (store.loads, store.hits) == (4, 1)
+
+    asyncio.run(scenario())
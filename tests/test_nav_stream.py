@@ -0,0 +1,102 @@
+# /tests/test_nav_stream.py
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from api.v1.funds import fund_routes
+from api.v1.funds.models import BuyRequest
+from api.v1.portfolio import summaries
+from api.v1.services import nav_stream
+from api.v1.services.nav_snapshot import NavSnapshot
+from api.v1.services.nav_stream import NavBroadcaster, format_event, initial_holdings
+
+
+def buy(code, units, nav):
+    return BuyRequest(
+        Scheme_Code=code, Scheme_Name="Scheme", Date="14-Jan-2025", Scheme_Category="Equity",
+        Mutual_Fund_Family="Family", units=units, nav=nav,
+        ISIN_Div_Payout_ISIN_Growth="-", ISIN_Div_Reinvestment="-",
+    )
+
+
+def an_hour_ago():
+    return datetime.now(timezone.utc) - timedelta(hours=1)
+
+
+def test_publish_collapses_bursts_into_one_delta_per_holding():
+    broadcaster = NavBroadcaster()
+    subscription = broadcaster.subscribe("a@x.com", {1: [10, 5.0, 50.0], 2: [1, 7.0, 7.0]})
+    broadcaster.publish({1: 5.5})
+    broadcaster.publish({1: 6.0, 3: 1.0})
+    broadcaster.publish({2: 7.0})  # unchanged
+    assert subscription.drain() == [{"Scheme_Code": 1, "nav": 6.0, "value": 60.0, "value_change": 10.0}]
+    assert subscription.total_value == 67.0
+    assert format_event("nav", {"changes": []}) == b'event: nav\ndata: {"changes":[]}\n\n'
+
+
+def test_a_buy_on_another_worker_reaches_the_stream_on_sync(mongo):
+    async def scenario():
+        # This worker streams a@x.com; the buys below are served by another one
+        worker = NavBroadcaster()
+        await fund_routes.buy_fund(buy(1, 10, 5.0), {"email": "a@x.com"}, mongo)
+        subscription = worker.subscribe("a@x.com", initial_holdings(
+            await mongo.find_all(summaries.DB_NAME, summaries.PURCHASES, {"email": "a@x.com"}), None,
+        ))
+        since = await worker.sync(mongo, an_hour_ago())
+        assert subscription.drain() == []  # nothing new since the stream's baseline
+
+        await fund_routes.buy_fund(buy(1, 5, 6.0), {"email": "a@x.com"}, mongo)
+        await fund_routes.buy_fund(buy(2, 1, 20.0), {"email": "a@x.com"}, mongo)
+        since = await worker.sync(mongo, since)
+        assert sorted(subscription.drain(), key=lambda change: change["Scheme_Code"]) == [
+            {"Scheme_Code": 1, "nav": 6.0, "value": 90.0, "value_change": 40.0},
+            {"Scheme_Code": 2, "nav": 20.0, "value": 20.0, "value_change": 20.0},
+        ]
+        # The overlap window re-reads those purchases, but only differences are pushed
+        await worker.sync(mongo, since)
+        assert subscription.drain() == []
+        assert worker.stats()["schemes"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_a_revaluation_by_the_lease_holder_reaches_the_stream_on_sync(mongo):
+    async def scenario():
+        worker = NavBroadcaster()
+        await fund_routes.buy_fund(buy(1, 10, 5.0), {"email": "a@x.com"}, mongo)
+        subscription = worker.subscribe("a@x.com", {1: [10, 5.0, 50.0]})
+        since = datetime.now(timezone.utc)
+        await summaries.revalue_purchases(mongo, {1: 5.5}, "cycle")
+        await worker.sync(mongo, since)
+        assert subscription.drain() == [{"Scheme_Code": 1, "nav": 5.5, "value": 55.0, "value_change": 5.0}]
+
+    asyncio.run(scenario())
+
+
+def test_sync_values_holdings_at_the_snapshot_nav(mongo, monkeypatch):
+    async def scenario():
+        snapshot = NavSnapshot([{"Scheme_Code": 1, "Scheme_Name": "Scheme", "Net_Asset_Value": 6.5}], 0.0)
+        monkeypatch.setattr(nav_stream.nav_snapshot, "current", snapshot)
+        worker = NavBroadcaster()
+        subscription = worker.subscribe("a@x.com", {})
+        await fund_routes.buy_fund(buy(1, 10, 5.0), {"email": "a@x.com"}, mongo)
+        await worker.sync(mongo, an_hour_ago())
+        assert subscription.drain() == [{"Scheme_Code": 1, "nav": 6.5, "value": 65.0, "value_change": 65.0}]
+        # A snapshot publish at the same NAV changes nothing
+        worker.publish({1: 6.5})
+        assert subscription.drain() == []
+
+    asyncio.run(scenario())
+
+
+def test_sync_ignores_other_users_and_changes_before_the_window(mongo, monkeypatch):
+    async def scenario():
+        monkeypatch.setitem(nav_stream.CONFIG, "NAV_STREAM_SYNC_OVERLAP_SECONDS", 0)
+        await fund_routes.buy_fund(buy(1, 10, 5.0), {"email": "a@x.com"}, mongo)
+        worker = NavBroadcaster()
+        subscription = worker.subscribe("a@x.com", {})
+        await fund_routes.buy_fund(buy(1, 10, 5.0), {"email": "b@x.com"}, mongo)
+        await worker.sync(mongo, datetime.now(timezone.utc) + timedelta(seconds=1))
+        assert subscription.drain() == []
+
+    asyncio.run(scenario())
@@ -0,0 +1,79 @@
+# /tests/test_prepared_response.py
+
+import gzip
+
+import brotli
+from starlette.requests import Request
+
+from api.v1.services.prepared_response import PreparedResponse
+
+# Large enough to be compressed (COMPRESSION_MIN_SIZE defaults to 1 KiB)
+CONTENT = {"status": "success", "data": [{"Scheme_Code": i, "Scheme_Name": f"Scheme {i}"} for i in range(200)]}
+
+
+def request(**headers):
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()],
+    })
+
+
+def test_etag_is_derived_from_the_body():
+    a, b = PreparedResponse(CONTENT, "private"), PreparedResponse(CONTENT, "private")
+    assert a.etag == b.etag and a.etag.startswith('"') and a.etag.endswith('"')
+    assert PreparedResponse({**CONTENT, "status": "other"}, "private").etag != a.etag
+
+
+def test_full_response_carries_the_validators():
+    prepared = PreparedResponse(CONTENT, "private, max-age=60")
+    response = prepared.respond(request())
+    assert response.status_code == 200
+    assert response.body == prepared.body
+    assert response.headers["etag"] == prepared.etag
+    assert response.headers["cache-control"] == "private, max-age=60"
+    assert response.headers["vary"] == "Accept-Encoding"
+
+
+def test_compressed_variants_get_their_own_etag_and_are_built_once():
+    prepared = PreparedResponse(CONTENT, "private")
+    response = prepared.respond(request(accept_encoding="gzip"))
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == prepared.etag[:-1] + '-gzip"'
+    assert gzip.decompress(response.body) == prepared.body
+
+    response = prepared.respond(request(accept_encoding="gzip, br"))
+    assert response.headers["content-encoding"] == "br"
+    assert brotli.decompress(response.body) == prepared.body
+    assert prepared.respond(request(accept_encoding="br")).body is response.body
+
+
+def test_small_bodies_are_sent_uncompressed():
+    prepared = PreparedResponse({"status": "success"}, "private")
+    response = prepared.respond(request(accept_encoding="gzip"))
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == prepared.etag
+
+
+def test_matching_if_none_match_gets_an_empty_304():
+    prepared = PreparedResponse(CONTENT, "private")
+    for if_none_match in (
+        prepared.etag,
+        "W/" + prepared.etag,
+        f'"other", {prepared.etag}',
+        prepared.variant_etag("gzip"),  # a copy cached in another encoding is the same version
+        "*",
+    ):
+        response = prepared.respond(request(if_none_match=if_none_match, accept_encoding="br"))
+        assert response.status_code == 304
+        assert response.body == b""
+        assert response.headers["etag"] == prepared.variant_etag("br")
+
+
+def test_stale_if_none_match_gets_the_body():
+    prepared = PreparedResponse(CONTENT, "private")
+    stale = PreparedResponse({**CONTENT, "status": "old"}, "private")
+    response = prepared.respond(request(if_none_match=stale.etag))
+    assert response.status_code == 200
+    assert response.body == prepared.body
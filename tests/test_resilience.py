@@ -0,0 +1,155 @@
+# /tests/test_resilience.py
+
+import asyncio
+
+import httpx
+import pytest
+
+from api.v1.services import resilience
+from api.v1.services.resilience import CircuitBreaker, UpstreamUnavailable, call_with_retries
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(resilience, "time", clock)
+    return clock
+
+
+def open_breaker(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.before_call()
+        breaker.record_failure()
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.times_opened == 1
+
+
+def test_success_resets_the_failure_count(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_open_circuit_rejects_until_reset_timeout(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    open_breaker(breaker)
+    clock.now += 10
+    with pytest.raises(UpstreamUnavailable) as error:
+        breaker.before_call()
+    assert error.value.retry_after == pytest.approx(20)
+    assert breaker.rejected == 1
+
+
+def test_half_open_lets_one_trial_through(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    open_breaker(breaker)
+    clock.now += 30
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(UpstreamUnavailable):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.before_call()
+
+
+def test_failed_trial_reopens(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    open_breaker(breaker)
+    clock.now += 30
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.retry_after() == pytest.approx(30)
+
+
+def test_released_trial_frees_the_slot(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    open_breaker(breaker)
+    clock.now += 30
+    breaker.before_call()
+    breaker.release()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.before_call()
+
+
+def test_check_does_not_claim_the_trial(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    open_breaker(breaker)
+    clock.now += 30
+    breaker.check()
+    breaker.check()
+    assert not breaker.trial_in_flight
+    breaker.before_call()
+    assert breaker.trial_in_flight
+
+
+def test_call_rejected_by_admission_keeps_the_trial_free(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    open_breaker(breaker)
+    clock.now += 30
+
+    async def not_admitted():
+        raise UpstreamUnavailable("no token")
+
+    async def call():
+        return "ok"
+
+    async def scenario():
+        with pytest.raises(UpstreamUnavailable, match="no token"):
+            await call_with_retries(call, breaker, 1, 1, 0, 0, before_attempt=not_admitted)
+        assert not breaker.trial_in_flight
+        assert await call_with_retries(call, breaker, 1, 1, 0, 0) == "ok"
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    asyncio.run(scenario())
+
+
+def test_call_with_retries_retries_transient_errors(clock):
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=30)
+    attempts = []
+
+    async def flaky():
+        attempts.append(None)
+        if len(attempts) < 3:
+            raise httpx.ConnectError("refused")
+        return "ok"
+
+    assert asyncio.run(call_with_retries(flaky, breaker, 3, 1, 0, 0)) == "ok"
+    assert len(attempts) == 3
+    assert breaker.failures == 0
+
+
+def test_call_with_retries_gives_up_on_non_retryable_status(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    request = httpx.Request("GET", "https://example.com")
+    attempts = []
+
+    async def not_found():
+        attempts.append(None)
+        raise httpx.HTTPStatusError("404", request=request, response=httpx.Response(404, request=request))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(call_with_retries(not_found, breaker, 3, 1, 0, 0))
+    assert len(attempts) == 1
+    assert breaker.state == CircuitBreaker.CLOSED
@@ -0,0 +1,81 @@
+# /tests/test_scheme_listing.py
+
+import pytest
+from fastapi import HTTPException
+
+from api.v1.funds.models import FundFamilyRequest
+from api.v1.funds.scheme_listing import list_schemes, scheme_plan
+
+
+def scheme(code, name, category="Equity", reinvestment_isin="-"):
+    return {
+        "Scheme_Code": code,
+        "Scheme_Name": name,
+        "Scheme_Category": category,
+        "ISIN_Div_Reinvestment": reinvestment_isin,
+        "Net_Asset_Value": 10.0,
+    }
+
+
+SCHEMES = [
+    scheme(100, "Alpha Fund - Growth"),
+    scheme(105, "Alpha Fund - IDCW"),
+    scheme(110, "Beta Fund - Growth", category="Debt"),
+    scheme(120, "Beta Fund - Dividend", category="Debt"),
+    scheme(130, "Gamma Fund", reinvestment_isin="INF000000002"),
+    scheme(140, None),
+]
+
+
+def listing(**params):
+    return list_schemes(SCHEMES, FundFamilyRequest(fund_family="Family", **params))
+
+
+def codes(result):
+    return [row["Scheme_Code"] for row in result["data"]]
+
+
+def test_scheme_plan_reads_the_name_then_the_reinvestment_isin():
+    assert [scheme_plan(row) for row in SCHEMES] == ["growth", "idcw", "growth", "idcw", "idcw", "growth"]
+
+
+def test_cursor_pages_cover_every_scheme_once():
+    seen, cursor = [], None
+    while True:
+        page = listing(limit=4, cursor=cursor)
+        seen += codes(page)
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [100, 105, 110, 120, 130, 140]
+
+
+def test_a_full_last_page_has_no_next_cursor():
+    page = listing(limit=3, cursor="110")
+    assert codes(page) == [120, 130, 140]
+    assert page["next_cursor"] is None
+
+
+def test_cursor_need_not_be_a_listed_code():
+    assert codes(listing(cursor="101")) == [105, 110, 120, 130, 140]
+    assert codes(listing(cursor="999")) == []
+
+
+def test_filters_apply_before_the_limit():
+    page = listing(plan="idcw", limit=2)
+    assert codes(page) == [105, 120]
+    assert page["next_cursor"] == "120"
+    assert codes(listing(plan="idcw", cursor="120")) == [130]
+    assert codes(listing(plan="growth", Scheme_Category="Debt")) == [110]
+
+
+def test_fields_are_projected():
+    page = listing(fields=["Scheme_Code", "Scheme_Name"], limit=1)
+    assert page["data"] == [{"Scheme_Code": 100, "Scheme_Name": "Alpha Fund - Growth"}]
+
+
+@pytest.mark.parametrize("params", [{"fields": ["Scheme_Code", "password"]}, {"cursor": "abc"}])
+def test_bad_fields_and_cursors_are_rejected(params):
+    with pytest.raises(HTTPException) as raised:
+        listing(**params)
+    assert raised.value.status_code == 400
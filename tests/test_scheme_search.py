@@ -0,0 +1,87 @@
+# /tests/test_scheme_search.py
+
+from api.v1.services.nav_snapshot import NavSnapshot
+from api.v1.services.scheme_search import SchemeSearchIndex, tokenize
+
+
+def scheme(code, name, growth_isin="-", reinvestment_isin="-"):
+    return {
+        "Scheme_Code": code,
+        "Scheme_Name": name,
+        "ISIN_Div_Payout_ISIN_Growth": growth_isin,
+        "ISIN_Div_Reinvestment": reinvestment_isin,
+        "Net_Asset_Value": 10.0,
+        "Mutual_Fund_Family": "Family",
+        "Scheme_Category": "Category",
+    }
+
+
+def build(schemes):
+    return SchemeSearchIndex(NavSnapshot(schemes, 0.0))
+
+
+def codes(results):
+    return [row["Scheme_Code"] for row in results]
+
+
+def test_tokenize_splits_on_non_alphanumerics():
+    assert tokenize("HDFC Mid-Cap Opportunities Fund (G)") == ["hdfc", "mid", "cap", "opportunities", "fund", "g"]
+    assert tokenize(None) == []
+
+
+def test_terms_match_as_token_prefixes_and_all_must_match():
+    index = build([
+        scheme(1, "Axis Bluechip Fund - Growth"),
+        scheme(2, "Axis Midcap Fund - Growth"),
+        scheme(3, "Kotak Bluechip Fund - Growth"),
+    ])
+    assert sorted(codes(index.search("blue"))) == [1, 3]
+    assert codes(index.search("axis blu")) == [1]
+    assert codes(index.search("luechip")) == []  # not a token prefix
+    assert codes(index.search("   ")) == []
+
+
+def test_exact_identifier_ranks_first():
+    index = build([
+        scheme(120, "Alpha Fund"),
+        scheme(1200, "Beta"),
+        scheme(3, "Gamma 120 Fund"),
+        scheme(4, "Delta Fund", growth_isin="INF120X01011"),
+    ])
+    results = codes(index.search("120"))
+    assert results[0] == 120
+    assert set(results) == {120, 1200, 3}
+    assert codes(index.search("inf120x01011")) == [4]
+    assert codes(index.search("INF120")) == [4]
+
+
+def test_whole_words_rank_above_prefixes():
+    index = build([
+        scheme(1, "Index Fund"),  # shorter name: earlier in static rank
+        scheme(2, "Nifty Ind Fund Direct"),
+    ])
+    # "ind" is a whole token of scheme 2 but only a prefix for scheme 1
+    assert codes(index.search("ind")) == [2, 1]
+
+
+def test_ties_break_by_shorter_name():
+    index = build([
+        scheme(1, "Liquid Fund Regular Plan Growth"),
+        scheme(2, "Liquid Fund Growth"),
+        scheme(3, "Liquid Fund Direct Growth"),
+    ])
+    assert codes(index.search("liquid")) == [2, 3, 1]
+
+
+def test_limit_and_long_prefix_merge():
+    index = build([scheme(i, f"Opportunities{i} Fund") for i in range(1, 31)])
+    assert len(index.search("opportun", limit=5)) == 5
+    assert len(index.search("opportun", limit=50)) == 30
+    assert codes(index.search("opportunities17")) == [17]
+
+
+def test_repeated_queries_are_memoized():
+    index = build([scheme(1, "Axis Bluechip Fund")])
+    first = index.search("Axis  bluechip")
+    assert index.search("axis bluechip") is first
+    assert index.cache_hits == 1
@@ -0,0 +1,88 @@
+# /tests/test_snapshot_file.py
+
+import pytest
+
+from api.v1.services.snapshot_file import (
+    SnapshotFileError, decode_snapshot, encode_snapshot, read_snapshot_file, write_snapshot_file,
+)
+
+SCHEMES = [
+    {
+        "Scheme_Code": 100001,
+        "Scheme_Name": "Alpha Fund - Growth",
+        "Net_Asset_Value": 12.3456,
+        "Date": "17-Oct-2026",
+        "Scheme_Category": "Equity Scheme - Large Cap Fund",
+        "ISIN_Div_Reinvestment": None,
+    },
+    {
+        "Scheme_Code": 100002,
+        "Scheme_Name": "Alpha Fund - IDCW",
+        "Net_Asset_Value": 10,  # an int among floats
+        "Date": "17-Oct-2026",
+        "Scheme_Category": "Equity Scheme - Large Cap Fund",
+        "ISIN_Div_Reinvestment": "INF000A01011",
+    },
+    {
+        # Missing Scheme_Category and ISIN_Div_Reinvestment; None Scheme_Name
+        "Scheme_Code": 100003,
+        "Scheme_Name": None,
+        "Net_Asset_Value": 0.5,
+        "Date": "16-Oct-2026",
+    },
+]
+
+
+def test_round_trip_keeps_none_and_missing_fields_apart():
+    schemes, fetched_at = decode_snapshot(encode_snapshot(SCHEMES, 1792200000.25))
+    assert fetched_at == 1792200000.25
+    assert schemes == SCHEMES
+    assert schemes[0]["ISIN_Div_Reinvestment"] is None
+    assert "ISIN_Div_Reinvestment" not in schemes[2]
+    assert "Scheme_Category" not in schemes[2]
+
+
+def test_column_types_survive_the_round_trip():
+    schemes, _ = decode_snapshot(encode_snapshot(SCHEMES, 0.0))
+    assert all(type(scheme["Scheme_Code"]) is int for scheme in schemes)
+    assert all(type(scheme["Net_Asset_Value"]) is float for scheme in schemes)
+    assert schemes[1]["Net_Asset_Value"] == 10.0
+
+
+def test_mixed_and_nested_values_round_trip():
+    rows = [
+        {"Scheme_Code": 1, "extra": {"a": [1, 2]}},
+        {"Scheme_Code": 2, "extra": "text"},
+        {"Scheme_Code": 3, "extra": None},
+        {"Scheme_Code": 4},
+        {"Scheme_Code": 5, "extra": True},
+    ]
+    assert decode_snapshot(encode_snapshot(rows, 1.0))[0] == rows
+
+
+def test_empty_snapshot_round_trips():
+    assert decode_snapshot(encode_snapshot([], 5.0)) == ([], 5.0)
+
+
+def test_file_round_trip(tmp_path):
+    path = tmp_path / "nested" / "nav_snapshot.bin"
+    size = write_snapshot_file(str(path), SCHEMES, 42.0)
+    assert path.stat().st_size == size
+    assert read_snapshot_file(str(path)) == (SCHEMES, 42.0)
+    # Replaced atomically, with no temporary files left behind
+    write_snapshot_file(str(path), SCHEMES[:1], 43.0)
+    assert read_snapshot_file(str(path)) == (SCHEMES[:1], 43.0)
+    assert [p.name for p in path.parent.iterdir()] == ["nav_snapshot.bin"]
+
+
+def test_missing_file_raises_file_not_found(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        read_snapshot_file(str(tmp_path / "absent.bin"))
+
+
+def test_foreign_or_truncated_data_is_rejected():
+    data = encode_snapshot(SCHEMES, 1.0)
+    with pytest.raises(SnapshotFileError):
+        decode_snapshot(b"NOTNAV\x00\x01" + data[8:])
+    with pytest.raises(SnapshotFileError):
+        decode_snapshot(data[: len(data) // 2])
@@ -0,0 +1,59 @@
+# /tests/test_stream_tickets.py
+
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from api.v1.auth import stream_tickets
+from api.v1.auth.auth_dependencies import get_stream_user
+from api.v1.services.indexes import ensure_indexes
+
+
+def test_a_ticket_opens_one_stream(mongo):
+    async def scenario():
+        await ensure_indexes(mongo)
+        ticket = await stream_tickets.issue_ticket(mongo, "a@x.com")
+        assert await get_stream_user(authorization=None, ticket=ticket, mongo_service=mongo) == {"email": "a@x.com"}
+        with pytest.raises(HTTPException) as raised:
+            await get_stream_user(authorization=None, ticket=ticket, mongo_service=mongo)
+        assert raised.value.status_code == 401
+
+    asyncio.run(scenario())
+
+
+def test_only_the_digest_is_stored(mongo):
+    async def scenario():
+        ticket = await stream_tickets.issue_ticket(mongo, "a@x.com")
+        [stored] = await mongo.find_all(stream_tickets.DB_NAME, stream_tickets.COLLECTION_NAME, {})
+        assert ticket not in stored.values()
+
+    asyncio.run(scenario())
+
+
+def test_expired_and_unknown_tickets_are_rejected(mongo, monkeypatch):
+    async def scenario():
+        monkeypatch.setitem(stream_tickets.CONFIG, "STREAM_TICKET_SECONDS", -1)
+        expired = await stream_tickets.issue_ticket(mongo, "a@x.com")
+        assert await stream_tickets.redeem_ticket(mongo, expired) is None
+        assert await stream_tickets.redeem_ticket(mongo, "made-up") is None
+
+    asyncio.run(scenario())
+
+
+def test_racing_redemptions_open_at_most_one_stream(mongo):
+    async def scenario():
+        ticket = await stream_tickets.issue_ticket(mongo, "a@x.com")
+        results = await asyncio.gather(*(stream_tickets.redeem_ticket(mongo, ticket) for _ in range(5)))
+        assert results.count("a@x.com") == 1
+
+    asyncio.run(scenario())
+
+
+def test_a_bearer_token_is_no_longer_accepted_as_a_query_parameter(mongo):
+    async def scenario():
+        with pytest.raises(HTTPException) as raised:
+            await get_stream_user(authorization=None, ticket=None, mongo_service=mongo)
+        assert raised.value.status_code == 401
+
+    asyncio.run(scenario())
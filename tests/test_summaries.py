@@ -0,0 +1,218 @@
+# /tests/test_summaries.py
+
+import asyncio
+
+import pytest
+
+from api.v1.portfolio import summaries
+from api.v1.portfolio.summaries import DB_NAME, PURCHASES, SUMMARIES
+
+
+def purchase(email, code, units, nav, category="Equity", invested=None):
+    return {
+        "email": email,
+        "Scheme_Code": code,
+        "Scheme_Category": category,
+        "units": units,
+        "Net_Asset_Value": nav,
+        "total_cost": units * nav,
+        "invested_amount": units * nav if invested is None else invested,
+    }
+
+
+async def insert_purchases(mongo, *documents):
+    await mongo.get_collection(DB_NAME, PURCHASES).insert_many([dict(document) for document in documents])
+
+
+async def stored_summary(mongo, email):
+    return await mongo.find_one(DB_NAME, SUMMARIES, {"email": email})
+
+
+def test_category_keys_round_trip_dots_and_dollars():
+    for category in ("Equity Scheme - Large Cap Fund", "Debt.Gilt", "$Odd"):
+        key = summaries.category_key(category)
+        assert "." not in key and not key.startswith("$")
+        assert summaries.category_name(key) == category
+    assert summaries.category_key(None) == "Unknown"
+
+
+def test_apply_purchase_adds_a_new_holding_and_revalues_an_existing_one(mongo):
+    async def scenario():
+        await summaries.apply_purchase(mongo, "a@x.com", None, units=10, nav=5.0, category="Equity")
+        summary = await stored_summary(mongo, "a@x.com")
+        assert (summary["invested_amount"], summary["current_value"], summary["holdings"]) == (50.0, 50.0, 1)
+        assert summary["categories"]["Equity"] == {"invested_amount": 50.0, "current_value": 50.0, "holdings": 1}
+
+        # Buying more at a new NAV moves the whole holding to it; the stored category wins
+        previous = {"units": 10, "total_cost": 50.0, "Scheme_Category": "Equity"}
+        await summaries.apply_purchase(mongo, "a@x.com", previous, units=5, nav=6.0, category="Other")
+        summary = await stored_summary(mongo, "a@x.com")
+        assert (summary["invested_amount"], summary["current_value"], summary["holdings"]) == (80.0, 90.0, 1)
+        assert "Other" not in summary["categories"]
+        assert summary["version"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_rebuild_stores_the_aggregate_as_a_complete_baseline(mongo):
+    async def scenario():
+        await insert_purchases(
+            mongo,
+            purchase("a@x.com", 1, 10, 5.0, invested=40.0),
+            purchase("a@x.com", 2, 2, 100.0, category="Debt.Gilt"),
+            purchase("b@x.com", 1, 1, 5.0),
+        )
+        summary = await summaries.get_summary(mongo, "a@x.com")
+        assert (summary["invested_amount"], summary["current_value"], summary["holdings"]) == (240.0, 250.0, 2)
+        stored = await stored_summary(mongo, "a@x.com")
+        assert stored["complete"] and stored["version"] == 1
+        assert stored["categories"][summaries.category_key("Debt.Gilt")]["current_value"] == 200.0
+
+        response = summaries.summary_response(stored)
+        assert response["gain"] == 10.0
+        assert [row["Scheme_Category"] for row in response["categories"]] == ["Debt.Gilt", "Equity"]
+
+    asyncio.run(scenario())
+
+
+def test_rebuild_retries_when_a_delta_lands_during_the_aggregation(mongo, monkeypatch):
+    async def scenario():
+        await insert_purchases(mongo, purchase("a@x.com", 1, 10, 5.0))
+        await summaries.rebuild_summary(mongo, "a@x.com")
+
+        aggregate = summaries._aggregate_summary
+        calls = []
+
+        async def racing_aggregate(mongo_, email):
+            calls.append(email)
+            if len(calls) == 1:
+                # A /buy writes its purchase and its delta while the first aggregation runs
+                await insert_purchases(mongo, purchase("a@x.com", 2, 1, 20.0))
+                await summaries.apply_purchase(mongo, "a@x.com", None, 1, 20.0, "Equity")
+                return await aggregate(mongo_, "nobody@x.com")
+            return await aggregate(mongo_, email)
+
+        monkeypatch.setattr(summaries, "_aggregate_summary", racing_aggregate)
+        summary = await summaries.rebuild_summary(mongo, "a@x.com")
+        assert len(calls) == 2
+        assert summary["current_value"] == 70.0
+        assert (await stored_summary(mongo, "a@x.com"))["current_value"] == 70.0
+
+    asyncio.run(scenario())
+
+
+def test_invalidated_summary_is_rebuilt_on_read(mongo):
+    async def scenario():
+        await insert_purchases(mongo, purchase("a@x.com", 1, 10, 5.0))
+        await summaries.apply_purchase(mongo, "a@x.com", None, 10, 5.0, "Equity")
+        await summaries.apply_purchase(mongo, "a@x.com", None, 10, 5.0, "Equity")  # a double-counted delta
+        await summaries.invalidate_summary(mongo, "a@x.com")
+        assert (await summaries.get_summary(mongo, "a@x.com"))["current_value"] == 50.0
+
+    asyncio.run(scenario())
+
+
+def test_reconcile_rebuilds_every_summary_in_batches_and_counts_drift(mongo, monkeypatch):
+    async def scenario():
+        emails = [f"u{i}@x.com" for i in range(5)]
+        for email in emails:
+            await insert_purchases(mongo, purchase(email, 1, 10, 5.0))
+            await summaries.rebuild_summary(mongo, email)
+        # One summary missed a delta
+        await mongo.update_one(DB_NAME, SUMMARIES, {"email": "u3@x.com"}, {"$inc": {"current_value": -5.0}})
+
+        in_flight = 0
+        peak = 0
+        rebuild = summaries._rebuild_summary
+
+        async def tracking_rebuild(mongo_, email):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0)
+            try:
+                return await rebuild(mongo_, email)
+            finally:
+                in_flight -= 1
+
+        monkeypatch.setattr(summaries, "_rebuild_summary", tracking_rebuild)
+        result = await summaries.reconcile_summaries(mongo, batch_size=2)
+        assert result == {"summaries": 5, "drifted": 1}
+        assert peak == 2
+        assert (await stored_summary(mongo, "u3@x.com"))["current_value"] == 50.0
+
+    asyncio.run(scenario())
+
+
+def test_reconcile_does_not_count_a_concurrent_delta_as_drift(mongo, monkeypatch):
+    async def scenario():
+        await insert_purchases(mongo, purchase("a@x.com", 1, 10, 5.0))
+        await summaries.rebuild_summary(mongo, "a@x.com")
+
+        aggregate = summaries._aggregate_summary
+        raced = []
+
+        async def racing_aggregate(mongo_, email):
+            if not raced:
+                raced.append(email)
+                await insert_purchases(mongo, purchase("a@x.com", 2, 1, 20.0))
+                await summaries.apply_purchase(mongo, "a@x.com", None, 1, 20.0, "Equity")
+            return await aggregate(mongo_, email)
+
+        monkeypatch.setattr(summaries, "_aggregate_summary", racing_aggregate)
+        assert await summaries.reconcile_summaries(mongo) == {"summaries": 1, "drifted": 0}
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("epoch", [None, 4])
+def test_revaluation_writes_and_sums_each_purchases_own_delta(mongo, epoch):
+    async def scenario():
+        await insert_purchases(
+            mongo,
+            purchase("a@x.com", 1, 10, 5.0),
+            purchase("a@x.com", 2, 2, 100.0, category="Debt"),
+            purchase("b@x.com", 1, 4, 5.0),
+            purchase("c@x.com", 2, 1, 110.0, category="Debt"),  # already at the new NAV
+        )
+        result = await summaries.revalue_purchases(mongo, {1: 6.0, 2: 110.0}, "cycle-1", epoch)
+        assert (result["matched"], result["modified"]) == (3, 3)
+
+        increments = await summaries.revaluation_increments(mongo, "cycle-1")
+        assert increments == {
+            "a@x.com": {"current_value": 30.0, "categories.Equity.current_value": 10.0, "categories.Debt.current_value": 20.0},
+            "b@x.com": {"current_value": 4.0, "categories.Equity.current_value": 4.0},
+        }
+        a = await mongo.find_one(DB_NAME, PURCHASES, {"email": "a@x.com", "Scheme_Code": 1})
+        assert (a["Net_Asset_Value"], a["total_cost"], a.get("revaluation_epoch")) == (6.0, 60.0, epoch)
+
+    asyncio.run(scenario())
+
+
+def test_revaluation_skips_purchases_revalued_under_a_newer_epoch(mongo):
+    async def scenario():
+        await insert_purchases(mongo, {**purchase("a@x.com", 1, 10, 5.0), "revaluation_epoch": 5})
+        result = await summaries.revalue_purchases(mongo, {1: 6.0}, "stale", epoch=4)
+        assert result["modified"] == 0
+        assert await summaries.revaluation_increments(mongo, "stale") == {}
+
+        await summaries.revalue_purchases(mongo, {1: 6.0}, "current", epoch=5)
+        assert await summaries.revaluation_increments(mongo, "current") == {
+            "a@x.com": {"current_value": 10.0, "categories.Equity.current_value": 10.0},
+        }
+
+    asyncio.run(scenario())
+
+
+def test_apply_revaluation_only_touches_existing_summaries(mongo):
+    async def scenario():
+        await summaries.apply_purchase(mongo, "a@x.com", None, 10, 5.0, "Equity")
+        updated = await summaries.apply_revaluation(mongo, {
+            "a@x.com": {"current_value": 10.0, "categories.Equity.current_value": 10.0},
+            "ghost@x.com": {"current_value": 1.0},
+        })
+        assert updated == 1
+        assert (await stored_summary(mongo, "a@x.com"))["current_value"] == 60.0
+        assert await stored_summary(mongo, "ghost@x.com") is None
+
+    asyncio.run(scenario())
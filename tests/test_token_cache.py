@@ -0,0 +1,82 @@
+# /tests/test_token_cache.py
+
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from api.v1.auth import auth_security
+from api.v1.auth.auth_security import AuthSecurity, VerifiedTokenCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(auth_security, "time", clock)
+    return clock
+
+
+def test_entries_are_served_until_the_token_expires(clock):
+    cache = VerifiedTokenCache(maxsize=8)
+    cache.put("token", {"email": "a@x.com", "exp": 1010})
+    assert cache.get("token") == {"email": "a@x.com", "exp": 1010}
+    clock.now = 1010
+    assert cache.get("token") is None
+    assert cache.stats() == {"size": 0, "maxsize": 8, "hits": 1, "misses": 1}
+
+
+def test_tokens_without_a_numeric_exp_are_never_cached(clock):
+    cache = VerifiedTokenCache(maxsize=8)
+    cache.put("no-exp", {"email": "a@x.com"})
+    cache.put("odd-exp", {"email": "a@x.com", "exp": "soon"})
+    assert cache.stats()["size"] == 0
+
+
+def test_least_recently_used_token_is_evicted(clock):
+    cache = VerifiedTokenCache(maxsize=2)
+    for token in ("a", "b"):
+        cache.put(token, {"exp": 2000})
+    cache.get("a")
+    cache.put("c", {"exp": 2000})
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+
+def test_raw_tokens_are_not_kept(clock):
+    cache = VerifiedTokenCache(maxsize=2)
+    cache.put("secret-token", {"exp": 2000})
+    assert all(isinstance(key, bytes) and b"secret-token" not in key for key in cache._entries)
+
+
+def test_get_current_user_verifies_once_then_rejects_after_expiry(monkeypatch):
+    monkeypatch.setattr(auth_security, "SECRET_KEY", "test-secret-" + "x" * 32)
+    monkeypatch.setattr(auth_security, "token_cache", VerifiedTokenCache(maxsize=8))
+    decode = AuthSecurity.decode_access_token
+    decoded = []
+
+    def counting_decode(token):
+        decoded.append(token)
+        return decode(token)
+
+    monkeypatch.setattr(AuthSecurity, "decode_access_token", staticmethod(counting_decode))
+
+    token = AuthSecurity.create_access_token({"email": "a@x.com"})
+    assert AuthSecurity.get_current_user(token)["email"] == "a@x.com"
+    assert AuthSecurity.get_current_user(token)["email"] == "a@x.com"
+    assert len(decoded) == 1
+
+    expired = AuthSecurity.create_access_token({"email": "a@x.com"}, expires_delta=timedelta(seconds=-1))
+    with pytest.raises(HTTPException) as raised:
+        AuthSecurity.get_current_user(expired)
+    assert raised.value.status_code == 401
+    with pytest.raises(HTTPException):
+        AuthSecurity.get_current_user(token[:-2] + "xx")
+    assert auth_security.token_cache.stats()["size"] == 1
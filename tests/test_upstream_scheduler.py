@@ -0,0 +1,173 @@
+# /tests/test_upstream_scheduler.py
+
+import asyncio
+import heapq
+import time
+
+import pytest
+
+from api.v1.services.upstream_scheduler import (
+    BACKGROUND, INTERACTIVE, QuotaExceeded, UpstreamScheduler, background_priority,
+)
+
+
+def make_scheduler(rate=20.0, burst=1, max_queue=10, interactive_wait=5.0, background_wait=5.0):
+    return UpstreamScheduler(rate, burst, max_queue, {INTERACTIVE: interactive_wait, BACKGROUND: background_wait})
+
+
+def test_burst_is_admitted_without_waiting():
+    async def scenario():
+        scheduler = make_scheduler(rate=1, burst=3)
+        for _ in range(3):
+            await scheduler.acquire()
+        assert scheduler.admitted == 3
+        assert scheduler.queued() == 0
+
+    asyncio.run(scenario())
+
+
+def test_zero_rate_disables_limiting():
+    async def scenario():
+        scheduler = make_scheduler(rate=0, burst=0)
+        for _ in range(100):
+            await scheduler.acquire()
+
+    asyncio.run(scenario())
+
+
+def test_interactive_waiters_are_served_before_background():
+    async def scenario():
+        scheduler = make_scheduler()
+        await scheduler.acquire()  # drain the bucket
+        order = []
+
+        async def wait(name, priority):
+            await scheduler.acquire(priority)
+            order.append(name)
+
+        tasks = [asyncio.ensure_future(wait(f"background-{i}", BACKGROUND)) for i in range(2)]
+        await asyncio.sleep(0)
+        tasks += [asyncio.ensure_future(wait(f"interactive-{i}", INTERACTIVE)) for i in range(2)]
+        await asyncio.gather(*tasks)
+        assert order == ["interactive-0", "interactive-1", "background-0", "background-1"]
+
+    asyncio.run(scenario())
+
+
+def test_context_priority_is_background_inside_the_block():
+    async def scenario():
+        scheduler = make_scheduler(rate=1, background_wait=0.01)
+        await scheduler.acquire()
+        with background_priority():
+            with pytest.raises(QuotaExceeded):
+                await scheduler.acquire()
+        stats = scheduler.stats()
+        assert stats["rejected"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_rejected_up_front_when_expected_wait_exceeds_budget():
+    async def scenario():
+        scheduler = make_scheduler(rate=1, interactive_wait=0.5)
+        await scheduler.acquire()
+        start = time.monotonic()
+        with pytest.raises(QuotaExceeded) as error:
+            await scheduler.acquire()
+        assert time.monotonic() - start < 0.1
+        assert error.value.retry_after == pytest.approx(1, abs=0.05)
+
+    asyncio.run(scenario())
+
+
+def test_rejected_when_queue_is_full():
+    async def scenario():
+        scheduler = make_scheduler(max_queue=1)
+        await scheduler.acquire()
+        waiter = asyncio.ensure_future(scheduler.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(QuotaExceeded, match="queue_full"):
+            await scheduler.acquire()
+        await waiter
+
+    asyncio.run(scenario())
+
+
+def test_waiter_overtaken_past_its_budget_times_out():
+    async def scenario():
+        # One token per 100ms; the background waiter expects ~100ms and may wait 150ms,
+        # but two interactive callers arriving after it are served first
+        scheduler = make_scheduler(rate=10, background_wait=0.15)
+        await scheduler.acquire()
+        background = asyncio.ensure_future(scheduler.acquire(BACKGROUND))
+        await asyncio.sleep(0)
+        interactive = [asyncio.ensure_future(scheduler.acquire(INTERACTIVE)) for _ in range(2)]
+        with pytest.raises(QuotaExceeded, match="deadline"):
+            await background
+        await asyncio.gather(*interactive)
+        assert scheduler.queued() == 0
+
+    asyncio.run(scenario())
+
+
+def grant(scheduler):
+    """
+    Hand the head of the queue a token, as the dispatcher would.
+    """
+    priority, _, future = heapq.heappop(scheduler._queue)
+    scheduler._waiting[priority] -= 1
+    scheduler._tokens -= 1
+    future.set_result(None)
+
+
+def test_token_granted_as_the_wait_times_out_is_used():
+    async def scenario():
+        scheduler = make_scheduler(rate=20, interactive_wait=0.06)
+        await scheduler.acquire()
+        # Grants are manual, so the grant and the timeout can land in the same loop iteration
+        scheduler._dispatcher = asyncio.ensure_future(asyncio.sleep(3600))
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        loop.call_at(start + 0.05, time.sleep, 0.03)  # block past both the grant and the timeout
+        loop.call_at(start + 0.055, grant, scheduler)
+        await scheduler.acquire()
+        assert scheduler.rejected == 0
+        assert scheduler.admitted == 2
+        assert scheduler.queued() == 0
+        scheduler._dispatcher.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_returns_a_granted_token():
+    async def scenario():
+        scheduler = make_scheduler(rate=1)
+        await scheduler.acquire()
+        scheduler._dispatcher = asyncio.ensure_future(asyncio.sleep(3600))
+        waiter = asyncio.ensure_future(scheduler.acquire())
+        await asyncio.sleep(0)
+        scheduler._tokens = 1.0
+        grant(scheduler)
+        waiter.cancel()  # granted, but cancelled before it resumed
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert scheduler._tokens == pytest.approx(1, abs=0.05)
+        assert scheduler.admitted == 1
+        scheduler._dispatcher.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        scheduler = make_scheduler(rate=1)
+        await scheduler.acquire()
+        waiter = asyncio.ensure_future(scheduler.acquire())
+        await asyncio.sleep(0)
+        assert scheduler.queued() == 1
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert scheduler.queued() == 0
+
+    asyncio.run(scenario())